@@ -0,0 +1,34 @@
+"""partial index on unread messages
+
+Revision ID: a3c9e1f4b2d7
+Revises: 05fd5360d17f
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e1f4b2d7'
+down_revision: Union[str, None] = '05fd5360d17f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_messages_unread_order',
+        'messages',
+        ['order_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_read'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_unread_order', table_name='messages')
@@ -0,0 +1,44 @@
+"""chat change feed
+
+Revision ID: c4e8a2d6f1b3
+Revises: b7d2f0c8e4a1
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2d6f1b3'
+down_revision: Union[str, None] = 'b7d2f0c8e4a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'chat_changes',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('message_id', sa.Integer(), nullable=True),
+        sa.Column('type', sa.String(length=32), nullable=False),
+        sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_chat_changes_owner_id_id', 'chat_changes', ['owner_id', 'id'], unique=False)
+    op.create_index('ix_chat_changes_order_id_id', 'chat_changes', ['order_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_changes_order_id_id', table_name='chat_changes')
+    op.drop_index('ix_chat_changes_owner_id_id', table_name='chat_changes')
+    op.drop_table('chat_changes')
@@ -0,0 +1,28 @@
+"""job outbox lease
+
+Revision ID: e5b1d7a3c9f2
+Revises: c4e8a2d6f1b3
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1d7a3c9f2'
+down_revision: Union[str, None] = 'c4e8a2d6f1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('job_outbox', sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('job_outbox', 'locked_until')
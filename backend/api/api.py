@@ -19,6 +19,9 @@ from backend.api.endpoints.admin_messages import router as  admin_messages_route
 # оплата
 from backend.api.endpoints.payments     import router as payments_router
 
+# бот (webhook-режим)
+from backend.api.endpoints.telegram_webhook import router as telegram_webhook_router
+
 # WebSocket
 
 # админ-панель
@@ -46,6 +49,9 @@ api_router.include_router(
     dependencies=[]
 )
 
+# ───────── бот: апдейты Telegram в webhook-режиме (/api/telegram/webhook)
+api_router.include_router(telegram_webhook_router, prefix="/telegram", tags=["Telegram"])
+
 
 # ───────── админ-панель
 # префикс (/admin/…) уже зашит внутри admin_router
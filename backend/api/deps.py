@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import AsyncGenerator, Set
+from typing import Set
 
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -19,10 +19,12 @@ logger = logging.getLogger(__name__)
 # ----------------------------------------------------------------------------
 # 0. Telegram auth manager (singleton)
 # ----------------------------------------------------------------------------
-telegram_auth_manager = get_telegram_auth_manager(
-    bot_token=settings.TELEGRAM_BOT_TOKEN,
-    timeout_sec=60 * 60 * 24,  # 24h – читается из settings при желании
-)
+AUTH_TIMEOUT_SEC = 60 * 60 * 24  # 24h – читается из settings при желании
+
+
+def auth_manager():
+    """Менеджер создаётся при первом запросе, а не при импорте (он закэширован)."""
+    return get_telegram_auth_manager(bot_token=settings.TELEGRAM_BOT_TOKEN, timeout_sec=AUTH_TIMEOUT_SEC)
 
 # ----------------------------------------------------------------------------
 # 1. Белый список администраторов
@@ -34,9 +36,9 @@ logger.info("[AUTH] Загружен whitelist админов: %s", _ALLOWED_ADM
 # ----------------------------------------------------------------------------
 # 2. Сессия к базе данных
 # ----------------------------------------------------------------------------
-async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
-    async for session in get_db():
-        yield session
+# Тот же callable, что и `get_db`: FastAPI кэширует зависимости по функции,
+# так что auth и эндпоинт делят одну сессию (раньше обёртка давала вторую).
+get_db_session = get_db
 
 # ----------------------------------------------------------------------------
 # 3. Current user dependency (Telegram initData)
@@ -59,7 +61,12 @@ async def get_current_user(
     # ------------------------------------------------------------------
     # Validate initData + upsert user
     # ------------------------------------------------------------------
-    is_valid, user_info = telegram_auth_manager.authenticate(init_data_raw)
+    # RateLimitMiddleware уже проверил этот initData — не считаем HMAC дважды
+    cached = getattr(request.state, "telegram_auth", None)
+    if cached and cached[0] == init_data_raw:
+        is_valid, user_info = cached[1], cached[2]
+    else:
+        is_valid, user_info = auth_manager().authenticate(init_data_raw)
     if not is_valid:
         logger.warning("[AUTH] initData failed signature/TTL check")
         raise HTTPException(
@@ -115,6 +122,8 @@ async def admin_guard(user: User = Depends(get_current_user)) -> User:
 # 5. Exports
 # ----------------------------------------------------------------------------
 __all__ = [
+    "auth_manager",
+    "get_db",
     "get_db_session",
     "get_current_user",
     "admin_guard",
@@ -7,15 +7,15 @@ ADMIN-panel API.
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..deps import admin_guard, get_db
+from ..deps import admin_guard
 from backend.schemas.admin import AdminMessageWithExtras
 from backend.services.crud import admin_crud
 
 # импорт под-роутеров (без префиксов!)
 from .admin_products import router as admin_products_router
 from .admin_messages import router as admin_messages_router
+from .admin_bulk import router as admin_bulk_router
 
 # ──────────────────────────────────────────────
 # Главный роутер админки
@@ -42,10 +42,9 @@ async def admin_home(admin=Depends(admin_guard)):
     response_model=AdminMessageWithExtras,
     summary="Dashboard metrics",
 )
-async def get_admin_dashboard(
-    db: AsyncSession = Depends(get_db),
-) -> AdminMessageWithExtras:
-    stats = await admin_crud.get_admin_stats(db)
+async def get_admin_dashboard() -> AdminMessageWithExtras:
+    # одновременные запросы дашборда — один набор COUNT-ов (single-flight)
+    stats = await admin_crud.get_admin_stats_shared()
     return AdminMessageWithExtras(**stats)
 
 # ──────────────────────────────────────────────
@@ -68,6 +67,15 @@ router.include_router(
     tags=["Admin • Messages"],
 )
 
+# ──────────────────────────────────────────────
+#    массовый импорт / экспорт (/api/admin/bulk)
+# ──────────────────────────────────────────────
+router.include_router(
+    admin_bulk_router,
+    prefix="/bulk",
+    tags=["Admin • Bulk"],
+)
+
 # ──────────────────────────────────────────────
 #    prefix для отчёта (/api/admin/report)
 # ──────────────────────────────────────────────
@@ -0,0 +1,79 @@
+# backend/api/endpoints/admin_bulk.py
+"""
+Массовые операции админки (/api/admin/bulk/*).
+
+* `POST /products/import` — JSON Lines или CSV в теле запроса, батчевый upsert;
+* `GET  /{products,orders,messages}/export` — потоковая выгрузка из серверного курсора.
+"""
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.deps import get_db
+from backend.schemas.bulk import BulkImportReport
+from backend.services import bulk
+
+router = APIRouter()
+
+Format = Literal["jsonl", "csv"]
+
+
+def _export(fmt: str, name: str, stmt, fields) -> StreamingResponse:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        bulk.encode(fmt, bulk.stream_rows(stmt), fields),
+        media_type=bulk.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}-{stamp}.{fmt}"'},
+    )
+
+
+@router.post(
+    "/products/import",
+    response_model=BulkImportReport,
+    summary="Массовый импорт товаров (JSONL / CSV)",
+)
+async def import_products(
+    request: Request,
+    format: Format = Query("jsonl", description="Формат тела запроса"),
+    db: AsyncSession = Depends(get_db),
+) -> BulkImportReport:
+    """
+    Строка — товар: `title`, `price`, `description`, `image_url` и
+    `category` (имя, создаётся при отсутствии) либо `category_id`.
+    С `id` — обновление существующего товара. Формат совпадает с
+    `/products/export`, выгрузку можно загрузить обратно как есть.
+    """
+    report = await bulk.import_products(db, bulk.iter_records(format, request.stream()))
+    if report.received == 0:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Пустое тело импорта")
+    return report
+
+
+@router.get("/products/export", summary="Выгрузка каталога")
+async def export_products(format: Format = Query("jsonl")):
+    return _export(format, "products", bulk.products_query(), bulk.PRODUCT_FIELDS)
+
+
+@router.get("/orders/export", summary="Выгрузка заказов")
+async def export_orders(
+    format: Format = Query("jsonl"),
+    since: Optional[datetime] = Query(None, description="created_at >= since"),
+    until: Optional[datetime] = Query(None, description="created_at < until"),
+    order_status: Optional[str] = Query(None, alias="status"),
+):
+    stmt = bulk.orders_query(since=since, until=until, status=order_status)
+    return _export(format, "orders", stmt, bulk.ORDER_FIELDS)
+
+
+@router.get("/messages/export", summary="Выгрузка сообщений")
+async def export_messages(
+    format: Format = Query("jsonl"),
+    since: Optional[datetime] = Query(None, description="created_at >= since"),
+    until: Optional[datetime] = Query(None, description="created_at < until"),
+    order_id: Optional[int] = Query(None, ge=1),
+):
+    stmt = bulk.messages_query(since=since, until=until, order_id=order_id)
+    return _export(format, "messages", stmt, bulk.MESSAGE_FIELDS)
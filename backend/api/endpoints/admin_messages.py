@@ -1,6 +1,6 @@
 # backend/api/endpoints/admin_messages.py
+import base64
 import logging
-import asyncio
 from datetime import datetime, timedelta
 from typing import List, Optional
 
@@ -11,7 +11,8 @@ from fastapi import (
     Query,
     status,
 )
-from sqlalchemy import select, func, and_, delete
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.api.deps import (
@@ -20,15 +21,28 @@ from backend.api.deps import (
     get_current_user,
 )
 
-# нотификаторы (e-mail / бот), сам manager с WS не нужен
-from backend.api.websockets.manager import (
-    notify_new_message_to_admins as notify_admins,
-    notify_admin_reply_to_user   as notify_user_about_reply,
-)
+# нотификации — фоновыми задачами после COMMIT, сам manager с WS не нужен
+from backend.api.websockets.manager import message_snapshot
 
+from backend.core.admission import Superseded, longpoll_admission
+from backend.core.database import async_session, release_connection
+from backend.core.events import event_bus
+from backend.core.jobs import job_queue
+from backend.core.serialization import json_response
 from backend.models.message import Message
 from backend.models.user    import User
-from backend.schemas.message import MessageCreate, MessageOut, MessageReply
+from backend.schemas.admin import AdminMessagePage
+from backend.schemas.message import (
+    MarkReadRequest,
+    MarkReadResult,
+    MessageCreate,
+    MessageOut,
+    MessageReply,
+    SyncEvent,
+    SyncResponse,
+)
+from backend.services.change_feed import change_feed, parse_cursor
+from backend.services.crud import message_extra_crud
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Admin • Messages"])
@@ -47,31 +61,187 @@ def _parse_since(raw: Optional[str]) -> Optional[datetime]:
         raise HTTPException(422, "Параметр since/after должен быть ISO-датой")
 
 
-async def push_to_order_subscribers(order_id: int, update_type: str, data: dict):
-    """Заглушка: просто логируем событие, без WS-рассылки."""
-    logger.info(
-        f"[polling-mode] order={order_id} update={update_type} payload={data}"
+def _encode_cursor(cursor: Optional[tuple[datetime, int]]) -> Optional[str]:
+    if cursor is None:
+        return None
+    raw = f"{cursor[0].isoformat()}|{cursor[1]}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(raw: Optional[str]) -> Optional[tuple[datetime, int]]:
+    if not raw:
+        return None
+    try:
+        ts, _, msg_id = base64.urlsafe_b64decode(raw.encode()).decode().partition("|")
+        return datetime.fromisoformat(ts), int(msg_id)
+    except ValueError:
+        raise HTTPException(422, "Некорректный cursor")
+
+
+def _admin_filters(
+    since: Optional[str] = Query(None, description="ISO: created_at >= since"),
+    until: Optional[str] = Query(None, description="ISO: created_at < until"),
+    order_id: Optional[int] = Query(None, ge=1),
+    is_read: Optional[bool] = Query(None),
+) -> dict:
+    return {
+        "since": _parse_since(since),
+        "until": _parse_since(until),
+        "order_id": order_id,
+        "is_read": is_read,
+    }
+
+
+# ---------------------------------------------------------------------------#
+#              все сообщения: страницы и потоковая выгрузка                  #
+# ---------------------------------------------------------------------------#
+# объявлены до /{order_id}, иначе "page"/"stream" уйдут в order_id
+STREAM_CHUNK_ROWS = 500
+
+
+@router.get(
+    "/page",
+    response_model=AdminMessagePage,
+    summary="Все сообщения постранично (keyset)",
+    dependencies=[Depends(admin_guard)],
+)
+async def admin_messages_page(
+    cursor: Optional[str] = Query(None, description="next_cursor предыдущей страницы"),
+    limit: int = Query(100, ge=1, le=1_000),
+    filters: dict = Depends(_admin_filters),
+    db: AsyncSession = Depends(get_db),
+):
+    items, next_cursor = await message_extra_crud.get_admin_messages_page(
+        db, after=_decode_cursor(cursor), limit=limit, **filters,
+    )
+    return AdminMessagePage(items=items, next_cursor=_encode_cursor(next_cursor))
+
+
+@router.get(
+    "/stream",
+    summary="Все сообщения потоком NDJSON",
+    response_class=StreamingResponse,
+    dependencies=[Depends(admin_guard)],
+)
+async def admin_messages_stream(filters: dict = Depends(_admin_filters)):
+    async def body():
+        # своя сессия: генератор дочитывается после выхода из эндпоинта
+        async with async_session() as db:
+            buf: list[str] = []
+            async for msg in message_extra_crud.stream_admin_messages(db, **filters):
+                buf.append(msg.model_dump_json())
+                if len(buf) >= STREAM_CHUNK_ROWS:
+                    yield ("\n".join(buf) + "\n").encode()
+                    buf.clear()
+            if buf:
+                yield ("\n".join(buf) + "\n").encode()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+# ---------------------------------------------------------------------------#
+#            события по всем заказам (новые чаты, сообщения, дельты)          #
+# ---------------------------------------------------------------------------#
+SYNC_TIMEOUT = 25
+# изменений за один ответ; остальное — следующим запросом (more=true)
+SYNC_LIMIT   = 500
+
+@router.get(
+    "/sync",
+    response_model=SyncResponse,
+    summary="Long-poll: все события чатов после ?cursor (с дельтами списка)",
+)
+async def admin_sync(
+    cursor: Optional[str] = Query(None, description="cursor из предыдущего ответа"),
+    order_id: Optional[int] = Query(None, ge=1, description="только этот чат"),
+    timeout: int = Query(SYNC_TIMEOUT, ge=0, le=55, description="сколько ждать, с"),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(admin_guard),
+):
+    """
+    Журнал `chat_changes` по всем заказам. У каждого события `chat` —
+    текущая строка списка чатов (как в `GET /admin/messages/`; null — диалог
+    удалён), так что список обновляется без пересчёта.
+
+    Long-poll, а не SSE: EventSource не умеет слать X-Telegram-Init-Data,
+    а так запрос идёт обычным apiClient-ом с той же авторизацией.
+    """
+    try:
+        after = parse_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(422, "Некорректный cursor")
+    head = await change_feed.head(db)
+    if after is None or after > head:
+        await release_connection(db)
+        return SyncResponse(cursor=str(head), reset=True)
+
+    with longpoll_admission.admit("admin_sync", admin.id, order_id) as ticket:
+        try:
+            rows = await ticket.guard(change_feed.wait(
+                db, after,
+                order_ids=None if order_id is None else [order_id],
+                limit=SYNC_LIMIT,
+                timeout=timeout,
+            ))
+        except Superseded:  # вкладка переподключилась — этот ответ уже никто не ждёт
+            rows = []
+    chats: dict[int, MessageOut] = {}
+    if rows:
+        touched = {r["order_id"] for r in rows}
+        for chat in await message_extra_crud.admin_chat_rows(db, order_ids=touched):
+            chats.setdefault(chat["order_id"], MessageOut.model_validate(dict(chat)))
+    await release_connection(db)
+    return SyncResponse(
+        cursor=str(rows[-1]["id"] if rows else after),
+        events=[SyncEvent(seq=r["id"], chat=chats.get(r["order_id"]), **r) for r in rows],
+        more=len(rows) >= SYNC_LIMIT,
     )
 
 
+# ---------------------------------------------------------------------------#
+#                     прочитано до курсора (пачкой чатов)                     #
+# ---------------------------------------------------------------------------#
+@router.post(
+    "/read",
+    response_model=MarkReadResult,
+    summary="Пометить прочитанными сообщения покупателей до up_to_id",
+    dependencies=[Depends(admin_guard)],
+)
+async def mark_chats_read(payload: MarkReadRequest, db: AsyncSession = Depends(get_db)):
+    chats: dict[int, int] = {}
+    for c in payload.chats:
+        chats[c.order_id] = max(c.up_to_id, chats.get(c.order_id, 0))
+    marked = await message_extra_crud.mark_read(db, chats.items(), by_admin=True, commit=False)
+    for order_id, count in marked.items():
+        if count:
+            await change_feed.record(
+                db, "messages_read",
+                order_id=order_id, data={"up_to_id": chats[order_id], "by_admin": True},
+            )
+    await db.commit()
+    return MarkReadResult(marked=marked)
+
+
 # ---------------------------------------------------------------------------#
 #                              LONG-POLL                                     #
 # ---------------------------------------------------------------------------#
 LONGPOLL_TIMEOUT = 25        # секунд
-CHECK_INTERVAL   = 1         # опрос БД
+# БД перечитывается по событию из event_bus; этот интервал — только страховка
+CHECK_INTERVAL   = 5
 
 @router.get(
     "/{order_id}/poll",
     response_model=List[MessageOut],
     summary="Long-poll: новые сообщения после ?after",
-    dependencies=[Depends(admin_guard)],
 )
 async def poll_chat_long(
     order_id: int,
     after: Optional[str] = Query(
         default=None, description="ISO-метка последнего сообщения"
     ),
+    after_id: Optional[int] = Query(None, ge=0, description="id последнего полученного сообщения"),
     db: AsyncSession = Depends(get_db),
+    admin: User = Depends(admin_guard),
 ):
     """
     Держит соединение ≤ 25 с. Если появились новые записи — сразу отдаёт их.
@@ -80,20 +250,21 @@ async def poll_chat_long(
     ts = _parse_since(after)
     deadline = datetime.utcnow() + timedelta(seconds=LONGPOLL_TIMEOUT)
 
-    while datetime.utcnow() < deadline:
-        stmt = (
-            select(Message)
-            .where(Message.order_id == order_id)
-            .order_by(Message.created_at)
-        )
-        if ts:
-            stmt = stmt.where(Message.created_at > ts)
-
-        rows = (await db.execute(stmt)).scalars().all()
-        if rows:
-            return rows
-
-        await asyncio.sleep(CHECK_INTERVAL)
+    with longpoll_admission.admit("admin_messages", admin.id, order_id) as ticket:
+        while (remaining := (deadline - datetime.utcnow()).total_seconds()) > 0:
+            seen = event_bus.head  # до запроса — событие между ними не потеряется
+            rows = await message_extra_crud.history_rows(db, order_id, after=ts, after_id=after_id)
+            if rows:
+                return json_response(List[MessageOut], rows)
+
+            # соединение не держим, пока ждём событие этого чата
+            await release_connection(db)
+            try:
+                await ticket.guard(
+                    event_bus.wait(seen, order_id=order_id, timeout=min(remaining, CHECK_INTERVAL))
+                )
+            except Superseded:  # тот же админ уже ждёт новым запросом
+                break
 
     return []
 
@@ -112,17 +283,13 @@ async def list_chat(
     since: Optional[str] = Query(
         default=None, description="ISO-дата: вернуть записи НОВЕЕ неё"
     ),
+    after_id: Optional[int] = Query(None, ge=0, description="вернуть записи с id больше"),
     db: AsyncSession = Depends(get_db),
 ):
-    ts = _parse_since(since)
-    stmt = (
-        select(Message)
-        .where(Message.order_id == order_id)
-        .order_by(Message.created_at)
+    rows = await message_extra_crud.history_rows(
+        db, order_id, after=_parse_since(since), after_id=after_id,
     )
-    if ts:
-        stmt = stmt.where(Message.created_at > ts)
-    return (await db.execute(stmt)).scalars().all()
+    return json_response(List[MessageOut], rows)
 
 
 # ---------------------------------------------------------------------------#
@@ -148,13 +315,15 @@ async def admin_send_message(
             content=payload.content,
         )
         db.add(msg)
-        await db.commit()
+        await db.flush()
         await db.refresh(msg)
 
-        await push_to_order_subscribers(
-            order_id,
-            "new_message",
-            {"message": {
+        job_queue.stage(db, "ws.new_message", message=message_snapshot(msg), sender_user_id=admin.id)
+        await change_feed.record(
+            db, "new_message",
+            order_id=order_id,
+            message_id=msg.id,
+            data={"message": {
                 "id": msg.id,
                 "user_id": msg.user_id,
                 "order_id": msg.order_id,
@@ -163,8 +332,7 @@ async def admin_send_message(
                 "is_admin": True,
             }},
         )
-
-        await notify_admins(msg, admin.id)
+        await db.commit()
         logger.info(f"✅ Админ {admin.id} отправил сообщение в заказ {order_id}")
         return msg
 
@@ -184,21 +352,9 @@ async def admin_send_message(
     dependencies=[Depends(admin_guard)],
 )
 async def list_last_messages(db: AsyncSession = Depends(get_db)):
-    last = (
-        select(
-            Message.order_id.label("oid"),
-            func.max(Message.created_at).label("ts"),
-        )
-        .group_by(Message.order_id)
-        .subquery()
-    )
-    stmt = (
-        select(Message)
-        .join(last, and_(Message.order_id == last.c.oid,
-                         Message.created_at == last.c.ts))
-        .order_by(Message.created_at.desc())
-    )
-    return (await db.execute(stmt)).scalars().all()
+    """Полный список — при открытии экрана; дальше клиент живёт на `/sync`."""
+    rows = await message_extra_crud.admin_chat_rows(db)
+    return json_response(List[MessageOut], rows)
 
 
 # ---------------------------------------------------------------------------#
@@ -225,21 +381,23 @@ async def reply_message(
 
         msg.reply = body.reply
         msg.replied_at = datetime.utcnow()
-        await db.commit()
+        await db.flush()
         await db.refresh(msg)
 
-        await notify_user_about_reply(msg, msg.user_id)
-        await notify_admins(msg, admin.id)
-
-        await push_to_order_subscribers(
+        snapshot = message_snapshot(msg)
+        job_queue.stage(db, "ws.message_replied", message=snapshot, user_id=msg.user_id)
+        job_queue.stage(db, "ws.new_message", message=snapshot, sender_user_id=admin.id)
+        await change_feed.record(
+            db, "message_replied",
             order_id=msg.order_id,
-            update_type="message_replied",
+            message_id=msg.id,
             data={
                 "message_id": msg.id,
                 "reply": msg.reply,
-                "replied_at": msg.replied_at.isoformat(),
+                "replied_at": snapshot["replied_at"],
             },
         )
+        await db.commit()
 
         return msg
 
@@ -269,12 +427,12 @@ async def delete_single(message_id: int, db: AsyncSession = Depends(get_db)):
 
     order_id = msg.order_id
     await db.delete(msg)
-    await db.commit()
-
-    await push_to_order_subscribers(
-        order_id, "message_deleted",
-        {"message_id": message_id, "deleted_by": msg.user_id},
+    await change_feed.record(
+        db, "message_deleted",
+        order_id=order_id, message_id=message_id,
+        data={"message_id": message_id, "deleted_by": msg.user_id},
     )
+    await db.commit()
 
 
 # ---------------------------------------------------------------------------#
@@ -297,9 +455,9 @@ async def delete_chat(
         )
     ).scalar() or 0
     await db.execute(delete(Message).where(Message.order_id == order_id))
-    await db.commit()
-
-    await push_to_order_subscribers(
-        order_id, "chat_deleted",
-        {"deleted_messages_count": count, "deleted_by": admin.id},
+    await change_feed.record(
+        db, "chat_deleted",
+        order_id=order_id,
+        data={"deleted_messages_count": count, "deleted_by": admin.id},
     )
+    await db.commit()
@@ -7,7 +7,8 @@ from backend.api.deps import get_db
 from backend.models.category import Category
 from backend.schemas.product import ProductCreate, ProductUpdate, ProductOut
 from backend.schemas.category import CategoryCreate
-from backend.services.crud import product_crud, category_crud
+from backend.core.serialization import json_response
+from backend.services.crud import PRODUCT_OUT_COLUMNS, product_crud, category_crud
 
 router = APIRouter()
 
@@ -18,7 +19,8 @@ router = APIRouter()
     summary="Список товаров",
 )
 async def list_products(db: AsyncSession = Depends(get_db)):
-    return await product_crud.get_multi(db)
+    rows = await product_crud.get_multi_rows(db, *PRODUCT_OUT_COLUMNS)
+    return json_response(list[ProductOut], rows)
 
 
 @router.post(
@@ -12,11 +12,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 # ── Internal imports ──────────────────────────────────────────────────
 from backend.core.config import settings
-from backend.api.deps import get_db_session, get_current_user
+from backend.api.deps import auth_manager, get_db_session, get_current_user
 from backend.models.user import User
 from backend.schemas.user import UserSchema
 from backend.services.crud import user_crud
-from backend.utils.auth_manager import get_telegram_auth_manager
 
 # ─────────────────────────────────────────────────────────────────────
 logger = logging.getLogger(__name__)
@@ -24,10 +23,6 @@ router = APIRouter(tags=["Auth"])
 
 LAST_INIT_DATA: Dict[str, Optional[str]] = {"data": None}
 
-telegram_auth_manager = get_telegram_auth_manager(
-    bot_token=settings.TELEGRAM_BOT_TOKEN,
-    timeout_sec=60 * 60 * 24,
-)
 
 # ----------------------------------------------------------------------------
 # 2. Pydantic payloads / responses
@@ -68,8 +63,8 @@ async def login_webapp(
 
     # 1. Валидация через наш auth_manager, который использует telegram-webapp-auth
     # --- НОВЫЙ ЛОГ ---
-    logger.info("[AUTH /login] >> Вызов telegram_auth_manager.authenticate...")
-    is_valid, user_info = telegram_auth_manager.authenticate(init_data_raw)
+    logger.info("[AUTH /login] >> Вызов auth_manager().authenticate...")
+    is_valid, user_info = auth_manager().authenticate(init_data_raw)
     # --- НОВЫЙ ЛОГ ---
     logger.info(
         "[AUTH /login] << Результат от auth_manager: is_valid=%s, user_info=%s",
@@ -158,7 +153,7 @@ def debug_crypto_info():
     pairs.sort(key=lambda kv: kv[0])
     data_check_string = "\n".join(f"{k}={v}" for k, v in pairs)
 
-    ok, parsed_user = telegram_auth_manager.authenticate(init_data)
+    ok, parsed_user = auth_manager().authenticate(init_data)
 
     return {
         "match": ok,
@@ -1,5 +1,4 @@
 # backend/api/endpoints/messages.py
-import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import List, Optional
@@ -11,19 +10,31 @@ from fastapi import (
     Query,
     status,
 )
-from sqlalchemy import select, func, and_, delete
+from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from backend.api.deps import get_db, get_current_user
-from backend.api.websockets.manager import (
-    notify_new_message_to_admins as notify_admins,
-)
+from backend.api.websockets.manager import message_snapshot
+from backend.core.admission import Superseded, longpoll_admission
+from backend.core.database import release_connection
+from backend.core.events import event_bus
+from backend.core.jobs import job_queue
+from backend.core.serialization import json_response
 
 from backend.models.message import Message
 from backend.models.order   import Order
 from backend.models.user    import User
-from backend.schemas.message import MessageCreate, MessageOut
+from backend.schemas.message import (
+    MarkReadResult,
+    MessageCreate,
+    MessageOut,
+    ReadUpTo,
+    SyncEvent,
+    SyncResponse,
+)
+from backend.services.change_feed import change_feed, parse_cursor
+from backend.services.crud import message_extra_crud
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/messages", tags=["Messages"])
@@ -59,18 +70,6 @@ async def _check_order_and_rights(
     return order
 
 
-def _inject_product_title(msgs: List[Message]) -> List[Message]:
-    for m in msgs:
-        if m.order and m.order.product:
-            m.product_title = m.order.product.title  # type: ignore[attr-defined]
-    return msgs
-
-
-async def push_to_order_subscribers(order_id: int, update: str, data: dict):
-    """Заглушка — пока просто логируем событие."""
-    logger.info(f"[polling-mode] order={order_id} update={update} payload={data}")
-
-
 # ---------------------------------------------------------------------------#
 #                       Список чатов (по одному сообщению)                        #
 # ---------------------------------------------------------------------------#
@@ -79,33 +78,66 @@ async def fetch_user_chats(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    last = (
-        select(
-            Message.order_id.label("order_id"),
-            func.max(Message.created_at).label("last_at"),
-        )
-        .group_by(Message.order_id)
-        .subquery()
-    )
-    stmt = (
-        select(Message)
-        .join(
-            last,
-            and_(
-                Message.order_id == last.c.order_id,
-                Message.created_at == last.c.last_at,
-            ),
-        )
-        .options(joinedload(Message.order).joinedload(Order.product))
-        .order_by(Message.created_at.desc())
-    )
+    rows = await message_extra_crud.user_chat_rows(db, current_user.id)
+    return json_response(List[MessageOut], rows)
 
-    # ✅ ИСПРАВЛЕНИЕ: Убрали условие 'if not current_user.is_admin'.
-    # Этот эндпоинт для юзеров, поэтому он ВСЕГДА должен фильтровать по ID.
-    stmt = stmt.join(Order).where(Order.user_id == current_user.id)
 
-    res = await db.execute(stmt)
-    return _inject_product_title(res.scalars().all())
+# ---------------------------------------------------------------------------#
+#            Синхронизация: все изменения во всех чатах одним long-poll        #
+# ---------------------------------------------------------------------------#
+SYNC_TIMEOUT = 25
+# изменений за один ответ; остальное — следующим запросом (more=true)
+SYNC_LIMIT   = 500
+
+@router.get(
+    "/sync",
+    response_model=SyncResponse,
+    summary="Long-poll: изменения во всех чатах пользователя после ?cursor",
+)
+async def sync_chats(
+    cursor: Optional[str] = Query(None, description="cursor из предыдущего ответа"),
+    order_id: Optional[int] = Query(None, ge=1, description="только этот чат"),
+    timeout: int = Query(SYNC_TIMEOUT, ge=0, le=55, description="сколько ждать, с"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Один запрос вместо `/{order_id}/poll` на каждый открытый чат: отдаёт
+    изменения (новые сообщения, ответы, удаления, прочтения) по всем заказам
+    пользователя из журнала `chat_changes`, а если их нет — ждёт до
+    `timeout` секунд.
+
+    Курсор — id последнего полученного изменения: выборка `id > cursor`
+    ничего не пропускает и не повторяет. Без курсора (первый запрос) или с
+    курсором из другой базы — `reset=true` и текущий курсор: клиент
+    перечитывает `GET /messages/` и открытые чаты, дальше живёт только на `/sync`.
+    """
+    try:
+        after = parse_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(422, "Некорректный cursor")
+    head = await change_feed.head(db)
+    if after is None or after > head:
+        await release_connection(db)
+        return SyncResponse(cursor=str(head), reset=True)
+
+    with longpoll_admission.admit("sync", current_user.id, order_id) as ticket:
+        try:
+            rows = await ticket.guard(change_feed.wait(
+                db, after,
+                owner_id=current_user.id,
+                order_ids=None if order_id is None else [order_id],
+                limit=SYNC_LIMIT,
+                timeout=timeout,
+            ))
+        except Superseded:  # клиент переподключился — этот ответ уже никто не ждёт
+            rows = []
+    await release_connection(db)
+    return SyncResponse(
+        cursor=str(rows[-1]["id"] if rows else after),
+        events=[SyncEvent(seq=r["id"], **r) for r in rows],
+        more=len(rows) >= SYNC_LIMIT,
+    )
 
 
 # ---------------------------------------------------------------------------#
@@ -115,25 +147,17 @@ async def fetch_user_chats(
 async def list_messages(
     order_id: int,
     since: Optional[str] = Query(None, description="ISO: вернуть записи ПОЗЖЕ"),
+    after_id: Optional[int] = Query(None, ge=0, description="вернуть записи с id больше"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     order = await _check_order_and_rights(order_id, current_user, db)
 
     ts = _parse_since(since)
-    stmt = (
-        select(Message)
-        .where(Message.order_id == order_id)
-        .options(joinedload(Message.order).joinedload(Order.product))
-        .order_by(Message.created_at)
-    )
-    if ts:
-        stmt = stmt.where(Message.created_at > ts)
-
-    msgs = (await db.execute(stmt)).scalars().all()
+    rows = await message_extra_crud.history_rows(db, order_id, after=ts, after_id=after_id)
 
     # welcome, если чат пуст и это первый запрос
-    if not msgs and ts is None:
+    if not rows and ts is None and after_id is None:
         admin = (
             await db.execute(select(User).where(User.is_admin).limit(1))
         ).scalar_one_or_none()
@@ -148,19 +172,25 @@ async def list_messages(
             ),
         )
         db.add(welcome)
+        await db.flush()
+        await change_feed.record(
+            db, "new_message",
+            order_id=order_id, owner_id=order.user_id, message_id=welcome.id,
+        )
         await db.commit()
         await db.refresh(welcome)
         welcome.product_title = order.product.title  # type: ignore[attr-defined]
         return [welcome]
 
-    return _inject_product_title(msgs)
+    return json_response(List[MessageOut], rows)
 
 
 # ---------------------------------------------------------------------------#
 #                                  LONG-POLL                                  #
 # ---------------------------------------------------------------------------#
 LONGPOLL_TIMEOUT = 25
-CHECK_INTERVAL   = 1
+# БД перечитывается по событию из event_bus; этот интервал — только страховка
+CHECK_INTERVAL   = 5
 
 @router.get(
     "/{order_id}/poll",
@@ -170,6 +200,7 @@ CHECK_INTERVAL   = 1
 async def poll_messages(
     order_id: int,
     after: Optional[str] = Query(None, description="ISO-метка"),
+    after_id: Optional[int] = Query(None, ge=0, description="id последнего полученного сообщения"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -177,16 +208,21 @@ async def poll_messages(
     ts = _parse_since(after)
     deadline = datetime.utcnow() + timedelta(seconds=LONGPOLL_TIMEOUT)
 
-    while datetime.utcnow() < deadline:
-        stmt = select(Message).where(Message.order_id == order_id).order_by(Message.created_at)
-        if ts:
-            stmt = stmt.where(Message.created_at > ts)
-
-        rows = (await db.execute(stmt)).scalars().all()
-        if rows:
-            return rows
-
-        await asyncio.sleep(CHECK_INTERVAL)
+    with longpoll_admission.admit("messages", current_user.id, order_id) as ticket:
+        while (remaining := (deadline - datetime.utcnow()).total_seconds()) > 0:
+            seen = event_bus.head  # до запроса — событие между ними не потеряется
+            rows = await message_extra_crud.history_rows(db, order_id, after=ts, after_id=after_id)
+            if rows:
+                return json_response(List[MessageOut], rows)
+
+            # соединение не держим, пока ждём событие этого чата
+            await release_connection(db)
+            try:
+                await ticket.guard(
+                    event_bus.wait(seen, order_id=order_id, timeout=min(remaining, CHECK_INTERVAL))
+                )
+            except Superseded:  # тот же клиент уже ждёт новым запросом
+                break
 
     return []
 
@@ -205,16 +241,48 @@ async def create_message(
 
     msg = Message(order_id=order_id, user_id=current_user.id, content=payload.content)
     db.add(msg)
-    await db.commit()
+    await db.flush()
     await db.refresh(msg)
 
-    await notify_admins(msg, current_user.id)
-    await push_to_order_subscribers(order_id, "new_message", {"msg_id": msg.id})
+    # уведомления уходят в фон после COMMIT — ответ не ждёт WS-рассылку
+    snapshot = message_snapshot(msg)
+    job_queue.stage(db, "ws.new_message", message=snapshot, sender_user_id=current_user.id)
+    await change_feed.record(
+        db, "new_message",
+        order_id=order_id, owner_id=order.user_id, message_id=msg.id,
+        data={"message": snapshot},
+    )
+    await db.commit()
 
     msg.product_title = order.product.title  # type: ignore[attr-defined]
     return msg
 
 
+# ---------------------------------------------------------------------------#
+#                         Прочитано до курсора                                #
+# ---------------------------------------------------------------------------#
+@router.post("/{order_id}/read", response_model=MarkReadResult)
+async def mark_read(
+    order_id: int,
+    payload: ReadUpTo,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Помечает прочитанными ответы админа с id ≤ up_to_id — одним UPDATE."""
+    order = await _check_order_and_rights(order_id, current_user, db)
+    marked = await message_extra_crud.mark_read(
+        db, [(order_id, payload.up_to_id)], by_admin=False, commit=False,
+    )
+    if marked.get(order_id):
+        await change_feed.record(
+            db, "messages_read",
+            order_id=order_id, owner_id=order.user_id,
+            data={"up_to_id": payload.up_to_id, "by_admin": False},
+        )
+    await db.commit()
+    return MarkReadResult(marked=marked)
+
+
 # ---------------------------------------------------------------------------#
 #                              Удалить сообщение                              #
 # ---------------------------------------------------------------------------#
@@ -233,8 +301,13 @@ async def delete_message(
         raise HTTPException(403, "Нет прав удалять это сообщение")
 
     await db.delete(msg)
+    await change_feed.record(
+        db, "message_deleted",
+        order_id=msg.order_id, message_id=msg.id, data={"message_id": msg.id},
+        # своё сообщение пользователь пишет только в свой заказ
+        owner_id=None if current_user.is_admin else current_user.id,
+    )
     await db.commit()
-    await push_to_order_subscribers(msg.order_id, "message_deleted", {"id": msg.id})
 
     logger.info(f"[polling-mode] message_deleted id={msg.id} by user={current_user.id}")
     return None
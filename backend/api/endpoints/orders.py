@@ -9,10 +9,13 @@ from sqlalchemy.future import select as future_select
 from sqlalchemy.orm import joinedload
 
 from backend.api.deps import get_db, get_current_user
+from backend.core.serialization import json_response, rows_to_dicts
 from backend.models.order import Order
 from backend.models.message import Message
 from backend.models.user import User
-from backend.schemas.order import OrderCreate, OrderRead, OrderDetail
+from backend.schemas.order import OrderCreate, OrderDetail, OrderListItem, OrderRead
+from backend.services.change_feed import change_feed
+from backend.services.crud import order_crud
 
 router = APIRouter(
     prefix="/orders",
@@ -55,6 +58,12 @@ async def create_order(
         ),
     )
     db.add(welcome)
+    await db.flush()
+    # новый чат появится у админа через /admin/messages/sync
+    await change_feed.record(
+        db, "new_message",
+        order_id=order.id, owner_id=current_user.id, message_id=welcome.id,
+    )
     await db.commit()
     await db.refresh(welcome)
 
@@ -63,37 +72,28 @@ async def create_order(
 
 @router.get(
     "/",
-    response_model=list[OrderRead],
+    response_model=list[OrderListItem],
     summary="Список заказов текущего пользователя",
 )
 async def list_orders(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    result = await db.execute(
-        future_select(Order)
-        .where(Order.user_id == current_user.id)
-        .order_by(Order.created_at.desc())
-    )
-    return result.scalars().all()
+    rows = await order_crud.user_order_rows(db, current_user.id)
+    return json_response(list[OrderListItem], rows_to_dicts(rows))
 
 
 @router.get(
     "/my",
-    response_model=list[OrderDetail],
+    response_model=list[OrderListItem],
     summary="История покупок текущего пользователя",
 )
 async def my_orders(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    result = await db.execute(
-        future_select(Order)
-        .options(joinedload(Order.product))
-        .where(Order.user_id == current_user.id)
-        .order_by(Order.created_at.desc())
-    )
-    return result.scalars().all()
+    rows = await order_crud.user_order_rows(db, current_user.id)
+    return json_response(list[OrderListItem], rows_to_dicts(rows))
 
 
 @router.get(
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import math
@@ -7,19 +8,24 @@ import os
 from typing import Final
 from decimal import Decimal # Импортируем Decimal для проверки типов
 
-from aiogram import Bot
-from aiogram.types import LabeledPrice
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import TYPE_CHECKING
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.api.deps import get_current_user, get_db
+from backend.core.admission import Superseded, longpoll_admission
+from backend.core.database import release_connection
+from backend.core.events import order_status_signal
 from backend.models.order import Order
 from backend.models.user import User
 from backend.schemas.payment import PaymentInit, PaymentInitResponse, OrderStatusResponse
 from backend.services.crud import order_crud, product_crud
 
-# Настраиваем подробное логирование
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+if TYPE_CHECKING:
+    # aiogram импортируется ~секунды (сотни pydantic-моделей) — только по требованию
+    from aiogram import Bot
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter() # Префикс теперь задается в api.py
@@ -27,6 +33,9 @@ router = APIRouter() # Префикс теперь задается в api.py
 # Курс конвертации рублей в Telegram Stars (1 ⭐ ≈ 2.015 ₽)
 STAR_RATE: Final[float] = 2.015
 
+# сколько по умолчанию держать GET /{order_id}/wait, с
+PAYMENT_WAIT_TIMEOUT: Final[int] = 25
+
 
 # ─────────────────────────── helpers ────────────────────────────
 async def _get_bot(request: Request) -> Bot:
@@ -37,7 +46,12 @@ async def _get_bot(request: Request) -> Bot:
         if not token:
             logger.error("TELEGRAM_BOT_TOKEN env missing. Cannot initialize bot.")
             raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Bot token is not configured")
+        from aiogram import Bot
+
+        from backend.utils.telegram_metrics import TelegramMetricsMiddleware
+
         bot = Bot(token=token)
+        bot.session.middleware(TelegramMetricsMiddleware("backend"))
         request.app.state.tg_bot = bot
         logger.info("✅ Telegram-bot initialized successfully.")
     return bot
@@ -52,6 +66,8 @@ async def _build_invoice_link(
     order_id: int,
 ) -> str:
     """Конвертируем ₽→⭐ и отдаём invoice-URL."""
+    from aiogram.types import LabeledPrice
+
     stars_amount = math.ceil(float(amount_rub) / STAR_RATE)
     logger.info(f"Order #{order_id}: Converting {amount_rub} RUB to {stars_amount} XTR.")
 
@@ -191,6 +207,40 @@ async def get_order_status(
     return OrderStatusResponse(order_id=order.id, status=order.status)
 
 
+# ── GET /{order_id}/wait (long-poll: ответ, как только вебхук отметит оплату) ──
+@router.get(
+    "/{order_id}/wait",
+    response_model=OrderStatusResponse,
+    summary="Дождаться смены статуса заказа (long-poll)",
+)
+async def wait_order_status(
+    order_id: int,
+    timeout: int = Query(PAYMENT_WAIT_TIMEOUT, ge=0, le=55, description="сколько ждать, с"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Вместо опроса `/status` раз в несколько секунд: если заказ ещё `pending`,
+    запрос ждёт до `timeout` секунд и возвращается сразу, как только
+    `payments_webhook` переведёт заказ в `paid`. По тайм-ауту — текущий статус.
+    """
+    # подписываемся до чтения статуса — оплата между SELECT и ожиданием не потеряется
+    with order_status_signal.watch(order_id) as changed:
+        order = await order_crud.get(db, id=order_id)
+        if not order or order.user_id != current_user.id:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Order not found or access denied")
+        order_status, user_id = order.status, current_user.id
+        if order_status == "pending" and timeout:
+            # соединение не держим, пока ждём вебхук (объекты сессии после этого отсоединены)
+            await release_connection(db)
+            with longpoll_admission.admit("payment_wait", user_id, order_id) as ticket:
+                try:
+                    order_status = await ticket.guard(asyncio.wait_for(changed, timeout))
+                except (asyncio.TimeoutError, Superseded):
+                    pass
+    return OrderStatusResponse(order_id=order_id, status=order_status)
+
+
 # ────────────────────────  POST /webhook (вебхук от Telegram) ─────────────────────────
 @router.post(
     "/webhook",
@@ -238,6 +288,8 @@ async def payments_webhook(
                     # ✅ ФИНАЛЬНОЕ ИСПРАВЛЕНИЕ: Убираем именованный аргумент `db_obj`.
                     await order_crud.update(db, order, {"status": "paid"})
                     logger.info(f"[WEBHOOK] ✅✅✅ SUCCESS! Order #{order_id} status updated to 'paid'.")
+                    # update уже закоммитил — будим /{order_id}/wait
+                    order_status_signal.notify(order.id, "paid")
                 except Exception as e:
                     logger.error(
                         f"[WEBHOOK] ❌ CRITICAL ERROR updating order #{order_id} status!",
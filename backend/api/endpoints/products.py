@@ -5,7 +5,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.api.deps import get_db
-from backend.services.crud import product_crud
+from backend.core.serialization import json_response
+from backend.services.crud import PRODUCT_OUT_COLUMNS, product_crud
 from backend.schemas.product import ProductOut
 
 router = APIRouter(
@@ -18,11 +19,13 @@ router = APIRouter(
     response_model=list[ProductOut],
     summary="Список всех товаров (публично)",
 )
-async def list_products(db: AsyncSession = Depends(get_db)):
+async def list_products():
     """
     Вернуть список всех товаров/услуг.
+    Одновременные запросы каталога обслуживает один запрос к БД (single-flight).
     """
-    return await product_crud.get_multi(db)
+    rows = await product_crud.get_multi_rows_shared(*PRODUCT_OUT_COLUMNS)
+    return json_response(list[ProductOut], rows)
 
 @router.get(
     "/{product_id}",
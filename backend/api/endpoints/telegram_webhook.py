@@ -0,0 +1,28 @@
+# backend/api/endpoints/telegram_webhook.py
+"""Апдейты Telegram для бота в режиме webhook (см. services/bot_webhook.py)."""
+from fastapi import APIRouter, HTTPException, Request, status
+
+from backend.core.metrics import TELEGRAM_WEBHOOK_UPDATES
+from backend.services.bot_webhook import bot_webhook
+
+router = APIRouter()
+
+
+@router.post("/webhook", include_in_schema=False)
+async def telegram_webhook(request: Request):
+    # режим выключен (BOT_WEBHOOK_ENABLED=false) — эндпоинта как будто нет
+    if not bot_webhook.active:
+        raise HTTPException(status.HTTP_404_NOT_FOUND)
+    if not bot_webhook.check_secret(request.headers.get("x-telegram-bot-api-secret-token")):
+        TELEGRAM_WEBHOOK_UPDATES.inc(outcome="rejected")
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid secret token")
+    try:
+        update = await request.json()
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid JSON received")
+    if not isinstance(update, dict):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Update must be an object")
+
+    # обработка — в фоне; ответ Telegram не ждёт хэндлеры бота
+    await bot_webhook.feed(update)
+    return {}
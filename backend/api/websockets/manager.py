@@ -10,8 +10,16 @@ from sqlalchemy import select
 from fastapi import WebSocket
 from fastapi.websockets import WebSocketState
 
+from backend.core.config import settings
+from backend.core.database import async_session
+from backend.core.events import event_bus
+from backend.core.jobs import job_queue
+from backend.core.metrics import WS_CONNECTIONS
 from backend.models.message import Message
+from backend.models.order import Order
+from backend.models.product import Product
 from backend.models.user import User
+from backend.services.telegram_notifier import telegram_notifier
 
 logger = logging.getLogger(__name__)
 
@@ -114,9 +122,32 @@ class SimpleConnectionManager:
 manager = SimpleConnectionManager()
 
 
+def _ws_connection_counts():
+    stats = manager.get_stats()
+    yield {"kind": "user"}, stats["total_users_online"]
+    yield {"kind": "admin"}, stats["total_admins_online"]
+
+
+WS_CONNECTIONS.set_function(_ws_connection_counts)
+
+
 # ───────── Notifications ─────────
 
-async def notify_new_message_to_admins(message: Message, sender_user_id: int):
+def message_snapshot(message: Message) -> dict:
+    """JSON-безопасный слепок сообщения — payload фоновых задач (см. backend.core.jobs)."""
+    return {
+        "id": message.id,
+        "user_id": message.user_id,
+        "order_id": message.order_id,
+        "content": message.content,
+        "reply": message.reply,
+        "created_at": message.created_at.isoformat() if message.created_at else None,
+        "replied_at": message.replied_at.isoformat() if message.replied_at else None,
+    }
+
+
+@job_queue.job("ws.new_message")
+async def _send_new_message(message: dict, sender_user_id: int):
     """
     Пользователь отправил новое сообщение — уведомляем всех админов.
     Фронт ожидает packet.type === "new_message" и packet.data.message.
@@ -125,11 +156,11 @@ async def notify_new_message_to_admins(message: Message, sender_user_id: int):
         "type": "new_message",
         "data": {
             "message": {
-                "id": message.id,
-                "user_id": message.user_id,
-                "order_id": message.order_id,
-                "content": message.content,
-                "created_at": message.created_at.isoformat() if message.created_at else None,
+                "id": message["id"],
+                "user_id": message["user_id"],
+                "order_id": message["order_id"],
+                "content": message["content"],
+                "created_at": message["created_at"],
                 "is_admin": False,
             }
         }
@@ -138,7 +169,8 @@ async def notify_new_message_to_admins(message: Message, sender_user_id: int):
     logger.debug(f"Admins notified of new user message from {sender_user_id}")
 
 
-async def notify_admin_reply_to_user(message: Message, user_id: int):
+@job_queue.job("ws.message_replied")
+async def _send_reply(message: dict, user_id: int):
     """
     Админ ответил пользователю — уведомляем его.
     Фронт ожидает packet.type === "message_replied" и packet.data с полями message_id, reply, replied_at.
@@ -146,17 +178,58 @@ async def notify_admin_reply_to_user(message: Message, user_id: int):
     payload = {
         "type": "message_replied",
         "data": {
-            "message_id": message.id,
-            "reply": message.reply,
-            "replied_at": message.replied_at.isoformat() if message.replied_at else None,
+            "message_id": message["id"],
+            "reply": message["reply"],
+            "replied_at": message["replied_at"],
         }
     }
     success = await manager.send_to_user(user_id, payload)
     if success:
-        logger.info(f"✅ Пользователь {user_id} уведомлен об ответе админа на сообщение {message.id}")
+        logger.info(f"✅ Пользователь {user_id} уведомлен об ответе админа на сообщение {message['id']}")
+    elif settings.TG_NOTIFY_OFFLINE:
+        await _notify_offline(message, user_id)
     else:
         logger.warning(f"❌ Не удалось уведомить пользователя {user_id} об ответе админа")
 
 
+async def _notify_offline(message: dict, user_id: int) -> None:
+    """WebSocket-а нет — сообщение от бота (с коалесингом и лимитами Bot API)."""
+    async with async_session() as db:
+        row = (await db.execute(
+            select(User.telegram_id, Product.title)
+            .select_from(Order)
+            .join(User, User.id == user_id)
+            .outerjoin(Product, Product.id == Order.product_id)
+            .where(Order.id == message["order_id"])
+        )).first()
+    if row is None:
+        logger.warning(f"❌ Не удалось уведомить пользователя {user_id}: заказ/пользователь не найден")
+        return
+    telegram_notifier.notify_reply(row.telegram_id, order_id=message["order_id"], product_title=row.title)
+
+
+@job_queue.job("order.push")
+async def push_to_order_subscribers(
+    order_id: int, update_type: str, data: dict, owner_id: Optional[int] = None,
+):
+    """Журнал `chat_changes` пополнился → разбудить `/messages/sync`-клиентов.
+
+    Ставится `change_feed.record()` и выполняется после COMMIT: сами
+    изменения клиенты читают из журнала, здесь — только `event_bus`.
+    """
+    event_bus.publish(update_type, order_id=order_id, user_id=owner_id, data=data)
+    logger.debug("order=%s update=%s → event_bus seq=%s", order_id, update_type, event_bus.head)
+
+
+async def notify_new_message_to_admins(message: Message, sender_user_id: int):
+    """Синхронный вариант `ws.new_message` — ждёт рассылку всем админам."""
+    await _send_new_message(message_snapshot(message), sender_user_id)
+
+
+async def notify_admin_reply_to_user(message: Message, user_id: int):
+    """Синхронный вариант `ws.message_replied`."""
+    await _send_reply(message_snapshot(message), user_id)
+
+
 # Остальные уведомления (typing, read, system) при желании можно оставить без изменений,
 # главное, что новые/ответные сообщения теперь приходят в том формате, который ждёт фронт.
@@ -0,0 +1,165 @@
+# backend/core/admission.py
+"""
+Допуск long-poll запросов: сколько ожидающих держит процесс.
+
+    with longpoll_admission.admit("sync", user.id, order_id) as ticket:
+        rows = await ticket.guard(change_feed.wait(db, after, ...))
+
+* общий предел `max_waiters`: сверх — `Overloaded` → 503 + Retry-After
+  (обработчик в backend.main). После деплоя все клиенты переподключаются
+  разом; каждый ожидающий при пробуждении снова идёт в БД, а с NullPool
+  это новое соединение к Postgres — предел ограничивает и этот всплеск;
+* `per_user` ожидающих на пользователя — сверх тоже 503;
+* дубликаты (тот же пользователь, эндпоинт и ключ, обычно order_id) —
+  не больше `per_key`: новый запрос вытесняет самый старый. Это «зомби»
+  после переподключения: клиент уже ушёл, а сервер ещё не заметил.
+  Вытесненный `guard()` сразу бросает `Superseded`, эндпоинт отвечает
+  «ничего нового», и слот освобождается;
+* Retry-After со случайной добавкой — отказанные клиенты не возвращаются
+  одной волной.
+
+Текущие ожидающие — `longpoll_in_flight{endpoint}` и `waiting()` (/health).
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+from contextlib import contextmanager
+from typing import Awaitable, Hashable, Iterator, Optional, TypeVar
+
+from backend.core.metrics import LONGPOLL_ADMISSION, LONGPOLL_IN_FLIGHT
+
+T = TypeVar("T")
+
+
+class Overloaded(Exception):
+    """Ожидающих слишком много — клиенту 503 и повторить через `retry_after` с."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"long-poll overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Superseded(Exception):
+    """Такой же более новый запрос занял место этого."""
+
+
+class Ticket:
+    __slots__ = ("endpoint", "user", "key", "_superseded")
+
+    def __init__(self, endpoint: str, user: Hashable, key: Hashable) -> None:
+        self.endpoint = endpoint
+        self.user = user
+        self.key = key
+        self._superseded = asyncio.Event()
+
+    @property
+    def superseded(self) -> bool:
+        return self._superseded.is_set()
+
+    async def guard(self, aw: Awaitable[T]) -> T:
+        """Дождаться `aw`; если запрос вытеснен — отменить ожидание и бросить `Superseded`."""
+        if self.superseded:
+            raise Superseded
+        task = asyncio.ensure_future(aw)
+        stop = asyncio.ensure_future(self._superseded.wait())
+        try:
+            done, _ = await asyncio.wait({task, stop}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            stop.cancel()
+        if task in done:
+            return task.result()
+        task.cancel()
+        await asyncio.wait({task})  # дать ожиданию освободить ресурсы
+        raise Superseded
+
+
+class LongPollAdmission:
+    def __init__(
+        self,
+        *,
+        max_waiters: int = 1000,
+        per_user: int = 6,
+        per_key: int = 2,
+        retry_after: float = 5.0,
+    ) -> None:
+        self.configure(max_waiters=max_waiters, per_user=per_user, per_key=per_key, retry_after=retry_after)
+        self._total = 0
+        self._by_user: dict[Hashable, list[Ticket]] = {}
+        self._by_endpoint: dict[str, int] = {}
+
+    def configure(
+        self,
+        *,
+        max_waiters: Optional[int] = None,
+        per_user: Optional[int] = None,
+        per_key: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        if max_waiters is not None:
+            self.max_waiters = max_waiters
+        if per_user is not None:
+            self.per_user = per_user
+        if per_key is not None:
+            self.per_key = per_key
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+    def _reject(self, endpoint: str, reason: str) -> Overloaded:
+        LONGPOLL_ADMISSION.inc(endpoint=endpoint, outcome=f"rejected_{reason}")
+        return Overloaded(reason, self.retry_after * (1 + random.random()))
+
+    @contextmanager
+    def admit(self, endpoint: str, user: Hashable, key: Hashable = None) -> Iterator[Ticket]:
+        mine = self._by_user.setdefault(user, [])
+        duplicates = [t for t in mine if t.endpoint == endpoint and t.key == key]
+        for old in duplicates[: max(0, len(duplicates) - self.per_key + 1)]:
+            # самый старый такой же запрос уступает место; из лимитов — сразу
+            old._superseded.set()
+            mine.remove(old)
+            LONGPOLL_ADMISSION.inc(endpoint=endpoint, outcome="superseded")
+        if len(mine) >= self.per_user:
+            self._forget_user(user)
+            raise self._reject(endpoint, "user")
+        if self._total >= self.max_waiters:
+            self._forget_user(user)
+            raise self._reject(endpoint, "global")
+
+        ticket = Ticket(endpoint, user, key)
+        mine.append(ticket)
+        self._total += 1
+        self._by_endpoint[endpoint] = self._by_endpoint.get(endpoint, 0) + 1
+        LONGPOLL_ADMISSION.inc(endpoint=endpoint, outcome="admitted")
+        try:
+            with LONGPOLL_IN_FLIGHT.track(endpoint=endpoint):
+                yield ticket
+        finally:
+            self._total -= 1
+            self._by_endpoint[endpoint] -= 1
+            tickets = self._by_user.get(user)
+            if tickets is not None and ticket in tickets:
+                tickets.remove(ticket)
+            self._forget_user(user)
+
+    def _forget_user(self, user: Hashable) -> None:
+        if not self._by_user.get(user, True):
+            del self._by_user[user]
+
+    def waiting(self) -> dict[str, int]:
+        """Ожидающих сейчас по эндпоинтам (вытесненные — до их выхода)."""
+        return {endpoint: n for endpoint, n in self._by_endpoint.items() if n}
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+
+# общий экземпляр; пределы задаются из настроек в lifespan (backend.main)
+longpoll_admission = LongPollAdmission()
+
+
+__all__ = ["LongPollAdmission", "Overloaded", "Superseded", "Ticket", "longpoll_admission"]
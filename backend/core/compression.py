@@ -0,0 +1,130 @@
+# backend/core/compression.py
+"""
+Content-Encoding: выбор по `Accept-Encoding` и сжатие.
+
+* gzip — всегда (stdlib);
+* br — если установлен пакет `brotli`;
+* zstd — `compression.zstd` (Python 3.14+) или пакет `zstandard`.
+
+br и zstd опциональны: без них клиенту просто уходит gzip.
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"), ("br", "gzip"))
+    body = compress(data, encoding) if encoding else data
+"""
+from __future__ import annotations
+
+import gzip
+from typing import Iterable, Optional
+
+try:  # опциональные зависимости
+    import brotli
+except ImportError:  # pragma: no cover — зависит от окружения
+    brotli = None
+
+try:
+    from compression import zstd as _zstd  # stdlib, Python 3.14+
+
+    def _zstd_compress(data: bytes, level: int) -> bytes:
+        return _zstd.compress(data, level=level)
+except ImportError:  # pragma: no cover — зависит от окружения
+    try:
+        import zstandard
+
+        def _zstd_compress(data: bytes, level: int) -> bytes:
+            return zstandard.ZstdCompressor(level=level).compress(data)
+    except ImportError:
+        _zstd_compress = None
+
+# при равном q выигрывает тот, что раньше: zstd быстрее всех на динамике,
+# br плотнее gzip
+SUPPORTED_ENCODINGS: tuple[str, ...] = tuple(
+    name for name, available in (
+        ("zstd", _zstd_compress is not None),
+        ("br", brotli is not None),
+        ("gzip", True),
+    ) if available
+)
+
+# уровни по умолчанию — под сжатие «на лету»
+DEFAULT_LEVELS: dict[str, int] = {"gzip": 6, "br": 5, "zstd": 3}
+
+# текстовые типы, которые имеет смысл сжимать (картинки/шрифты woff2 уже сжаты)
+COMPRESSIBLE_TYPES = frozenset({
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/xml",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+    "text/xml",
+})
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    return content_type.split(";", 1)[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+def parse_accept_encoding(header: Optional[str]) -> dict[str, float]:
+    """`"br;q=1.0, gzip;q=0.5, *;q=0"` → `{"br": 1.0, "gzip": 0.5, "*": 0.0}`."""
+    result: dict[str, float] = {}
+    if not header:
+        return result
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[name] = q
+    return result
+
+
+def choose_encoding(header: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Лучшее из `available`, которое клиент принимает; None — отдавать как есть."""
+    accepted = parse_accept_encoding(header)
+    if not accepted:
+        return None
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in available:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(data: bytes, encoding: str, *, level: Optional[int] = None) -> bytes:
+    """`level` — gzip 1..9, brotli 0..11, zstd 1..22 (по умолчанию `DEFAULT_LEVELS`)."""
+    if encoding not in SUPPORTED_ENCODINGS:
+        raise ValueError(f"unsupported encoding {encoding!r}")
+    if level is None:
+        level = DEFAULT_LEVELS[encoding]
+    if encoding == "gzip":
+        # mtime=0 — одинаковые байты (и ETag) при каждом старте
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return _zstd_compress(data, level)  # type: ignore[misc]
+
+
+__all__ = [
+    "COMPRESSIBLE_TYPES",
+    "DEFAULT_LEVELS",
+    "SUPPORTED_ENCODINGS",
+    "choose_encoding",
+    "compress",
+    "is_compressible",
+    "parse_accept_encoding",
+]
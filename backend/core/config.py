@@ -27,6 +27,9 @@ else:
 if env_file:
     load_dotenv(env_file)
 
+# «120/60» — запросов / секунд (backend.core.ratelimit.Budget)
+_RATE_SPEC = r"^\d+/\d+(\.\d+)?$"
+
 # ─────────────────── модель настроек ───────────────
 class Settings(BaseSettings):
     # --- обязательные ---
@@ -41,6 +44,88 @@ class Settings(BaseSettings):
     )
     BACKEND_API_BASE: AnyHttpUrl | None = Field(None, env="BACKEND_API_BASE")
     LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    # --- логи через очередь и фоновый поток (backend.core.log_setup) ---
+    # файл с ротацией; не задан — только консоль
+    LOG_FILE: str | None = Field(None, env="LOG_FILE")
+    LOG_FILE_MAX_BYTES: int = Field(10 * 1024 * 1024, ge=1024, env="LOG_FILE_MAX_BYTES")
+    LOG_FILE_BACKUPS: int = Field(5, ge=0, env="LOG_FILE_BACKUPS")
+    # больше записей в очереди — лишние теряются (log_records_dropped_total)
+    LOG_QUEUE_SIZE: int = Field(10_000, ge=1, env="LOG_QUEUE_SIZE")
+    # доля успешных (2xx) запросов, попадающих в access-лог; 4xx/5xx пишутся всегда
+    ACCESS_LOG_SAMPLE_RATE: float = Field(1.0, ge=0.0, le=1.0, env="ACCESS_LOG_SAMPLE_RATE")
+
+    # --- сжатие ответов /api (backend.core.middleware.CompressionMiddleware) ---
+    COMPRESS_ENABLED: bool = Field(True, env="COMPRESS_ENABLED")
+    # меньше — отдаём как есть
+    COMPRESS_MIN_SIZE: int = Field(1024, ge=0, env="COMPRESS_MIN_SIZE")
+    COMPRESS_GZIP_LEVEL: int = Field(5, ge=1, le=9, env="COMPRESS_GZIP_LEVEL")
+    COMPRESS_BROTLI_LEVEL: int = Field(4, ge=0, le=11, env="COMPRESS_BROTLI_LEVEL")
+    COMPRESS_ZSTD_LEVEL: int = Field(3, ge=1, le=22, env="COMPRESS_ZSTD_LEVEL")
+    # long-poll и стримы не сжимаем (regex по пути)
+    COMPRESS_EXCLUDE: str = Field(r"/(poll|wait|stream|events)$", env="COMPRESS_EXCLUDE")
+
+    # --- лимиты запросов к /api (backend.core.middleware.RateLimitMiddleware) ---
+    # «N/S» — N запросов за S секунд на telegram id (без initData — на IP)
+    RATE_LIMIT_ENABLED: bool = Field(True, env="RATE_LIMIT_ENABLED")
+    RATE_LIMIT_READ: str = Field("120/60", pattern=_RATE_SPEC, env="RATE_LIMIT_READ")
+    RATE_LIMIT_WRITE: str = Field("30/60", pattern=_RATE_SPEC, env="RATE_LIMIT_WRITE")
+    # long-poll / sync / SSE: каждый запрос держит соединение, а не пул БД
+    RATE_LIMIT_POLL: str = Field("90/60", pattern=_RATE_SPEC, env="RATE_LIMIT_POLL")
+    RATE_LIMIT_PAYMENTS: str = Field("10/60", pattern=_RATE_SPEC, env="RATE_LIMIT_PAYMENTS")
+    # прокси (IP/CIDR через запятую), которым верим X-Forwarded-For
+    RATE_LIMIT_TRUSTED_PROXIES: str = Field("127.0.0.1,::1", env="RATE_LIMIT_TRUSTED_PROXIES")
+    # диапазоны Cloudflare (https://www.cloudflare.com/ips/): CF-Connecting-IP
+    # читается, только если запрос пришёл с них; пусто — заголовок игнорируется
+    RATE_LIMIT_CLOUDFLARE_IPS: str = Field("", env="RATE_LIMIT_CLOUDFLARE_IPS")
+    # бакетов в памяти; сверх — выбрасываются полные, затем самые старые
+    RATE_LIMIT_MAX_KEYS: int = Field(100_000, ge=1, env="RATE_LIMIT_MAX_KEYS")
+
+    # --- допуск long-poll запросов (backend.core.admission) ---
+    # ожидающих на процесс; сверх — 503 + Retry-After
+    LONGPOLL_MAX_WAITERS: int = Field(1000, ge=1, env="LONGPOLL_MAX_WAITERS")
+    LONGPOLL_MAX_PER_USER: int = Field(6, ge=1, env="LONGPOLL_MAX_PER_USER")
+    # одинаковых (пользователь + эндпоинт + заказ); новый вытесняет старый
+    LONGPOLL_MAX_DUPLICATES: int = Field(2, ge=1, env="LONGPOLL_MAX_DUPLICATES")
+    # базовый Retry-After, с; клиенту уходит случайное значение в [x, 2x]
+    LONGPOLL_RETRY_AFTER: float = Field(5.0, gt=0, env="LONGPOLL_RETRY_AFTER")
+
+    # SQLAlchemy echo: каждый SQL-запрос в лог — только для отладки
+    DB_ECHO: bool = Field(False, env="DB_ECHO")
+
+    # --- учёт SQL-запросов (backend.core.query_stats) ---
+    DB_QUERY_STATS: bool = Field(False, env="DB_QUERY_STATS")
+    # 0 — не логировать медленные запросы
+    DB_SLOW_QUERY_MS: float = Field(200.0, ge=0.0, env="DB_SLOW_QUERY_MS")
+    # столько одинаковых statement-ов за запрос считаем подозрением на N+1
+    DB_N_PLUS_ONE_THRESHOLD: int = Field(5, ge=2, env="DB_N_PLUS_ONE_THRESHOLD")
+
+    # --- фоновые задачи после коммита (backend.core.jobs) ---
+    JOBS_WORKERS: int = Field(4, ge=1, env="JOBS_WORKERS")
+    JOBS_QUEUE_SIZE: int = Field(10_000, ge=1, env="JOBS_QUEUE_SIZE")
+    JOBS_MAX_ATTEMPTS: int = Field(5, ge=1, env="JOBS_MAX_ATTEMPTS")
+    # писать задачи в job_outbox в той же транзакции (переживают рестарт)
+    JOBS_OUTBOX: bool = Field(False, env="JOBS_OUTBOX")
+    # аренда строки outbox процессом; после неё строку заберёт recover()
+    JOBS_OUTBOX_LEASE_S: float = Field(30.0, gt=0, env="JOBS_OUTBOX_LEASE_S")
+    # как часто продлевать аренду и искать брошенные строки (< аренды)
+    JOBS_OUTBOX_SCAN_S: float = Field(10.0, gt=0, env="JOBS_OUTBOX_SCAN_S")
+
+    # --- уведомления в Telegram, если у пользователя нет WebSocket ---
+    TG_NOTIFY_OFFLINE: bool = Field(True, env="TG_NOTIFY_OFFLINE")
+    # у Telegram ~30 сообщений/с на бота; оставляем запас
+    TG_NOTIFY_RATE: float = Field(25.0, gt=0, le=30, env="TG_NOTIFY_RATE")
+    TG_NOTIFY_COALESCE_S: float = Field(3.0, ge=0, env="TG_NOTIFY_COALESCE_S")
+
+    # --- бот в режиме webhook (backend.services.bot_webhook) вместо getUpdates ---
+    BOT_WEBHOOK_ENABLED: bool = Field(False, env="BOT_WEBHOOK_ENABLED")
+    # публичный URL `/api/telegram/webhook`; задан — setWebhook при старте
+    BOT_WEBHOOK_URL: AnyHttpUrl | None = Field(None, env="BOT_WEBHOOK_URL")
+    # X-Telegram-Bot-Api-Secret-Token: 1–256 символов A-Z a-z 0-9 _ -
+    BOT_WEBHOOK_SECRET: str | None = Field(None, pattern=r"^[A-Za-z0-9_-]{1,256}$", env="BOT_WEBHOOK_SECRET")
+    # одновременно обрабатываемых апдейтов; дальше webhook ждёт свободный слот
+    BOT_WEBHOOK_CONCURRENCY: int = Field(32, ge=1, env="BOT_WEBHOOK_CONCURRENCY")
+    # столько последних update_id помним для отсева повторов Telegram
+    BOT_WEBHOOK_DEDUP_SIZE: int = Field(10_000, ge=1, env="BOT_WEBHOOK_DEDUP_SIZE")
 
     # --- SSL / TLS settings for Cloudflare Origin certificate ---
     SSL_CERTFILE: str | None = Field(None, env="SSL_CERTFILE")
@@ -102,7 +187,7 @@ class Settings(BaseSettings):
 # ─────────────────── инициализация ─────────────────
 try:
     settings = Settings()
-    log.info("✅ Settings загружены\n%s", settings.model_dump())
+    log.info("✅ Settings загружены")  # значения не логируем: там токен и пароль БД
 except Exception:
     log.exception("❌ Ошибка загрузки настроек – проверьте .env")
     raise
@@ -1,12 +1,130 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from backend.core.config import settings
+from backend.core import query_stats
+from backend.core.metrics import DB_POOL, DB_QUERY_DURATION
 from sqlalchemy.pool import NullPool
 
-# Single async engine used across the app
-engine = create_async_engine(settings.DATABASE_URL, echo=True, poolclass=NullPool)
-async_session = async_sessionmaker(engine, expire_on_commit=False)
+_engine: AsyncEngine | None = None
+
+
+def get_engine() -> AsyncEngine:
+    """Единый движок процесса; создаётся при первой сессии, а не при импорте."""
+    global _engine  # noqa: PLW0603
+    if _engine is None:
+        _engine = create_async_engine(settings.DATABASE_URL, echo=settings.DB_ECHO, poolclass=NullPool)
+        _instrument(_engine.sync_engine)
+    return _engine
+
+
+class _LazySessionMaker(async_sessionmaker):
+    """`async_session()` как раньше, но движок привязывается при первом вызове."""
+
+    def __call__(self, **local_kw) -> AsyncSession:
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+async_session = _LazySessionMaker(expire_on_commit=False)
+
+
+# ─────────────────────── метрики движка ────────────────────────
+def _statement_operation(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    return head[0].upper() if head else "UNKNOWN"
+
+
+def _instrument_queries(sync_engine: Engine) -> None:
+    """Время каждого запроса → `backend.core.metrics`,
+    счётчики на HTTP-запрос → `backend.core.query_stats`."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append((id(cursor), time.perf_counter()))
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()[1]
+        DB_QUERY_DURATION.observe(elapsed, operation=_statement_operation(statement))
+        query_stats.record(statement, elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(context):
+        # упавший запрос не дошёл до after_cursor_execute — снимаем его старт,
+        # иначе следующий запрос на этом соединении прочтёт чужое время
+        conn = context.connection
+        started = conn.info.get("query_started") if conn is not None else None
+        # курсор упавшего запроса; None — упали раньше before_cursor_execute
+        exec_ctx = context.execution_context
+        cursor = getattr(exec_ctx, "cursor", None) if exec_ctx is not None else getattr(context, "cursor", None)
+        if started and cursor is not None and started[-1][0] == id(cursor):
+            started.pop()
+
+
+def _instrument(sync_engine: Engine) -> None:
+    """Время запросов (`_instrument_queries`) и занятость пула → `backend.core.metrics`.
+    Gauge пула один на процесс — вешается только на движок `get_engine()`."""
+    _instrument_queries(sync_engine)
+
+    pool = sync_engine.pool
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_conn, record, proxy):
+        DB_POOL.inc(state="checked_out")
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_conn, record):
+        DB_POOL.dec(state="checked_out")
+
+    def _pool_status():
+        # NullPool не держит idle-соединений — отдаём только то, что умеет пул
+        if hasattr(pool, "size"):
+            yield {"state": "size"}, pool.size()
+            yield {"state": "checked_in"}, pool.checkedin()
+            yield {"state": "overflow"}, pool.overflow()
+
+    DB_POOL.set(0, state="checked_out")
+    DB_POOL.set_function(_pool_status)
+
 
 
 async def get_db() -> AsyncSession:
+    """
+    Одна сессия на HTTP-запрос: FastAPI кэширует зависимость, поэтому
+    `get_current_user` и сам эндпоинт получают один и тот же объект.
+    Соединение берётся лениво — на первом запросе к БД, а не при входе.
+    """
     async with async_session() as session:
         yield session
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    Вернуть соединение перед долгим ожиданием (long-poll и т.п.).
+
+    Закрывает текущую транзакцию без flush (`close()`); следующий запрос
+    сессии возьмёт новое соединение. С NullPool это ещё и закрывает коннект
+    к Postgres на время ожидания.
+
+    ⚠️ `close()` отсоединяет (expunge) все объекты сессии, в том числе
+    `current_user`. Уже загруженные колонки читаются, но ленивые связи и
+    истёкшие атрибуты бросают `DetachedInstanceError`, а изменения объектов
+    больше не попадут в БД. Поэтому всё нужное (`user.id`, `order.status`)
+    читаем до вызова, а после него работаем только с id и строками
+    (`mappings()`). `commit()`/`rollback()` тут не подходят: первый запишет
+    несохранённые изменения (например, `user.is_admin` из auth), второй
+    «протухнет» объекты так же.
+    """
+    if session.in_transaction():
+        await session.close()
+
+
+def __getattr__(name: str):
+    # обратная совместимость: `from backend.core.database import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,182 @@
+# backend/core/events.py
+"""
+In-process шина событий чатов — «будильник» для long-poll.
+
+Источник истины — журнал `chat_changes` (services/change_feed.py): курсор
+клиента — его id. Шина только сообщает ждущим, что журнал пополнился.
+После COMMIT фоновая задача `order.push` публикует событие:
+
+    event_bus.publish("new_message", order_id=7, user_id=42, data={"change_id": 123})
+
+а ждущий запоминает `head` до чтения журнала и, если читать нечего, спит:
+
+    seen = event_bus.head
+    ...  # пустой SELECT по журналу
+    await event_bus.wait(seen, user_id=42, timeout=5)
+
+* `seq` монотонен в пределах процесса и наружу не отдаётся;
+* последние `history` событий лежат в кольцевом буфере (`since`);
+* ожидающие разбиты по `user_id` — публикация будит только владельца заказа
+  и подписчиков на всё (`user_id=None`, админ).
+
+`KeyedSignal` — то же для одного ключа без истории: `/payments/{id}/wait`
+ждёт, пока вебхук не переведёт заказ в `paid`.
+
+Шина живёт в памяти одного процесса — backend запускается одним
+uvicorn-воркером (run.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Iterator, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    seq: int
+    type: str
+    order_id: int
+    user_id: Optional[int]             # владелец заказа — кому доставлять
+    data: dict[str, Any] = field(default_factory=dict)
+    at: float = 0.0
+
+
+class EventBus:
+    def __init__(self, *, history: int = 10_000) -> None:
+        self._seq = 0
+        self._events: deque[Event] = deque(maxlen=history)
+        # user_id (None — подписка на всё) → ожидающие
+        self._waiters: dict[Optional[int], set[asyncio.Future]] = {}
+
+    @property
+    def head(self) -> int:
+        return self._seq
+
+    # ─────────────────────────── публикация ────────────────────────────
+    def publish(
+        self,
+        type: str,
+        *,
+        order_id: int,
+        user_id: Optional[int],
+        data: Optional[dict] = None,
+    ) -> Event:
+        self._seq += 1
+        event = Event(self._seq, type, order_id, user_id, data or {}, time.time())
+        self._events.append(event)
+        for key in {user_id, None}:
+            for waiter in self._waiters.pop(key, ()):
+                if not waiter.done():
+                    waiter.set_result(None)
+        return event
+
+    # ─────────────────────────── чтение ────────────────────────────────
+    def since(
+        self, after: int, *, user_id: Optional[int] = None, order_id: Optional[int] = None,
+    ) -> Optional[list[Event]]:
+        """События с seq > after (с фильтром по владельцу / заказу); None — курсор вытеснен."""
+        if after >= self._seq:
+            return []
+        if not self._events or after < self._events[0].seq - 1:
+            return None
+        # буфер упорядочен по seq: идём с конца до курсора
+        out: list[Event] = []
+        for event in reversed(self._events):
+            if event.seq <= after:
+                break
+            if (user_id is None or event.user_id == user_id) and (
+                order_id is None or event.order_id == order_id
+            ):
+                out.append(event)
+        out.reverse()
+        return out
+
+    async def wait(
+        self,
+        after: int,
+        *,
+        user_id: Optional[int] = None,
+        order_id: Optional[int] = None,
+        timeout: float = 25.0,
+    ) -> Optional[list[Event]]:
+        """Как `since`, но при пустом результате ждёт событие не дольше `timeout`."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            events = self.since(after, user_id=user_id, order_id=order_id)
+            if events is None or events:
+                return events
+            # всё до head уже просмотрено — дальше смотрим только новое
+            after = self._seq
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            waiter = loop.create_future()
+            self._waiters.setdefault(user_id, set()).add(waiter)
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                waiters = self._waiters.get(user_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[user_id]
+
+    def waiting(self) -> int:
+        return sum(len(w) for w in self._waiters.values())
+
+
+class KeyedSignal:
+    """
+    «Ключ изменился» для ожидающих по ключу:
+
+        with order_status_signal.watch(order_id) as changed:
+            ...  # проверить текущее состояние в БД
+            status = await asyncio.wait_for(changed, timeout)
+
+    Подписка оформляется до проверки — `notify` между проверкой и
+    ожиданием не потеряется.
+    """
+
+    def __init__(self) -> None:
+        self._waiters: dict[Hashable, set[asyncio.Future]] = {}
+
+    @contextmanager
+    def watch(self, key: Hashable) -> Iterator[asyncio.Future]:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, set()).add(waiter)
+        try:
+            yield waiter
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    def notify(self, key: Hashable, value: Any = None) -> int:
+        """Разбудить всех ждущих `key` значением `value`; сколько разбужено."""
+        woken = 0
+        for waiter in self._waiters.pop(key, ()):
+            if not waiter.done():
+                waiter.set_result(value)
+                woken += 1
+        return woken
+
+    def waiting(self) -> int:
+        return sum(len(w) for w in self._waiters.values())
+
+
+# общая шина процесса
+event_bus = EventBus()
+# order_id → новый статус заказа (вебхук оплаты)
+order_status_signal = KeyedSignal()
+
+
+__all__ = ["Event", "EventBus", "KeyedSignal", "event_bus", "order_status_signal"]
@@ -0,0 +1,365 @@
+# backend/core/jobs.py
+"""
+Побочные эффекты после коммита — в фоне, а не в HTTP-ответе.
+
+Эндпоинт регистрирует задачу в сессии, а после COMMIT она уходит в
+in-process очередь, которую разбирают `JOBS_WORKERS` воркеров:
+
+    job_queue.stage(db, "ws.new_message", message=snapshot, sender_id=user.id)
+    await db.commit()          # ← здесь задача попадает в очередь
+    return msg                 # ответ не ждёт WebSocket-рассылку
+
+* Откат транзакции — задачи выбрасываются вместе с ней.
+* Ошибка обработчика — повтор с экспоненциальной задержкой,
+  до `JOBS_MAX_ATTEMPTS` попыток, дальше — лог и `jobs_processed_total{outcome="failed"}`.
+* Очередь переполнена — задача отбрасывается с предупреждением
+  (`outcome="dropped"`); при включённом outbox её строка останется в БД.
+* `JOBS_OUTBOX=true` — задача ещё и пишется в `job_outbox` той же
+  транзакцией; строка удаляется после успеха. Пока задача у процесса
+  (в очереди, на повторе, выполняется), он продлевает аренду строки
+  (`locked_until`); `recover()` — при старте и потом каждые
+  `outbox_scan_interval` с — забирает строки с истёкшей арендой: от
+  упавшего процесса, отброшенные при переполнении очереди. `stop()`
+  отпускает аренду невыполненных — следующий старт берёт их сразу.
+
+Payload должен быть JSON-сериализуемым (он может лежать в JSONB).
+Обработчики регистрируются по имени: `@job_queue.job("ws.new_message")`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import delete, event, func, inspect, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.core.metrics import JOBS_PROCESSED, JOBS_QUEUE_DEPTH
+from backend.models.job_outbox import JobOutbox
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., Awaitable[Any]]
+
+_STAGED_KEY = "jobs.staged"
+
+
+@dataclass
+class Job:
+    name: str
+    payload: dict[str, Any]
+    attempts: int = 0
+    outbox: Optional[JobOutbox] = field(default=None, repr=False)
+    outbox_id: Optional[int] = None
+
+
+class JobQueue:
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        maxsize: int = 10_000,
+        max_attempts: int = 5,
+        retry_base: float = 0.5,
+        retry_cap: float = 60.0,
+        outbox: bool = False,
+        outbox_lease: float = 30.0,
+        outbox_scan_interval: float = 10.0,
+    ) -> None:
+        self.workers = workers
+        self.maxsize = maxsize
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.outbox = outbox
+        self.outbox_lease = outbox_lease
+        self.outbox_scan_interval = outbox_scan_interval
+
+        self._handlers: dict[str, Handler] = {}
+        self._queue: Optional[asyncio.Queue[Job]] = None
+        self._tasks: list[asyncio.Task] = []
+        self._retries: set[asyncio.TimerHandle] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # id строк outbox, задачи которых сейчас у этого процесса
+        self._held: set[int] = set()
+        self._scanner: Optional[asyncio.Task] = None
+
+    def configure(self, **options: Any) -> None:
+        """Параметры из settings; вызывать до первого `enqueue`."""
+        for key, value in options.items():
+            if not hasattr(self, key) or key.startswith("_"):
+                raise AttributeError(f"unknown job queue option {key!r}")
+            setattr(self, key, value)
+
+    # ─────────────────────────── регистрация ───────────────────────────
+    def job(self, name: str) -> Callable[[Handler], Handler]:
+        def decorator(fn: Handler) -> Handler:
+            if name in self._handlers:
+                raise ValueError(f"job {name!r} already registered")
+            self._handlers[name] = fn
+            return fn
+        return decorator
+
+    # ─────────────────────────── постановка ────────────────────────────
+    def stage(self, db: AsyncSession | Session, name: str, **payload: Any) -> None:
+        """
+        Отложить задачу до COMMIT текущей транзакции `db`.
+        С outbox строка добавляется в ту же сессию и коммитится вместе с данными.
+        """
+        if name not in self._handlers:
+            raise KeyError(f"job {name!r} is not registered")
+        session = db.sync_session if isinstance(db, AsyncSession) else db
+        job = Job(name, payload)
+        if self.outbox:
+            job.outbox = JobOutbox(name=name, payload=payload, locked_until=self._lease_end())
+            session.add(job.outbox)
+        session.info.setdefault(_STAGED_KEY, []).append(job)
+
+    def enqueue(self, name: str, **payload: Any) -> bool:
+        """Сразу в очередь, без транзакции и outbox (best effort)."""
+        if name not in self._handlers:
+            raise KeyError(f"job {name!r} is not registered")
+        return self._put(Job(name, payload))
+
+    def _put(self, job: Job) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(job)  # type: ignore[union-attr]
+        except asyncio.QueueFull:
+            JOBS_PROCESSED.inc(job=job.name, outcome="dropped")
+            logger.warning("job queue full (%d), dropped %s outbox_id=%s", self.maxsize, job.name, job.outbox_id)
+            # аренду больше не продлеваем — строку заберёт recover()
+            self._held.discard(job.outbox_id)
+            return False
+        if job.outbox_id is not None:
+            self._held.add(job.outbox_id)
+        return True
+
+    def _after_commit(self, session: Session) -> None:
+        for job in session.info.pop(_STAGED_KEY, ()):
+            if job.outbox is not None:
+                # identity — без обращения к атрибутам (их может экспайрить commit)
+                job.outbox_id = inspect(job.outbox).identity[0]
+                job.outbox = None
+            self._put(job)
+
+    @staticmethod
+    def _after_rollback(session: Session, previous_transaction) -> None:
+        # откат SAVEPOINT-а не отменяет задачи внешней транзакции
+        if previous_transaction.parent is None:
+            session.info.pop(_STAGED_KEY, None)
+
+    # ─────────────────────────── воркеры ───────────────────────────────
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        # первый enqueue в этом event loop (в тестах loop может смениться)
+        self._loop = loop
+        self._queue = asyncio.Queue(self.maxsize)
+        self._retries.clear()
+        self._tasks = [
+            loop.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def start(self) -> None:
+        self._ensure_started()
+        if self.outbox:
+            try:
+                await self.recover()
+            except Exception:  # noqa: BLE001 — без БД стартуем, строки подберёт следующий проход
+                logger.exception("job outbox: recover failed")
+            self._scanner = asyncio.get_running_loop().create_task(
+                self._outbox_scan(), name="job-outbox-scan",
+            )
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Дождаться очереди (не дольше `timeout`), затем погасить воркеров."""
+        if self._scanner is not None:
+            self._scanner.cancel()
+            await asyncio.gather(self._scanner, return_exceptions=True)
+            self._scanner = None
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("job queue: %d jobs left unprocessed on shutdown", self.depth())
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._held:
+            await self._outbox_release()
+
+    async def join(self) -> None:
+        """Ждёт, пока очередь и запланированные повторы опустеют."""
+        if self._queue is None:
+            return
+        while True:
+            await self._queue.join()
+            if not self._retries:
+                return
+            await asyncio.sleep(0.05)
+
+    def depth(self) -> int:
+        return (self._queue.qsize() if self._queue else 0) + len(self._retries)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.attempts += 1
+        try:
+            await self._handlers[job.name](**job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001 — любой сбой обработчика = повтор
+            await self._failed(job, exc)
+            return
+        JOBS_PROCESSED.inc(job=job.name, outcome="ok")
+        if job.outbox_id is not None:
+            await self._outbox_done(job)
+
+    async def _failed(self, job: Job, exc: Exception) -> None:
+        if job.outbox_id is not None:
+            await self._outbox_attempt(job, exc)
+        if job.attempts >= self.max_attempts:
+            self._held.discard(job.outbox_id)  # строка остаётся для разбора
+            JOBS_PROCESSED.inc(job=job.name, outcome="failed")
+            logger.error("job %s failed after %d attempts: %r", job.name, job.attempts, exc)
+            return
+        JOBS_PROCESSED.inc(job=job.name, outcome="retry")
+        delay = min(self.retry_cap, self.retry_base * 2 ** (job.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning("job %s attempt %d failed (%r), retry in %.1fs", job.name, job.attempts, exc, delay)
+
+        def _requeue() -> None:
+            self._retries.discard(handle)
+            self._put(job)
+
+        handle = asyncio.get_running_loop().call_later(delay, _requeue)
+        self._retries.add(handle)
+
+    # ─────────────────────────── outbox ────────────────────────────────
+    def _lease_end(self):
+        # clock_timestamp, а не now(): now() — время начала транзакции
+        return func.clock_timestamp() + timedelta(seconds=self.outbox_lease)
+
+    async def _outbox_done(self, job: Job) -> None:
+        from backend.core.database import async_session
+
+        self._held.discard(job.outbox_id)
+        try:
+            async with async_session() as db:
+                await db.execute(delete(JobOutbox).where(JobOutbox.id == job.outbox_id))
+                await db.commit()
+        except Exception:  # noqa: BLE001 — задача выполнена; строку доберёт recover()
+            logger.exception("job outbox: failed to delete row %s", job.outbox_id)
+
+    async def _outbox_attempt(self, job: Job, exc: Exception) -> None:
+        from backend.core.database import async_session
+
+        try:
+            async with async_session() as db:
+                await db.execute(
+                    update(JobOutbox)
+                    .where(JobOutbox.id == job.outbox_id)
+                    .values(attempts=job.attempts, last_error=repr(exc)[:2000])
+                )
+                await db.commit()
+        except Exception:  # noqa: BLE001
+            logger.exception("job outbox: failed to record attempt for row %s", job.outbox_id)
+
+    async def _outbox_release(self) -> None:
+        """Отпустить аренду невыполненных задач (остановка процесса)."""
+        from backend.core.database import async_session
+
+        held, self._held = list(self._held), set()
+        try:
+            async with async_session() as db:
+                await db.execute(update(JobOutbox).where(JobOutbox.id.in_(held)).values(locked_until=None))
+                await db.commit()
+        except Exception:  # noqa: BLE001 — аренда истечёт сама
+            logger.exception("job outbox: failed to release %d rows", len(held))
+
+    async def _outbox_scan(self) -> None:
+        while True:
+            await asyncio.sleep(self.outbox_scan_interval)
+            try:
+                await self.recover()
+            except Exception:  # noqa: BLE001 — следующий проход попробует снова
+                logger.exception("job outbox: recover failed")
+
+    async def recover(self) -> int:
+        """
+        Продлить аренду своих строк outbox и поставить в очередь чужие с
+        истёкшей арендой (упавший процесс, переполненная очередь).
+        `FOR UPDATE SKIP LOCKED` — строку забирает только один процесс.
+        Исчерпавшие попытки остаются для разбора.
+        """
+        from backend.core.database import async_session
+
+        self._ensure_started()
+        free = self.maxsize - self._queue.qsize()  # type: ignore[union-attr]
+        async with async_session() as db:
+            if self._held:
+                await db.execute(
+                    update(JobOutbox)
+                    .where(JobOutbox.id.in_(list(self._held)))
+                    .values(locked_until=self._lease_end())
+                )
+            rows = []
+            if free > 0:
+                expired = (
+                    select(JobOutbox.id)
+                    .where(
+                        or_(JobOutbox.locked_until.is_(None), JobOutbox.locked_until < func.clock_timestamp()),
+                        JobOutbox.attempts < self.max_attempts,
+                    )
+                    .order_by(JobOutbox.id)
+                    .limit(free)
+                    .with_for_update(skip_locked=True)
+                )
+                rows = (await db.execute(
+                    update(JobOutbox)
+                    .where(JobOutbox.id.in_(expired))
+                    .values(locked_until=self._lease_end())
+                    .returning(JobOutbox.id, JobOutbox.name, JobOutbox.payload, JobOutbox.attempts)
+                    .execution_options(synchronize_session=False)
+                )).all()
+            await db.commit()
+        queued = 0
+        for row in sorted(rows, key=lambda r: r.id):
+            if row.name not in self._handlers:
+                logger.warning("job outbox: no handler for %s (row %s)", row.name, row.id)
+                continue
+            queued += self._put(Job(row.name, row.payload, attempts=row.attempts, outbox_id=row.id))
+        if queued:
+            logger.info("job outbox: recovered %d jobs", queued)
+        return queued
+
+
+# глобальная очередь процесса
+job_queue = JobQueue()
+
+event.listen(Session, "after_commit", job_queue._after_commit)
+event.listen(Session, "after_soft_rollback", job_queue._after_rollback)
+JOBS_QUEUE_DEPTH.set_function(lambda: [({}, job_queue.depth())])
+
+
+__all__ = ["Job", "JobQueue", "job_queue"]
@@ -0,0 +1,130 @@
+# backend/core/log_setup.py
+"""
+Единая настройка логирования для backend, бота и run.py — без записи на
+диск/в терминал из event loop.
+
+    setup_logging(level="INFO", log_file="bot.log")
+
+* корневой логгер пишет только в `DroppingQueueHandler` (`put_nowait` в
+  ограниченную очередь); консоль и файл обслуживает фоновый поток
+  `QueueListener`, так что медленный диск/терминал не тормозит запросы;
+* очередь переполнена — запись выбрасывается, а не блокирует: счётчик
+  `log_records_dropped_total`, и первой записью после затора — WARNING
+  «потеряно N записей»;
+* файл — `RotatingFileHandler` (`max_bytes` × `backup_count`);
+* настраивается один раз на процесс: повторный вызов (backend под run.py,
+  бот) ничего не меняет. Как и `basicConfig`, не трогает корневой логгер,
+  если у него уже есть обработчики (например, pytest), — кроме `force=True`.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import IO, Optional
+
+from backend.core.metrics import LOG_RECORDS_DROPPED
+
+DEFAULT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(funcName)s() - %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["DroppingQueueHandler"] = None
+_setup_lock = threading.Lock()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который при полной очереди теряет запись, а не ждёт."""
+
+    def __init__(self, q: queue.Queue) -> None:
+        super().__init__(q)
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        with self._lock:
+            try:
+                if self._unreported:
+                    self.queue.put_nowait(self._dropped_notice(self._unreported))
+                    self._unreported = 0
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                self._unreported += 1
+                LOG_RECORDS_DROPPED.inc()
+
+    def _dropped_notice(self, count: int) -> logging.LogRecord:
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "⚠️ очередь логов переполнена: потеряно записей — %d", (count,), None,
+        )
+
+
+def setup_logging(
+    *,
+    level: str | int = "INFO",
+    fmt: str = DEFAULT_FORMAT,
+    datefmt: Optional[str] = None,
+    stream: Optional[IO[str]] = None,
+    log_file: Optional[str] = None,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    queue_size: int = 10_000,
+    force: bool = False,
+) -> bool:
+    """Настроить корневой логгер; False — уже настроен (ничего не меняли)."""
+    global _listener, _handler  # noqa: PLW0603
+    with _setup_lock:
+        root = logging.getLogger()
+        if _listener is not None or (root.handlers and not force):
+            return False
+
+        formatter = logging.Formatter(fmt, datefmt)
+        sinks: list[logging.Handler] = [logging.StreamHandler(stream or sys.stderr)]
+        if log_file:
+            sinks.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8",
+            ))
+        for sink in sinks:
+            sink.setFormatter(formatter)
+
+        for old in root.handlers[:]:
+            root.removeHandler(old)
+            old.close()
+        _handler = DroppingQueueHandler(queue.Queue(queue_size))
+        root.addHandler(_handler)
+        root.setLevel(level if isinstance(level, int) else level.upper())
+
+        _listener = logging.handlers.QueueListener(_handler.queue, *sinks, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return True
+
+
+def shutdown_logging() -> None:
+    """Дописать очередь и остановить фоновый поток (вызывается и при выходе)."""
+    global _listener, _handler  # noqa: PLW0603
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()  # обрабатывает всё, что уже в очереди
+        for sink in _listener.handlers:
+            sink.close()
+        logging.getLogger().removeHandler(_handler)
+        _listener = _handler = None
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler else 0
+
+
+__all__ = [
+    "DEFAULT_FORMAT",
+    "DroppingQueueHandler",
+    "dropped_records",
+    "setup_logging",
+    "shutdown_logging",
+]
@@ -0,0 +1,346 @@
+# backend/core/metrics.py
+"""
+Минимальный Prometheus-совместимый реестр метрик (text exposition 0.0.4).
+
+Внешний клиент/коллектор не нужен: метрики живут в памяти процесса и
+отдаются текстом на `GET /metrics`. Бэкенд (uvicorn в пуле потоков) и бот
+(основной event-loop) пишут в один реестр из разных потоков, поэтому каждая
+метрика защищена своим `threading.Lock`.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Sequence
+
+LabelValues = tuple[str, ...]
+_INF_LE = 'le="+Inf"'
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self) -> Iterable[str]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, val in items:
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(val)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelValues, float] = {}
+        self._callback: Callable[[], Iterable[tuple[dict[str, object], float]]] | None = None
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track(self, **labels: object) -> Iterator[None]:
+        """`with gauge.track(...)`: +1 на входе, -1 на выходе (in-flight)."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def set_function(self, fn: Callable[[], Iterable[tuple[dict[str, object], float]]]) -> None:
+        """Значения вычисляются в момент скрейпа: fn → [(labels, value), ...]."""
+        self._callback = fn
+
+    def _samples(self) -> Iterable[str]:
+        if self._callback is not None:
+            try:
+                for labels, val in self._callback():
+                    self.set(val, **labels)
+            except Exception:  # noqa: BLE001 — скрейп не должен падать из-за коллектора
+                pass
+        with self._lock:
+            items = list(self._values.items())
+        for key, val in items:
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(val)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [counts per bucket..., sum, count]
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def count(self, **labels: object) -> int:
+        row = self._values.get(self._key(labels))
+        return int(row[-1]) if row else 0
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, row in items:
+            cumulative = 0.0
+            for bound, hits in zip(self.buckets, row):
+                cumulative += hits
+                le = f'le="{_fmt_value(bound)}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {_fmt_value(cumulative)}"
+            yield f"{self.name}_bucket{_fmt_labels(self.labelnames, key, _INF_LE)} {_fmt_value(row[-1])}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(row[-2])}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, key)} {_fmt_value(row[-1])}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.expose() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+
+# ─────────────────────────── метрики приложения ────────────────────────────
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+LONGPOLL_IN_FLIGHT = gauge(
+    "longpoll_in_flight",
+    "Long-poll requests currently parked",
+    ("endpoint",),
+)
+LONGPOLL_ADMISSION = counter(
+    "longpoll_admission_total",
+    "Long-poll admission decisions: admitted, superseded duplicates, rejected (user/global)",
+    ("endpoint", "outcome"),
+)
+DB_QUERY_DURATION = histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ("operation",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_POOL = gauge(
+    "db_pool_connections",
+    "DB connections by pool state",
+    ("state",),
+)
+WS_CONNECTIONS = gauge(
+    "ws_connections",
+    "Open WebSocket connections",
+    ("kind",),
+)
+TELEGRAM_API_DURATION = histogram(
+    "telegram_api_duration_seconds",
+    "Telegram Bot API call latency",
+    ("source", "method", "outcome"),
+)
+
+HTTP_COMPRESSION_BYTES = counter(
+    "http_compression_bytes_total",
+    "Response bytes before (in) and after (out) compression",
+    ("encoding", "stage"),
+)
+TELEGRAM_NOTIFICATIONS = counter(
+    "telegram_notifications_total",
+    "Offline reply notifications via Bot API (sent, coalesced, retry_after, blocked, failed)",
+    ("outcome",),
+)
+TELEGRAM_WEBHOOK_UPDATES = counter(
+    "telegram_webhook_updates_total",
+    "Bot updates received via webhook (accepted, duplicate, rejected, failed)",
+    ("outcome",),
+)
+HTTP_RATE_LIMITED = counter(
+    "http_rate_limited_total",
+    "Requests rejected with 429 by the rate limiter",
+    ("route_class",),
+)
+SINGLEFLIGHT_CALLS = counter(
+    "singleflight_calls_total",
+    "Coalesced reads: leader ran the query, shared waited for its result",
+    ("group", "outcome"),
+)
+LOG_RECORDS_DROPPED = counter(
+    "log_records_dropped_total",
+    "Log records dropped because the logging queue was full",
+)
+JOBS_PROCESSED = counter(
+    "jobs_processed_total",
+    "Background jobs by outcome (ok, retry, failed, dropped)",
+    ("job", "outcome"),
+)
+JOBS_QUEUE_DEPTH = gauge(
+    "jobs_queue_depth",
+    "Background jobs waiting for a worker (incl. scheduled retries)",
+)
+
+
+def render_latest() -> str:
+    return REGISTRY.expose()
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "REGISTRY",
+    "CONTENT_TYPE",
+    "counter",
+    "gauge",
+    "histogram",
+    "render_latest",
+    "HTTP_REQUEST_DURATION",
+    "HTTP_COMPRESSION_BYTES",
+    "LONGPOLL_IN_FLIGHT",
+    "LONGPOLL_ADMISSION",
+    "DB_QUERY_DURATION",
+    "DB_POOL",
+    "WS_CONNECTIONS",
+    "TELEGRAM_API_DURATION",
+    "TELEGRAM_NOTIFICATIONS",
+    "TELEGRAM_WEBHOOK_UPDATES",
+    "LOG_RECORDS_DROPPED",
+    "SINGLEFLIGHT_CALLS",
+    "HTTP_RATE_LIMITED",
+    "JOBS_PROCESSED",
+    "JOBS_QUEUE_DEPTH",
+]
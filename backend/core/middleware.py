@@ -0,0 +1,471 @@
+# backend/core/middleware.py
+"""
+Pure-ASGI middleware приложения.
+
+`RequestLogMiddleware` заменяет пару `@app.middleware("http")`
+(`enhanced_logging_middleware` + `security_monitoring_middleware`):
+
+* одна запись в лог на запрос — JSON-строка, 2xx пишутся с вероятностью
+  `sample_rate`, 4xx/5xx и исключения — всегда;
+* request-id — дешёвый монотонный счётчик `<pid>-<n>` вместо uuid4;
+* подозрительные пути / User-Agent ищутся заранее скомпилированными regex;
+* заголовки безопасности и no-cache для /api дописываются прямо в
+  `http.response.start`, тело ответа не буферизуется — long-poll и
+  стриминг проходят насквозь без `BaseHTTPMiddleware`.
+
+`CompressionMiddleware` — gzip/br/zstd для ответов /api по `Accept-Encoding`.
+Сжимается только ответ, пришедший одним куском (обычный JSON); стриминг
+(`more_body=True`, SSE) и long-poll пути пропускаются как есть.
+
+`RateLimitMiddleware` — token bucket на «класс маршрута + пользователь»:
+пользователь — telegram id из проверенного initData, без него — IP
+(за доверенным прокси — из X-Forwarded-For, за Cloudflare — CF-Connecting-IP).
+Ответы получают X-RateLimit-*, сверх бюджета — 429 с Retry-After.
+"""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import time
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.compression import SUPPORTED_ENCODINGS, choose_encoding, compress, is_compressible
+from backend.core.metrics import HTTP_COMPRESSION_BYTES, HTTP_RATE_LIMITED, HTTP_REQUEST_DURATION
+from backend.core.ratelimit import Budget, MemoryRateLimitStore, RateLimitStore
+
+access_logger = logging.getLogger("middleware")
+security_logger = logging.getLogger("security")
+
+# ─────────────────────────── request-id ────────────────────────────
+_REQUEST_SEQ = itertools.count(1)
+_REQUEST_ID_PREFIX = f"{os.getpid():x}"
+
+
+def next_request_id() -> str:
+    """`<pid hex>-<seq hex>` — уникален в пределах процесса, без syscalls."""
+    return f"{_REQUEST_ID_PREFIX}-{next(_REQUEST_SEQ):x}"
+
+
+# ─────────────────────── сигнатуры сканеров ────────────────────────
+SUSPICIOUS_PATHS: tuple[str, ...] = (
+    "/admin", "/.env", "/wp-admin", "/phpmyadmin", "/config", "/.git",
+    "/backup", "/test", "/debug", "/console", "/api/v1/admin",
+    "/swagger", "/docs", "/redoc",
+)
+SUSPICIOUS_USER_AGENTS: tuple[str, ...] = (
+    "sqlmap", "nikto", "nmap", "masscan", "burp", "owasp",
+)
+
+
+def _compile_any(needles: Iterable[str]) -> re.Pattern[str]:
+    return re.compile("|".join(re.escape(n) for n in needles), re.IGNORECASE)
+
+
+_SUSPICIOUS_PATH_RE = _compile_any(SUSPICIOUS_PATHS)
+_SUSPICIOUS_UA_RE = _compile_any(SUSPICIOUS_USER_AGENTS)
+
+
+def is_suspicious_path(path: str) -> bool:
+    return _SUSPICIOUS_PATH_RE.search(path) is not None
+
+
+def is_suspicious_user_agent(user_agent: str) -> bool:
+    return _SUSPICIOUS_UA_RE.search(user_agent) is not None
+
+
+# ───────────────────────── helpers ─────────────────────────────────
+def _header(scope: Scope, name: bytes) -> str:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _networks(specs: Iterable[str]) -> tuple:
+    return tuple(ipaddress.ip_network(p.strip(), strict=False) for p in specs if p.strip())
+
+
+def _in_networks(ip: str, networks: tuple) -> bool:
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(addr in net for net in networks)
+
+
+# id(route) → префикс; маршруты живут всё время процесса (и не hashable)
+_ROUTE_PREFIXES: dict[int, str] = {}
+
+
+def _route_prefix(route: Any, path: str) -> Optional[str]:
+    """Префикс роутера: самая короткая голова пути, хвост которой — этот маршрут."""
+    prefix = _ROUTE_PREFIXES.get(id(route))
+    if prefix is not None and path.startswith(prefix) and route.path_regex.match(path[len(prefix):]):
+        return prefix
+    cut = 0
+    while cut != -1:
+        if route.path_regex.match(path[cut:]):
+            _ROUTE_PREFIXES[id(route)] = path[:cut]
+            return path[:cut]
+        cut = path.find("/", cut + 1)
+    return None
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон маршрута (`/api/messages/{order_id}`) для метрик.
+
+    Берётся `path_format` маршрута, который Starlette кладёт в scope после
+    роутинга. У роутеров из `include_router` он относителен роутера
+    (`/messages/{order_id}`), поэтому префикс восстанавливаем по
+    `path_regex` маршрута: это отрезок пути до того места, где начинается
+    совпадение (значения параметров в нём не участвуют). Запросы мимо
+    роутов (сканеры, 404) сводим в один label, чтобы не плодить серии.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if not path_format:
+        return "unmatched"
+    prefix = _route_prefix(route, scope["path"]) if hasattr(route, "path_regex") else None
+    return (prefix or "") + path_format
+
+
+def _log_json(logger: logging.Logger, level: int, record: dict, **kwargs) -> None:
+    logger.log(level, json.dumps(record, ensure_ascii=False, default=str), **kwargs)
+
+
+# ───────────────────────── middleware ──────────────────────────────
+class RequestLogMiddleware:
+    """Access-лог, детект сканеров и заголовки безопасности одним проходом."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = 1.0,
+        frame_ancestors: Iterable[str] = (),
+    ) -> None:
+        self.app = app
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        ancestors = " ".join(["'self'", *frame_ancestors])
+        self._security_headers: tuple[tuple[str, str], ...] = (
+            ("X-Content-Type-Options", "nosniff"),
+            ("X-XSS-Protection", "1; mode=block"),
+            ("Referrer-Policy", "strict-origin-when-cross-origin"),
+            # Вместо X-Frame-Options: приложение встраивается в клиенты Telegram.
+            ("Content-Security-Policy", f"frame-ancestors {ancestors};"),
+        )
+        self._api_headers: tuple[tuple[str, str], ...] = (
+            ("Cache-Control", "no-cache, no-store, must-revalidate"),
+            ("Pragma", "no-cache"),
+            ("Expires", "0"),
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next_request_id()
+        scope.setdefault("state", {})["request_id"] = request_id
+        started = time.perf_counter()
+        method, path = scope["method"], scope["path"]
+        is_api = path.startswith("/api")
+
+        if is_suspicious_path(path):
+            _log_json(security_logger, logging.WARNING, {
+                "event": "suspicious_path", "request_id": request_id,
+                "ip": _client_ip(scope), "method": method, "path": path,
+            })
+        user_agent = _header(scope, b"user-agent")
+        if user_agent and is_suspicious_user_agent(user_agent):
+            _log_json(security_logger, logging.WARNING, {
+                "event": "suspicious_ua", "request_id": request_id,
+                "ip": _client_ip(scope), "user_agent": user_agent[:200],
+            })
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Process-Time"] = f"{time.perf_counter() - started:.3f}"
+                for key, value in self._security_headers:
+                    headers[key] = value
+                if is_api:
+                    for key, value in self._api_headers:
+                        headers[key] = value
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            _log_json(access_logger, logging.ERROR, {
+                "event": "request_error", "request_id": request_id,
+                "method": method, "path": path, "ip": _client_ip(scope),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }, exc_info=True)
+            raise
+        finally:
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=method, route=route_template(scope), status=status_code,
+            )
+
+        if 200 <= status_code < 300:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return
+            level = logging.INFO
+        elif status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+
+        _log_json(access_logger, level, {
+            "event": "request", "request_id": request_id,
+            "method": method, "path": path, "status": status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "ip": _client_ip(scope), "user_agent": user_agent[:100],
+        })
+
+
+class CompressionMiddleware:
+    """Сжатие JSON-ответов без буферизации стриминга."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        levels: dict[str, int] | None = None,
+        paths: Iterable[str] = ("/api",),
+        exclude: str = r"/(poll|wait|stream|events)$",
+        thread_size: int = 256 * 1024,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = dict(levels or {})
+        self.paths = tuple(paths)
+        self.exclude = re.compile(exclude) if exclude else None
+        # большие тела жмём в треде, чтобы не стопорить event loop
+        self.thread_size = thread_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(self.paths)
+            or (self.exclude is not None and self.exclude.search(scope["path"]))
+        ):
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(_header(scope, b"accept-encoding"), SUPPORTED_ENCODINGS)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or "no-transform" in headers.get("cache-control", "")
+                    or not is_compressible(headers.get("content-type"))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message  # решим по первому куску тела
+                return
+
+            assert start is not None
+            passthrough = True
+            if message["type"] != "http.response.body":
+                await send(start)
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # стриминг не копим; мелочь не окупает заголовки и CPU
+                await send(start)
+                await send(message)
+                return
+
+            level = self.levels.get(encoding)
+            if len(body) >= self.thread_size:
+                packed = await asyncio.to_thread(compress, body, encoding, level=level)
+            else:
+                packed = compress(body, encoding, level=level)
+            HTTP_COMPRESSION_BYTES.inc(len(body), encoding=encoding, stage="in")
+            if len(packed) >= len(body):
+                HTTP_COMPRESSION_BYTES.inc(len(body), encoding=encoding, stage="out")
+                await send(start)
+                await send(message)
+                return
+            HTTP_COMPRESSION_BYTES.inc(len(packed), encoding=encoding, stage="out")
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(packed))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # байты другие — сильный ETag несжатого ответа больше не верен
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+            await send({"type": "http.response.body", "body": packed, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# (is_valid, user_info) — как `TelegramAuthManager.authenticate`
+Authenticator = Callable[[str], tuple[bool, Optional[dict[str, Any]]]]
+
+RATE_LIMIT_CLASSES: tuple[str, ...] = ("poll", "payments", "write", "read")
+_SAFE_METHODS = frozenset({"GET", "HEAD"})
+
+
+class RateLimitMiddleware:
+    """Лимиты запросов к /api по классам маршрутов.
+
+    Класс — первый подходящий: `poll` (long-poll/стримы, `poll_paths`),
+    `payments` (/api/payments), `write` (не GET/HEAD), иначе `read`.
+    Класса нет в `budgets` — без лимита. CORS preflight, пути вне /api и
+    `exempt` (вебхуки Telegram) не лимитируются.
+
+    Проверенный initData кладётся в `scope["state"]["telegram_auth"]`,
+    чтобы `get_current_user` не проверял подпись второй раз.
+
+    Без initData ключ — IP клиента. Если соединение пришло от прокси из
+    `trusted_proxies` (nginx), IP берётся из `X-Forwarded-For` (справа
+    налево, до первого недоверенного); иначе все анонимы за прокси делили
+    бы один бакет. `CF-Connecting-IP` читается, только если этот узел —
+    из `cloudflare_proxies`: nginx пропускает заголовок клиента как есть,
+    и подделкой можно было бы получать новый бакет на каждый запрос.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        budgets: Mapping[str, Budget],
+        store: Optional[RateLimitStore] = None,
+        authenticate: Optional[Authenticator] = None,
+        poll_paths: str = r"/(poll|wait|stream|sync)$",
+        exempt: Iterable[str] = (),
+        trusted_proxies: Iterable[str] = (),
+        cloudflare_proxies: Iterable[str] = (),
+    ) -> None:
+        self.app = app
+        self.budgets = dict(budgets)
+        self.store: RateLimitStore = store or MemoryRateLimitStore()
+        self.authenticate = authenticate
+        self.poll_paths = re.compile(poll_paths)
+        self.exempt = frozenset(exempt)
+        self.trusted_proxies = _networks(trusted_proxies)
+        self.cloudflare_proxies = _networks(cloudflare_proxies)
+
+    def _trusted(self, ip: str) -> bool:
+        return _in_networks(ip, self.trusted_proxies)
+
+    def client_ip(self, scope: Scope) -> str:
+        hop = _client_ip(scope)
+        if self._trusted(hop):
+            hops = [h.strip() for h in _header(scope, b"x-forwarded-for").split(",") if h.strip()]
+            hop = next((h for h in reversed(hops) if not self._trusted(h)), hops[0] if hops else hop)
+        # ближайший недоверенный узел — Cloudflare: клиента знает только его заголовок
+        if _in_networks(hop, self.cloudflare_proxies):
+            if cf_ip := _header(scope, b"cf-connecting-ip").strip():
+                return cf_ip
+        return hop
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        if method == "OPTIONS" or not path.startswith("/api/") or path.rstrip("/") in self.exempt:
+            return None
+        if self.poll_paths.search(path):
+            return "poll"
+        if path.startswith("/api/payments"):
+            return "payments"
+        return "read" if method in _SAFE_METHODS else "write"
+
+    def identify(self, scope: Scope) -> str:
+        init_data = _header(scope, b"x-telegram-init-data")
+        if init_data and self.authenticate is not None:
+            is_valid, user_info = self.authenticate(init_data)
+            scope.setdefault("state", {})["telegram_auth"] = (init_data, is_valid, user_info)
+            if is_valid and user_info and "id" in user_info:
+                return f"tg:{user_info['id']}"
+        return f"ip:{self.client_ip(scope)}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = self.classify(scope["method"], scope["path"])
+        budget = self.budgets.get(route_class) if route_class else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = self.identify(scope)
+        decision = await self.store.hit(f"{route_class}:{key}", budget)
+        headers = decision.headers()
+        if not decision.allowed:
+            HTTP_RATE_LIMITED.inc(route_class=route_class)
+            _log_json(security_logger, logging.INFO, {
+                "event": "rate_limited", "request_id": scope.get("state", {}).get("request_id"),
+                "key": key, "route_class": route_class, "path": scope["path"],
+                "retry_after": headers["Retry-After"],
+            })
+            response = JSONResponse(
+                {"detail": "Слишком много запросов, повторите позже."}, status_code=429, headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+__all__ = [
+    "CompressionMiddleware",
+    "RATE_LIMIT_CLASSES",
+    "RateLimitMiddleware",
+    "RequestLogMiddleware",
+    "next_request_id",
+    "route_template",
+    "is_suspicious_path",
+    "is_suspicious_user_agent",
+    "SUSPICIOUS_PATHS",
+    "SUSPICIOUS_USER_AGENTS",
+]
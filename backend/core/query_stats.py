@@ -0,0 +1,160 @@
+# backend/core/query_stats.py
+"""
+Учёт SQL-запросов на HTTP-запрос: счётчик, повторы (N+1) и медленные запросы.
+
+Источник данных — `after_cursor_execute` движка (`backend.core.database`),
+который зовёт :func:`record` для каждого выполненного statement-а. Сборщик
+(:class:`QueryStats`) живёт в `ContextVar`, поэтому корректно разделяется
+между конкурентными запросами и виден внутри greenlet-ов SQLAlchemy.
+
+Инструментация включается флагом `DB_QUERY_STATS`: тогда
+:class:`QueryStatsMiddleware` открывает сборщик на каждый запрос и в конце
+пишет в лог подозрения на N+1, а запросы дольше `DB_SLOW_QUERY_MS`
+логируются с маршрутом и request-id. Без флага работает только
+:func:`track` / :func:`assert_max_queries` — для тестов бюджета запросов.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.core.middleware import route_template
+
+logger = logging.getLogger("db.queries")
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+# 0 — slow-лог выключен; задаётся через configure()
+_slow_threshold_s: float = 0.0
+_repeat_threshold: int = 5
+
+
+@dataclass
+class QueryStats:
+    route: str = ""
+    request_id: str = ""
+    count: int = 0
+    total_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    parent: Optional["QueryStats"] = None
+
+    def add(self, statement: str, elapsed: float) -> None:
+        node: Optional[QueryStats] = self
+        while node is not None:
+            node.count += 1
+            node.total_time += elapsed
+            node.statements[statement] += 1
+            node = node.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Одинаковые statement-ы, выполненные ≥ threshold раз (типичный N+1)."""
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+
+def configure(*, slow_query_ms: float, repeat_threshold: int) -> None:
+    global _slow_threshold_s, _repeat_threshold  # noqa: PLW0603
+    _slow_threshold_s = max(0.0, slow_query_ms) / 1000
+    _repeat_threshold = max(2, repeat_threshold)
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def record(statement: str, elapsed: float) -> None:
+    """Вызывается из event-хука движка на каждый выполненный statement."""
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed)
+    if _slow_threshold_s and elapsed >= _slow_threshold_s:
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "route": stats.route if stats else None,
+            "request_id": stats.request_id if stats else None,
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": " ".join(statement.split())[:500],
+        }, ensure_ascii=False))
+
+
+@contextmanager
+def track(route: str = "", request_id: str = "") -> Iterator[QueryStats]:
+    """Собирает статистику всех запросов внутри блока (вложенные блоки суммируются наверх)."""
+    stats = QueryStats(route=route, request_id=request_id, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int, *, max_repeats: Optional[int] = None) -> Iterator[QueryStats]:
+    """`with assert_max_queries(3): ...` — AssertionError, если бюджет превышен."""
+    with track() as stats:
+        yield stats
+    problems = []
+    if stats.count > limit:
+        problems.append(f"{stats.count} statements > budget {limit}")
+    if max_repeats is not None:
+        problems += [
+            f"statement repeated {n}× (> {max_repeats}): {' '.join(s.split())[:200]}"
+            for s, n in stats.repeated(max_repeats + 1)
+        ]
+    if problems:
+        listing = "\n".join(f"  {n}× {' '.join(s.split())[:200]}" for s, n in stats.statements.most_common())
+        raise AssertionError("; ".join(problems) + "\n" + listing)
+
+
+class QueryStatsMiddleware:
+    """Открывает сборщик на каждый HTTP-запрос и логирует итог по нему."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # request-id выставляет внешний RequestLogMiddleware
+        request_id = scope.get("state", {}).get("request_id", "")
+        started = time.perf_counter()
+        with track(route=scope["path"], request_id=request_id) as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                stats.route = route_template(scope)
+                repeated = stats.repeated(_repeat_threshold)
+                level = logging.WARNING if repeated else logging.DEBUG
+                if logger.isEnabledFor(level):
+                    logger.log(level, json.dumps({
+                        "event": "request_queries",
+                        "route": stats.route,
+                        "request_id": request_id,
+                        "statements": stats.count,
+                        "db_time_ms": round(stats.total_time * 1000, 2),
+                        "request_time_ms": round((time.perf_counter() - started) * 1000, 2),
+                        "repeated": [
+                            {"count": n, "statement": " ".join(s.split())[:300]}
+                            for s, n in repeated
+                        ],
+                    }, ensure_ascii=False))
+
+
+__all__ = [
+    "QueryStats",
+    "QueryStatsMiddleware",
+    "assert_max_queries",
+    "configure",
+    "current",
+    "record",
+    "track",
+]
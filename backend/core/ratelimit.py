@@ -0,0 +1,171 @@
+# backend/core/ratelimit.py
+"""
+Token bucket: `rate` токенов в секунду, не больше `capacity` в запасе.
+
+    bucket = TokenBucket(rate=25, capacity=25)
+    await bucket.acquire()      # ждёт, пока появится токен
+    bucket.pause(retry_after)   # 429 от внешнего API — никто не идёт раньше срока
+
+Однопоточный (один event loop), без блокировок. Часы подменяются в тестах.
+
+Лимиты HTTP-запросов (`RateLimitMiddleware`) держат по бакету на ключ
+«класс маршрута + пользователь/IP» в `RateLimitStore`:
+
+    budget = Budget.parse("120/60")          # 120 запросов за 60 с, всплеск до 120
+    decision = await store.hit("read:tg:42", budget)
+
+`MemoryRateLimitStore` — в памяти процесса; общий бэкенд (Redis и т.п.)
+подключается реализацией того же протокола `hit()`.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import time
+from typing import Callable, NamedTuple, Protocol
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "_tokens", "_updated", "_blocked_until", "_clock")
+
+    def __init__(self, rate: float, capacity: float = 1.0, *, clock: Callable[[], float] = time.monotonic) -> None:
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """0 — токены списаны; иначе сколько секунд подождать (ничего не списано)."""
+        now = self._clock()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill(now)
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        while (wait := self.try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Не выдавать токены `seconds` секунд; после паузы запас пуст."""
+        until = self._clock() + seconds
+        if until > self._blocked_until:
+            self._blocked_until = until
+            self._tokens = 0.0
+            self._updated = until
+
+    @property
+    def tokens(self) -> float:
+        """Сколько токенов в запасе сейчас."""
+        now = self._clock()
+        if now < self._blocked_until:
+            return 0.0
+        self._refill(now)
+        return self._tokens
+
+    @property
+    def idle(self) -> bool:
+        """Запас полон и паузы нет — бакет можно выбросить и создать заново."""
+        now = self._clock()
+        if now < self._blocked_until:
+            return False
+        self._refill(now)
+        return self._tokens >= self.capacity
+
+
+# ─────────────────────── лимиты HTTP-запросов ───────────────────────
+class Budget(NamedTuple):
+    """`limit` запросов за `period` секунд; всплеск — до `limit` подряд."""
+
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "Budget":
+        """`"120/60"` → Budget(120, 60.0)."""
+        limit, _, period = spec.partition("/")
+        try:
+            budget = cls(int(limit), float(period))
+        except ValueError:
+            raise ValueError(f"rate limit spec must look like '120/60', got {spec!r}") from None
+        if budget.limit <= 0 or budget.period <= 0:
+            raise ValueError(f"rate limit spec must be positive, got {spec!r}")
+        return budget
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.period
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float        # через сколько секунд запас снова полон
+    retry_after: float  # 0, если запрос пропущен
+
+    def headers(self) -> dict[str, str]:
+        """X-RateLimit-* (уже в `expose_headers` CORS) и Retry-After для 429."""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimitStore(Protocol):
+    async def hit(self, key: str, budget: Budget, cost: float = 1.0) -> Decision: ...
+
+
+class MemoryRateLimitStore:
+    """Бакеты в памяти процесса (один воркер uvicorn)."""
+
+    def __init__(self, *, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def hit(self, key: str, budget: Budget, cost: float = 1.0) -> Decision:
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.capacity != budget.limit or bucket.rate != budget.rate:
+            if len(self._buckets) >= self.max_keys:
+                self._evict()
+            bucket = self._buckets[key] = TokenBucket(budget.rate, budget.limit, clock=self._clock)
+        retry_after = bucket.try_acquire(cost)
+        tokens = bucket.tokens
+        return Decision(
+            allowed=retry_after == 0,
+            limit=budget.limit,
+            remaining=int(tokens),
+            reset=(budget.limit - tokens) / budget.rate,
+            retry_after=retry_after,
+        )
+
+    def _evict(self) -> None:
+        """Выбросить полные бакеты; если не помогло — самые старые ключи."""
+        for key in [k for k, b in self._buckets.items() if b.idle]:
+            del self._buckets[key]
+        overflow = len(self._buckets) - self.max_keys + 1
+        for key in list(itertools.islice(self._buckets, max(0, overflow))):
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+__all__ = ["Budget", "Decision", "MemoryRateLimitStore", "RateLimitStore", "TokenBucket"]
@@ -0,0 +1,80 @@
+# backend/core/serialization.py
+"""
+Быстрый путь сериализации для больших списков.
+
+Обычный путь FastAPI: эндпоинт отдаёт ORM-объекты → `response_model`
+валидирует их с `from_attributes` (getattr на каждое поле каждой строки,
+с инструментированными атрибутами SQLAlchemy) → JSON. Здесь вместо этого:
+
+* запрос выбирает колонки (row mappings), а не сущности;
+* строки валидируются как обычные dict-ы закэшированным `TypeAdapter`
+  (pydantic-core, без from_attributes);
+* результат сразу кодируется в bytes тем же адаптером и отдаётся готовым
+  `Response` — FastAPI повторно ничего не валидирует.
+
+JSON получается тем же, что и через `response_model` (один и тот же
+сериализатор pydantic), поэтому `response_model=` в декораторе оставляем —
+он нужен для OpenAPI.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+NESTED_SEP = "__"
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """Один `TypeAdapter` на тип на процесс — сборка схемы дорогая."""
+    return TypeAdapter(tp)
+
+
+def unflatten(row: Mapping[str, Any]) -> dict[str, Any]:
+    """`{"product__title": …}` → `{"product": {"title": …}}` (для вложенных DTO).
+
+    Если все поля вложенного объекта NULL (LEFT JOIN без пары) — он сам None.
+    """
+    out: dict[str, Any] = {}
+    for key, value in row.items():
+        head, sep, rest = key.partition(NESTED_SEP)
+        if not sep:
+            out[key] = value
+            continue
+        out.setdefault(head, {})[rest] = value
+    for key, value in out.items():
+        if isinstance(value, dict) and all(v is None for v in value.values()):
+            out[key] = None
+    return out
+
+
+def rows_to_dicts(rows: Iterable[Mapping[str, Any]]) -> list[dict[str, Any]]:
+    return [unflatten(r) for r in rows]
+
+
+def dump_json(tp: Any, data: Any) -> bytes:
+    adapter = type_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(data))
+
+
+def json_response(tp: Any, data: Any, *, status_code: int = 200, headers: Mapping[str, str] | None = None) -> Response:
+    """`data` (dict-ы / row mappings) → провалидированный и закодированный `Response`."""
+    return Response(
+        content=dump_json(tp, data),
+        status_code=status_code,
+        headers=dict(headers) if headers else None,
+        media_type="application/json",
+    )
+
+
+__all__ = [
+    "NESTED_SEP",
+    "dump_json",
+    "json_response",
+    "rows_to_dicts",
+    "type_adapter",
+    "unflatten",
+]
@@ -0,0 +1,60 @@
+# backend/core/singleflight.py
+"""
+Single-flight: одинаковые одновременные чтения — один запрос к БД.
+
+    rows = await read_flight.do(("products", 0, 100), load_products)
+
+Пока первый вызов с ключом выполняется, остальные с тем же ключом не
+запускают `fn`, а ждут его результат (или исключение). Это не кэш:
+после завершения ключ забывается, следующий вызов снова идёт в БД —
+данные не устаревают, а «шквал» одинаковых запросов (массовое открытие
+Mini App, несколько админов на дашборде) превращается в один.
+
+* `fn` выполняется отдельной задачей: отмена одного ждущего (клиент
+  закрыл соединение) не отменяет запрос для остальных. Поэтому `fn` не
+  должен пользоваться сессией конкретного HTTP-запроса — см.
+  `backend.services.crud.shared_read`, который открывает свою;
+* результат общий для всех ждущих — его нельзя изменять.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from backend.core.metrics import SINGLEFLIGHT_CALLS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, name: str = "default") -> None:
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+            SINGLEFLIGHT_CALLS.inc(group=self.name, outcome="leader")
+        else:
+            SINGLEFLIGHT_CALLS.inc(group=self.name, outcome="shared")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # все ждущие могли уйти — исключение не должно остаться «не полученным»
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+# общий экземпляр для чтений из БД (crud.shared_read)
+read_flight = SingleFlight("db_read")
+
+
+__all__ = ["SingleFlight", "read_flight"]
@@ -0,0 +1,193 @@
+# backend/core/static_files.py
+"""
+Раздача собранного фронта (`frontend/dist`) из памяти.
+
+При старте (`load()`, из lifespan) каталог читается один раз:
+
+* файл держится в памяти вместе с gzip/br-вариантами. Варианты берутся
+  готовыми из соседних `*.gz` / `*.br` (см. `precompress` ниже — запускается
+  после `vite build`), иначе сжимаются здесь быстрым уровнем;
+* ETag — хэш содержимого (у каждого варианта свой), `If-None-Match` → 304;
+* хэшированные ассеты Vite (`assets/index-3f9a1c2b.js`) — `immutable` на год,
+  остальное (`index.html`, public/) — `no-cache`, т.е. всегда ревалидация по ETag.
+
+Файлы крупнее `max_file_size` в память не берутся и отдаются с диска.
+
+Предварительное сжатие максимальными уровнями (после сборки)::
+
+    python -m backend.core.static_files frontend/dist
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import mimetypes
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Optional
+
+from starlette.responses import FileResponse, Response
+
+from backend.core.compression import SUPPORTED_ENCODINGS, choose_encoding, compress, is_compressible
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# сжатие не окупается на мелочи и когда выигрыш < 10 %
+MIN_COMPRESS_SIZE = 1024
+MIN_COMPRESS_RATIO = 0.9
+
+# Vite: assets/[name]-[hash].[ext], hash — 8 символов base64url
+_HASHED_ASSET = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+# zstd для статики не генерируем: br на максимальном уровне плотнее
+_STATIC_ENCODINGS = tuple(e for e in SUPPORTED_ENCODINGS if e in _SUFFIXES)
+
+
+@dataclass(slots=True)
+class StaticFile:
+    media_type: str
+    cache_control: str
+    etag: str
+    body: Optional[bytes] = None                     # None → большой файл, отдаётся с диска
+    path: Optional[Path] = None
+    encoded: dict[str, tuple[bytes, str]] = field(default_factory=dict)   # encoding → (body, etag)
+
+
+def _etag(data: bytes, suffix: str = "") -> str:
+    return f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}{suffix}"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """`If-None-Match` — слабое сравнение (RFC 9110 §13.1.2)."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+class FrontendBundle:
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_file_size: int = 8 * 1024 * 1024,
+        gzip_level: int = 6,
+        brotli_level: int = 5,
+    ) -> None:
+        self.root = root
+        self.max_file_size = max_file_size
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self._files: Optional[dict[str, StaticFile]] = None
+
+    # ─────────────────────────── загрузка ──────────────────────────────
+    @property
+    def loaded(self) -> bool:
+        return self._files is not None
+
+    def load(self) -> dict[str, int]:
+        """Прочитать каталог; возвращает статистику для лога старта."""
+        files: dict[str, StaticFile] = {}
+        stats = {"files": 0, "bytes": 0, "encoded_bytes": 0}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file():
+                continue
+            if path.suffix in (".gz", ".br") and path.with_suffix("").is_file():
+                continue  # предсжатый вариант — подхватывается вместе с оригиналом
+            rel = path.relative_to(self.root).as_posix()
+            files[rel] = entry = self._load_file(rel, path)
+            stats["files"] += 1
+            stats["bytes"] += len(entry.body) if entry.body is not None else 0
+            stats["encoded_bytes"] += sum(len(body) for body, _ in entry.encoded.values())
+        self._files = files
+        return stats
+
+    def _load_file(self, rel: str, path: Path) -> StaticFile:
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        cache_control = IMMUTABLE if _HASHED_ASSET.match(rel) else REVALIDATE
+        stat = path.stat()
+        if stat.st_size > self.max_file_size:
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            return StaticFile(media_type, cache_control, etag, path=path)
+
+        data = path.read_bytes()
+        entry = StaticFile(media_type, cache_control, _etag(data), body=data, path=path)
+        if len(data) < MIN_COMPRESS_SIZE or not is_compressible(media_type):
+            return entry
+        for encoding in ("br", "gzip"):
+            sibling = path.with_name(path.name + _SUFFIXES[encoding])
+            if sibling.is_file() and sibling.stat().st_mtime_ns >= stat.st_mtime_ns:
+                body = sibling.read_bytes()
+            elif encoding in _STATIC_ENCODINGS:
+                level = self.brotli_level if encoding == "br" else self.gzip_level
+                body = compress(data, encoding, level=level)
+            else:
+                continue
+            if len(body) < len(data) * MIN_COMPRESS_RATIO:
+                entry.encoded[encoding] = (body, _etag(data, f"-{encoding}"))
+        return entry
+
+    # ─────────────────────────── отдача ────────────────────────────────
+    def get(self, rel_path: str) -> Optional[StaticFile]:
+        if self._files is None:
+            self.load()  # без lifespan (скрипты, TestClient без with)
+        return self._files.get(rel_path)  # type: ignore[union-attr]
+
+    def serve(self, rel_path: str, headers: Mapping[str, str], method: str = "GET") -> Optional[Response]:
+        """Ответ для файла `rel_path` (относительно dist) или None, если его нет."""
+        entry = self.get(rel_path)
+        if entry is None:
+            return None
+
+        encoding = choose_encoding(headers.get("accept-encoding"), entry.encoded)
+        if encoding:
+            body, etag = entry.encoded[encoding]
+        else:
+            body, etag = entry.body, entry.etag
+
+        out = {"etag": etag, "cache-control": entry.cache_control}
+        if entry.encoded:
+            out["vary"] = "Accept-Encoding"
+        if _etag_matches(headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=out)
+        if body is None:
+            return FileResponse(entry.path, media_type=entry.media_type, headers=out)
+        if encoding:
+            out["content-encoding"] = encoding
+        out["content-length"] = str(len(body))
+        return Response(b"" if method == "HEAD" else body, media_type=entry.media_type, headers=out)
+
+
+# ─────────────────────── предсжатие после сборки ───────────────────────
+def precompress(root: Path, *, gzip_level: int = 9, brotli_level: int = 11) -> int:
+    """Записать `*.gz` / `*.br` рядом с текстовыми файлами; возвращает их число."""
+    written = 0
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix in (".gz", ".br"):
+            continue
+        media_type = mimetypes.guess_type(path.name)[0]
+        data = path.read_bytes()
+        if len(data) < MIN_COMPRESS_SIZE or not is_compressible(media_type):
+            continue
+        for encoding in _STATIC_ENCODINGS:
+            level = brotli_level if encoding == "br" else gzip_level
+            body = compress(data, encoding, level=level)
+            if len(body) < len(data) * MIN_COMPRESS_RATIO:
+                path.with_name(path.name + _SUFFIXES[encoding]).write_bytes(body)
+                written += 1
+    return written
+
+
+__all__ = ["FrontendBundle", "IMMUTABLE", "REVALIDATE", "StaticFile", "precompress"]
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else "frontend/dist")
+    print(f"{precompress(target)} compressed variants written to {target}")
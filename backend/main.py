@@ -1,39 +1,126 @@
+import asyncio
 import logging
+import math
 import time
-import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from backend.api.api import api_router
+from backend.api.deps import auth_manager
+from backend.core.admission import Overloaded, longpoll_admission
 from backend.core.config import settings
+from backend.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_latest
+from backend.core.middleware import CompressionMiddleware, RateLimitMiddleware, RequestLogMiddleware
+from backend.core.ratelimit import Budget, MemoryRateLimitStore
+from backend.core import query_stats
+from backend.core.jobs import job_queue
+from backend.core.log_setup import setup_logging
+from backend.core.static_files import FrontendBundle
+from backend.services.bot_webhook import bot_webhook
+from backend.services.telegram_notifier import telegram_notifier
 
-# Настройка логирования
+# Настройка логирования: очередь + фоновый поток (под run.py уже настроено им)
 log_level_name = settings.LOG_LEVEL.upper()
-numeric_level = getattr(logging, log_level_name, logging.INFO)
-formatter = logging.Formatter(
-    "%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(funcName)s() - %(message)s"
-)
-logging.basicConfig(
-    level=numeric_level,
-    format="%(asctime)s [%(levelname)s] %(name)s:%(lineno)d - %(funcName)s() - %(message)s",
-    handlers=[logging.StreamHandler()],
+setup_logging(
+    level=getattr(logging, log_level_name, logging.INFO),
+    log_file=settings.LOG_FILE,
+    max_bytes=settings.LOG_FILE_MAX_BYTES,
+    backup_count=settings.LOG_FILE_BACKUPS,
+    queue_size=settings.LOG_QUEUE_SIZE,
 )
 logger = logging.getLogger("backend")
-middleware_logger = logging.getLogger("middleware")
 cors_logger = logging.getLogger("cors")
-security_logger = logging.getLogger("security")
 
 logging.getLogger("uvicorn").setLevel(logging.WARNING)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("httpcore").setLevel(logging.WARNING)
 
-app = FastAPI(title="Magic App Backend")
+async def _start_bot_webhook() -> None:
+    """Бот в webhook-режиме: Dispatcher из bot/main.py, апдейты — на /api/telegram/webhook."""
+    if not settings.BOT_WEBHOOK_SECRET:
+        raise RuntimeError("BOT_WEBHOOK_ENABLED требует BOT_WEBHOOK_SECRET")
+    from bot.main import bot, dp  # aiogram — только в этом режиме
+
+    bot_webhook.configure(
+        secret=settings.BOT_WEBHOOK_SECRET,
+        concurrency=settings.BOT_WEBHOOK_CONCURRENCY,
+        dedup_size=settings.BOT_WEBHOOK_DEDUP_SIZE,
+    )
+    bot_webhook.attach(dp, bot)
+    if settings.BOT_WEBHOOK_URL:
+        await bot.set_webhook(
+            str(settings.BOT_WEBHOOK_URL),
+            secret_token=settings.BOT_WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=min(settings.BOT_WEBHOOK_CONCURRENCY, 100),
+        )
+    logger.info("🤖 Bot webhook: enabled (concurrency %d, setWebhook %s)",
+                settings.BOT_WEBHOOK_CONCURRENCY, "yes" if settings.BOT_WEBHOOK_URL else "no")
+
+
+# События жизненного цикла приложения: всё тяжёлое (воркеры, бот) — здесь,
+# а не при импорте; uvicorn считает сервер поднятым после выхода из startup
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("🚀 Starting Magic App Backend")
+    logger.info("📊 Log level: %s", log_level_name)
+    logger.info("🌐 CORS origins: %d configured", len(all_origins))
+    logger.info("🔒 Security middleware: enabled (access log sample rate %.2f)", settings.ACCESS_LOG_SAMPLE_RATE)
+    if settings.RATE_LIMIT_ENABLED:
+        logger.info("🚦 Rate limits: read %s, write %s, poll %s, payments %s",
+                    settings.RATE_LIMIT_READ, settings.RATE_LIMIT_WRITE,
+                    settings.RATE_LIMIT_POLL, settings.RATE_LIMIT_PAYMENTS)
+    if settings.DB_QUERY_STATS:
+        logger.info("🧮 DB query stats: enabled (slow > %.0f ms, N+1 ≥ %d)",
+                    settings.DB_SLOW_QUERY_MS, settings.DB_N_PLUS_ONE_THRESHOLD)
+    longpoll_admission.configure(
+        max_waiters=settings.LONGPOLL_MAX_WAITERS,
+        per_user=settings.LONGPOLL_MAX_PER_USER,
+        per_key=settings.LONGPOLL_MAX_DUPLICATES,
+        retry_after=settings.LONGPOLL_RETRY_AFTER,
+    )
+    logger.info("⏳ Long-poll admission: %d waiters, %d per user",
+                settings.LONGPOLL_MAX_WAITERS, settings.LONGPOLL_MAX_PER_USER)
+    job_queue.configure(
+        workers=settings.JOBS_WORKERS,
+        maxsize=settings.JOBS_QUEUE_SIZE,
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        outbox=settings.JOBS_OUTBOX,
+        outbox_lease=settings.JOBS_OUTBOX_LEASE_S,
+        outbox_scan_interval=settings.JOBS_OUTBOX_SCAN_S,
+    )
+    await job_queue.start()
+    telegram_notifier.configure(
+        global_rate=settings.TG_NOTIFY_RATE,
+        coalesce_window=settings.TG_NOTIFY_COALESCE_S,
+        webapp_url=str(settings.FRONTEND_ORIGIN),
+    )
+    logger.info("📬 Background jobs: %d workers, outbox %s",
+                settings.JOBS_WORKERS, "on" if settings.JOBS_OUTBOX else "off")
+    if settings.BOT_WEBHOOK_ENABLED:
+        await _start_bot_webhook()
+    logger.info("📁 Frontend available: %s", "Yes" if dist_dir else "No")
+    if frontend:
+        stats = await asyncio.to_thread(frontend.load)
+        logger.info("📦 Frontend path: %s (%d files, %d KiB, compressed variants %d KiB)",
+                    dist_dir, stats["files"], stats["bytes"] // 1024, stats["encoded_bytes"] // 1024)
+    logger.info("✅ Application started successfully")
+    yield
+    logger.info("🛑 Shutting down Magic App Backend")
+    if bot_webhook.active:
+        await bot_webhook.drain()
+    await job_queue.stop()
+    await telegram_notifier.close()
+    logger.info("✅ Application stopped successfully")
+
+
+app = FastAPI(title="Magic App Backend", lifespan=lifespan)
 
 # Добавляем TrustedHost middleware для безопасности
 allowed_hosts = ["*"]
@@ -41,33 +128,6 @@ if hasattr(settings, 'ALLOWED_HOSTS') and settings.ALLOWED_HOSTS:
     allowed_hosts = settings.ALLOWED_HOSTS
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=allowed_hosts)
 
-# Улучшенный middleware для логирования и мониторинга
-@app.middleware("http")
-async def enhanced_logging_middleware(request: Request, call_next):
-    request_id = str(uuid.uuid4())[:8]
-    start_time = time.time()
-    client_ip = request.client.host if request.client else "unknown"
-    user_agent = request.headers.get("user-agent", "unknown")
-    request.state.request_id = request_id
-    middleware_logger.info("🔄 [%s] START: %s %s | IP: %s | UA: %s", request_id, request.method, request.url.path, client_ip, user_agent[:100])
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        status_emoji, log_level = "✅", middleware_logger.info
-        if response.status_code >= 500:
-            status_emoji, log_level = "💥", middleware_logger.error
-        elif response.status_code >= 400:
-            status_emoji, log_level = "⚠️", middleware_logger.warning
-        log_level("%s [%s] END: %s %s → %s | %.3fs", status_emoji, request_id, request.method, request.url.path, response.status_code, process_time)
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Process-Time"] = f"{process_time:.3f}"
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        middleware_logger.error("❌ [%s] ERROR: %s %s | Exception: %s | %.3fs | IP: %s", request_id, request.method, request.url.path, str(e), process_time, client_ip)
-        middleware_logger.exception("🔍 [%s] Full traceback for %s %s:", request_id, request.method, request.url.path)
-        raise
-
 # Список доменов Telegram для CORS и CSP
 telegram_origins = [
     "https://web.telegram.org",
@@ -77,38 +137,56 @@ telegram_origins = [
     "https://core.telegram.org",
 ]
 
-# Middleware для безопасности и мониторинга подозрительной активности
-@app.middleware("http")
-async def security_monitoring_middleware(request: Request, call_next):
-    client_ip = request.client.host if request.client else "unknown"
-    user_agent = request.headers.get("user-agent", "")
-    suspicious_paths = ["/admin", "/.env", "/wp-admin", "/phpmyadmin", "/config", "/.git", "/backup", "/test", "/debug", "/console", "/api/v1/admin", "/swagger", "/docs", "/redoc"]
-    suspicious_user_agents = ["sqlmap", "nikto", "nmap", "masscan", "burp", "owasp"]
-    if any(path in request.url.path.lower() for path in suspicious_paths):
-        security_logger.warning("🚨 SUSPICIOUS_PATH: %s requested %s %s", client_ip, request.method, request.url.path)
-    if any(agent.lower() in user_agent.lower() for agent in suspicious_user_agents):
-        security_logger.warning("🚨 SUSPICIOUS_UA: %s with User-Agent: %s", client_ip, user_agent)
-
-    response = await call_next(request)
-
-    # --- НАЧАЛО ИСПРАВЛЕНИЯ ---
-    # Устанавливаем стандартные заголовки безопасности
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
-    # Заменяем строгий X-Frame-Options на гибкий Content-Security-Policy,
-    # чтобы разрешить встраивание приложения в клиентах Telegram.
-    allowed_ancestors = " ".join(["'self'"] + telegram_origins)
-    response.headers["Content-Security-Policy"] = f"frame-ancestors {allowed_ancestors};"
-    # --- КОНЕЦ ИСПРАВЛЕНИЯ ---
-
-    if request.url.path.startswith("/api"):
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-
-    return response
+# Счётчик SQL-запросов на HTTP-запрос (N+1, slow-лог). Добавляется раньше
+# RequestLogMiddleware, т.е. оказывается внутри него и видит request-id.
+if settings.DB_QUERY_STATS:
+    query_stats.configure(
+        slow_query_ms=settings.DB_SLOW_QUERY_MS,
+        repeat_threshold=settings.DB_N_PLUS_ONE_THRESHOLD,
+    )
+    app.add_middleware(query_stats.QueryStatsMiddleware)
+
+# Сжатие ответов /api; добавлено до RequestLogMiddleware, т.е. внутри него —
+# X-Process-Time учитывает и время сжатия
+if settings.COMPRESS_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESS_MIN_SIZE,
+        levels={
+            "gzip": settings.COMPRESS_GZIP_LEVEL,
+            "br": settings.COMPRESS_BROTLI_LEVEL,
+            "zstd": settings.COMPRESS_ZSTD_LEVEL,
+        },
+        exclude=settings.COMPRESS_EXCLUDE,
+    )
+
+# Лимиты запросов на пользователя/IP; внутри RequestLogMiddleware (429 попадают
+# в access-лог с request-id) и внутри CORS (браузер видит Retry-After)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        budgets={
+            "read": Budget.parse(settings.RATE_LIMIT_READ),
+            "write": Budget.parse(settings.RATE_LIMIT_WRITE),
+            "poll": Budget.parse(settings.RATE_LIMIT_POLL),
+            "payments": Budget.parse(settings.RATE_LIMIT_PAYMENTS),
+        },
+        store=MemoryRateLimitStore(max_keys=settings.RATE_LIMIT_MAX_KEYS),
+        authenticate=lambda init_data: auth_manager().authenticate(init_data),
+        # Telegram присылает апдейты и платежи со своих IP — их не режем
+        exempt=("/api/telegram/webhook", "/api/payments/webhook"),
+        # анонимов за Cloudflare/nginx различаем по заголовку прокси, а не по его IP
+        trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES.split(","),
+        cloudflare_proxies=settings.RATE_LIMIT_CLOUDFLARE_IPS.split(","),
+    )
+
+# Логирование запросов, мониторинг сканеров и заголовки безопасности —
+# один pure-ASGI middleware (без буферизации BaseHTTPMiddleware).
+app.add_middleware(
+    RequestLogMiddleware,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    frame_ancestors=telegram_origins,
+)
 
 # Настройка CORS для работы с Telegram и веб-приложениями
 # Надежно получаем настройки, чтобы избежать TypeError
@@ -150,6 +228,8 @@ app.add_middleware(
     expose_headers=[
         "X-Request-ID", "X-Process-Time", "X-RateLimit-Limit",
         "X-RateLimit-Remaining", "X-RateLimit-Reset",
+        # не из CORS-safelist: без этого JS не прочтёт паузу из 429/503
+        "Retry-After",
     ],
     max_age=86400,
 )
@@ -157,32 +237,21 @@ app.add_middleware(
 # Подключаем API роутер
 app.include_router(api_router, prefix="/api")
 
-# Настройка статических файлов
-current_file = Path(__file__).resolve()
-root_dir = current_file.parents[2]
-lib_dir = current_file.parents[1]
-dist_candidates = [
-    root_dir / "frontend" / "dist",
-    lib_dir / "frontend" / "dist",
-    root_dir / "dist",
-    lib_dir / "dist",
-]
-dist_dir = next((p for p in dist_candidates if p.is_dir()), None)
 
-if dist_dir:
-    logger.info("📦 Front-end mounted from %s", dist_dir)
-    app.mount("/assets", StaticFiles(directory=dist_dir / "assets", html=False), name="assets")
-    @app.get("/{full_path:path}", include_in_schema=False)
-    async def spa_fallback(request: Request, full_path: str):
-        if request.method == "GET" and not request.url.path.startswith(("/api", "/assets")):
-            index_file = dist_dir / "index.html"
-            if not index_file.exists():
-                logger.error("❌ index.html not found at %s", index_file)
-                raise HTTPException(status_code=404, detail="Frontend not available")
-            return FileResponse(index_file)
-        raise HTTPException(status_code=404)
-else:
-    logger.warning("❗ dist каталог не найден — фронт не будет отдаваться (искали в %s)", [str(p) for p in dist_candidates])
+# Слишком много ожидающих long-poll — сбросить нагрузку, клиент повторит позже
+@app.exception_handler(Overloaded)
+async def longpoll_overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(
+        {"detail": "Сервер перегружен, повторите позже."},
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+# Prometheus text exposition — без внешнего коллектора;
+# объявлен до SPA catch-all, иначе его перехватит spa_fallback
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_latest(), media_type=METRICS_CONTENT_TYPE)
 
 # Расширенный health check
 @app.get("/health", include_in_schema=False)
@@ -193,6 +262,7 @@ async def health_check():
         "frontend_available": dist_dir is not None,
         "log_level": log_level_name,
         "cors_origins_count": len(all_origins),
+        "longpoll_waiters": longpoll_admission.waiting(),
     }
     if dist_dir:
         health_status["frontend_path"] = str(dist_dir)
@@ -211,19 +281,37 @@ async def cors_info():
         "max_age": 86400,
     }
 
-# События жизненного цикла приложения
-@app.on_event("startup")
-async def startup_event():
-    logger.info("🚀 Starting Magic App Backend")
-    logger.info("📊 Log level: %s", log_level_name)
-    logger.info("🌐 CORS origins: %d configured", len(all_origins))
-    logger.info("🔒 Security middleware: enabled")
-    logger.info("📁 Frontend available: %s", "Yes" if dist_dir else "No")
-    if dist_dir:
-        logger.info("📦 Frontend path: %s", dist_dir)
-    logger.info("✅ Application started successfully")
+# Настройка статических файлов
+current_file = Path(__file__).resolve()
+root_dir = current_file.parents[2]
+lib_dir = current_file.parents[1]
+dist_candidates = [
+    root_dir / "frontend" / "dist",
+    lib_dir / "frontend" / "dist",
+    root_dir / "dist",
+    lib_dir / "dist",
+]
+dist_dir = next((p for p in dist_candidates if p.is_dir()), None)
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("🛑 Shutting down Magic App Backend")
-    logger.info("✅ Application stopped successfully")
+frontend = FrontendBundle(dist_dir) if dist_dir else None
+
+if frontend:
+    logger.info("📦 Front-end mounted from %s", dist_dir)
+
+    # catch-all объявлен последним — иначе перехватит /health и /cors-info
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+    async def spa_fallback(request: Request, full_path: str):
+        if full_path == "api" or full_path.startswith("api/"):
+            raise HTTPException(status_code=404)
+        response = frontend.serve(full_path, request.headers, request.method)
+        if response is None:
+            if full_path.startswith("assets/"):
+                raise HTTPException(status_code=404)
+            # клиентский роутинг: любой другой путь — index.html
+            response = frontend.serve("index.html", request.headers, request.method)
+        if response is None:
+            logger.error("❌ index.html not found in %s", dist_dir)
+            raise HTTPException(status_code=404, detail="Frontend not available")
+        return response
+else:
+    logger.warning("❗ dist каталог не найден — фронт не будет отдаваться (искали в %s)", [str(p) for p in dist_candidates])
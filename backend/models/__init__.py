@@ -5,6 +5,8 @@ from .product import Product
 from .order import Order
 from .order_item import OrderItem
 from .message import Message
+from .job_outbox import JobOutbox
+from .chat_change import ChatChange
 
 __all__ = [
     "Base",
@@ -14,4 +16,6 @@ __all__ = [
     "Order",
     "OrderItem",
     "Message",
+    "JobOutbox",
+    "ChatChange",
 ]
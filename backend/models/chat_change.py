@@ -0,0 +1,45 @@
+# backend/models/chat_change.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ChatChange(Base):
+    """
+    Журнал изменений чатов (`backend.services.change_feed`): строка на каждое
+    новое сообщение, ответ, удаление и прочтение — в той же транзакции.
+
+    `id` (bigserial) — курсор клиентов `/messages/sync`: инкрементальная
+    синхронизация — это range scan `(owner_id, id)` / `(order_id, id)`.
+    `message_id` без FK: удалённое сообщение остаётся в журнале.
+    """
+    __tablename__ = "chat_changes"
+    __table_args__ = (
+        Index("ix_chat_changes_owner_id_id", "owner_id", "id"),
+        Index("ix_chat_changes_order_id_id", "order_id", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    order_id: Mapped[int] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # владелец заказа — кому доставлять (денормализовано ради индекса)
+    owner_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    type: Mapped[str] = mapped_column(String(32), nullable=False)
+    data: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False, default=dict, server_default="{}")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ChatChange id={self.id} {self.type} order={self.order_id}>"
@@ -0,0 +1,38 @@
+# backend/models/job_outbox.py
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class JobOutbox(Base):
+    """
+    Durable-очередь побочных эффектов (`backend.core.jobs`, JOBS_OUTBOX=true).
+
+    Строка пишется в той же транзакции, что и бизнес-данные, и удаляется
+    воркером после успешного выполнения. `locked_until` — аренда процесса,
+    который держит задачу (продлевается, пока она не выполнена); строки с
+    истёкшей арендой подхватывает `JobQueue.recover()`.
+    """
+    __tablename__ = "job_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        index=True,
+    )
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<JobOutbox id={self.id} {self.name} attempts={self.attempts}>"
@@ -8,6 +8,7 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -29,6 +30,14 @@ from .user import User
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # счётчики непрочитанных и mark-as-read трогают только is_read = false
+        Index(
+            "ix_messages_unread_order",
+            "order_id", "id",
+            postgresql_where="NOT is_read",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
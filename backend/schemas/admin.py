@@ -18,3 +18,9 @@ class AdminMessageWithExtras(BaseModel):
 
     # Pydantic v2: tell it to read from ORM attributes
     model_config = ConfigDict(from_attributes=True)
+
+
+class AdminMessagePage(BaseModel):
+    items: list[AdminMessageWithExtras]
+    # непрозрачный курсор для ?cursor= следующей страницы; None — конец выборки
+    next_cursor: Optional[str] = None
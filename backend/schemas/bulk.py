@@ -0,0 +1,19 @@
+# backend/schemas/bulk.py
+from pydantic import BaseModel, Field
+
+
+class BulkRowError(BaseModel):
+    line: int = Field(..., description="Номер строки данных (с 1, без заголовка CSV)")
+    error: str
+
+
+class BulkImportReport(BaseModel):
+    """Итог `/admin/bulk/*/import`."""
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    categories_created: int = 0
+    batches: int = 0
+    # первые MAX_REPORTED_ERRORS ошибок; общее число — в `failed`
+    errors: list[BulkRowError] = Field(default_factory=list)
@@ -1,8 +1,8 @@
 # backend/schemas/message.py
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 # --------------------------------------------------------------------------
 # общая конфигурация для всех схем: читаем поля напрямую из SQLAlchemy-ORM
@@ -48,5 +48,53 @@ class MessageOut(BaseModel):
     product_title: Optional[str] = None
     # имя пользователя (username), от которого пришло сообщение
     user_name: Optional[str] = None
+    # только в списках чатов: непрочитанные входящие для того, кто запрашивает
+    unread_count: int = 0
 
     model_config = ORM_CONFIG
+
+
+# --------------------------------------------------------------------------
+# 4) «прочитано до курсора»                 (POST /messages/{id}/read,
+#                                            POST /admin/messages/read)
+# --------------------------------------------------------------------------
+class ReadUpTo(BaseModel):
+    up_to_id: int = Field(..., ge=1, description="id последнего показанного сообщения")
+
+
+class ChatReadUpTo(ReadUpTo):
+    order_id: int = Field(..., ge=1)
+
+
+class MarkReadRequest(BaseModel):
+    chats: list[ChatReadUpTo] = Field(..., min_length=1, max_length=500)
+
+
+class MarkReadResult(BaseModel):
+    # order_id → сколько сообщений помечено прочитанными
+    marked: dict[int, int]
+
+
+# --------------------------------------------------------------------------
+# 5) синхронизация всех чатов одним long-poll       (GET /messages/sync)
+#    type: new_message | message_replied | message_deleted | chat_deleted |
+#          messages_read;  seq — id строки журнала chat_changes
+# --------------------------------------------------------------------------
+class SyncEvent(BaseModel):
+    seq: int
+    type: str
+    order_id: int
+    message_id: Optional[int] = None
+    data: dict[str, Any] = Field(default_factory=dict)
+    # только /admin/messages/sync: строка списка чатов после события (null — удалён)
+    chat: Optional[MessageOut] = None
+
+
+class SyncResponse(BaseModel):
+    # передать в следующий запрос как ?cursor= (seq последнего события)
+    cursor: str
+    # курсора не было / он из другой базы — перечитать списки целиком
+    reset: bool = False
+    events: list[SyncEvent] = Field(default_factory=list)
+    # событий больше лимита — запросить ещё раз сразу, без ожидания
+    more: bool = False
@@ -6,7 +6,7 @@ from decimal import Decimal
 
 from pydantic import BaseModel, ConfigDict
 
-from backend.schemas.product import ProductSchema            # «полный» товар
+from backend.schemas.product import ProductBrief, ProductSchema   # краткий / «полный» товар
 from backend.schemas.message import MessageOut            # сообщения
 
 # общая конфигурация: позволяем Pydantic читать поля прямо из ORM-моделей
@@ -42,6 +42,23 @@ class OrderRead(OrderBase):
     model_config = ORM_CONFIG
 
 
+class OrderListItem(OrderBase):
+    """
+    Строка списков `/orders/` и `/orders/my`: поля заказа + краткий товар.
+    Собирается из колонок (см. `OrderCRUD.user_order_rows`), полный товар
+    с описанием отдаёт только `/orders/{id}`.
+    """
+    id: int
+    user_id: int
+    total: Decimal
+    status: str
+    created_at: datetime
+
+    product: ProductBrief
+
+    model_config = ORM_CONFIG
+
+
 class OrderDetail(OrderRead):
     # То же, но плюс вся переписка
     messages: list[MessageOut] = []
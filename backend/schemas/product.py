@@ -10,6 +10,7 @@ from pydantic import (
     Field,
     HttpUrl,
     PositiveFloat,
+    model_validator,
 )
 
 # ─────────────────────────────────────────────
@@ -73,3 +74,36 @@ class ProductOut(_ProductCore):
 # 5.  Back-compat alias (если где-то ожидают ProductSchema)
 # ─────────────────────────────────────────────
 ProductSchema = ProductOut  # noqa: N816
+
+
+# ─────────────────────────────────────────────
+# 6.  Строка массового импорта (JSONL / CSV)
+# ─────────────────────────────────────────────
+class ProductImportRow(_ProductCore):
+    """
+    Одна строка `/admin/bulk/products/import`.
+    `id` задан — upsert существующего товара, иначе вставка.
+    Категория — по имени (`category`, создаётся при отсутствии) или по `category_id`.
+    """
+    id: Optional[int] = Field(None, ge=1)
+    category: Optional[str] = Field(None, min_length=1, max_length=120)
+    category_id: Optional[int] = Field(None, ge=1)
+
+    @model_validator(mode="after")
+    def _category_given(self) -> "ProductImportRow":
+        if not self.category and not self.category_id:
+            raise ValueError("either category or category_id is required")
+        return self
+
+
+# ─────────────────────────────────────────────
+# 7.  Краткий товар для списков заказов
+# ─────────────────────────────────────────────
+class ProductBrief(BaseModel):
+    """Только то, что показывают карточки заказов: без описания и дат."""
+    id: int
+    title: str
+    image_url: Optional[str] = None
+    price: float
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,151 @@
+# backend/services/bot_webhook.py
+"""
+Бот в режиме webhook: апдейты Telegram приходят на `POST /api/telegram/webhook`
+и передаются в aiogram `Dispatcher` (`bot/main.py`) вместо `start_polling`.
+
+* `X-Telegram-Bot-Api-Secret-Token` сверяется с `BOT_WEBHOOK_SECRET`
+  (constant-time), без него — 401;
+* апдейт обрабатывается в фоне, Telegram сразу получает 200. Одновременно —
+  не больше `concurrency` апдейтов; когда слоты заняты, webhook ждёт
+  свободный, и Telegram сам придерживает следующие (backpressure);
+* Telegram повторяет апдейт, если не дождался ответа, — последние
+  `dedup_size` `update_id` запоминаются, повторы отбрасываются. Запрос,
+  оборванный в ожидании слота, свой `update_id` забывает: апдейт не
+  принят, и повтор Telegram должен пройти.
+
+Память dedup у каждого процесса своя: при нескольких воркерах повтор,
+попавший в другой воркер, обработается ещё раз (хэндлеры бота идемпотентны:
+оплата проверяет статус заказа).
+
+    bot_webhook.configure(secret=..., concurrency=32)
+    bot_webhook.attach(dp, bot)       # lifespan
+    await bot_webhook.feed(update)    # эндпоинт
+    await bot_webhook.drain()         # shutdown
+"""
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+from backend.core.metrics import TELEGRAM_WEBHOOK_UPDATES
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateDeduplicator:
+    """Последние `size` update_id (LRU)."""
+
+    def __init__(self, size: int = 10_000) -> None:
+        self.size = size
+        self._seen: OrderedDict[int, None] = OrderedDict()
+
+    def seen(self, update_id: int) -> bool:
+        """True — уже был; иначе запоминает и возвращает False."""
+        if update_id in self._seen:
+            self._seen.move_to_end(update_id)
+            return True
+        self._seen[update_id] = None
+        if len(self._seen) > self.size:
+            self._seen.popitem(last=False)
+        return False
+
+    def forget(self, update_id: int) -> None:
+        self._seen.pop(update_id, None)
+
+
+class BotWebhook:
+    def __init__(
+        self,
+        *,
+        secret: Optional[str] = None,
+        concurrency: int = 32,
+        dedup_size: int = 10_000,
+    ) -> None:
+        self.secret = secret
+        self.concurrency = concurrency
+        self.dedup_size = dedup_size
+
+        self._dispatcher: Any = None
+        self._bot: Any = None
+        self._dedup = UpdateDeduplicator(dedup_size)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def configure(self, **options: Any) -> None:
+        for key, value in options.items():
+            if not hasattr(self, key) or key.startswith("_"):
+                raise AttributeError(f"unknown webhook option {key!r}")
+            setattr(self, key, value)
+        self._dedup = UpdateDeduplicator(self.dedup_size)
+        self._slots = None
+
+    def attach(self, dispatcher: Any, bot: Any) -> None:
+        """`dispatcher` — с `async feed_raw_update(bot, update: dict)` (aiogram 3)."""
+        self._dispatcher, self._bot = dispatcher, bot
+
+    @property
+    def active(self) -> bool:
+        return self._dispatcher is not None
+
+    def check_secret(self, token: Optional[str]) -> bool:
+        if not self.secret or token is None:
+            return False
+        return hmac.compare_digest(token.encode(), self.secret.encode())
+
+    # ─────────────────────────── приём ─────────────────────────────────
+    async def feed(self, update: dict[str, Any]) -> bool:
+        """Поставить апдейт в обработку; False — повтор, отброшен."""
+        update_id = update.get("update_id")
+        if isinstance(update_id, int) and self._dedup.seen(update_id):
+            TELEGRAM_WEBHOOK_UPDATES.inc(outcome="duplicate")
+            return False
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            # Telegram не дождался слота и оборвал запрос — апдейт не принят,
+            # его повтор не должен отсеяться как дубликат
+            if isinstance(update_id, int):
+                self._dedup.forget(update_id)
+            raise
+        task = asyncio.create_task(self._process(update), name=f"tg-update-{update_id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        TELEGRAM_WEBHOOK_UPDATES.inc(outcome="accepted")
+        return True
+
+    async def _process(self, update: dict[str, Any]) -> None:
+        try:
+            await self._dispatcher.feed_raw_update(self._bot, update)
+        except Exception:
+            # Telegram уже получил 200 — повтора не будет, остаётся лог
+            TELEGRAM_WEBHOOK_UPDATES.inc(outcome="failed")
+            logger.exception("❌ update %s: ошибка обработки", update.get("update_id"))
+        finally:
+            self._slots.release()
+
+    # ─────────────────────────── остановка ─────────────────────────────
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """Дождаться начатых апдейтов (не дольше `timeout`), остальные отменить."""
+        if not self._tasks:
+            return
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("⚠️ webhook: %d апдейтов не успели обработаться", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+# общий экземпляр процесса
+bot_webhook = BotWebhook()
+
+
+__all__ = ["BotWebhook", "UpdateDeduplicator", "bot_webhook"]
@@ -0,0 +1,366 @@
+"""Массовый импорт каталога и потоковый экспорт заказов / сообщений.
+
+Импорт
+    Тело запроса читается потоково (JSON Lines или CSV) и режется на батчи.
+    На батч — один `INSERT … ON CONFLICT (name) DO NOTHING` для новых категорий,
+    один SELECT их id и один `INSERT … ON CONFLICT (id) DO UPDATE` для товаров;
+    commit тоже один на батч. Ошибочные строки отбрасываются и попадают в отчёт.
+
+Экспорт
+    `AsyncSession.stream()` + `yield_per` — серверный курсор asyncpg, в памяти
+    только текущая порция строк. Выбираются колонки, а не ORM-объекты, поэтому
+    `lazy="selectin"` у `Order` не порождает дополнительных запросов.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Optional, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy import Select, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.database import async_session
+from backend.models.category import Category
+from backend.models.message import Message
+from backend.models.order import Order
+from backend.models.product import Product
+from backend.models.user import User
+from backend.schemas.bulk import BulkImportReport, BulkRowError
+from backend.schemas.product import ProductImportRow
+
+IMPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 1_000
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = ("jsonl", "csv")
+MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+PRODUCT_FIELDS = ("id", "category", "title", "price", "description", "image_url")
+ORDER_FIELDS = (
+    "id", "user_id", "telegram_id", "product_id", "product_title",
+    "quantity", "price", "total", "status", "created_at",
+)
+MESSAGE_FIELDS = (
+    "id", "order_id", "user_id", "content", "reply",
+    "is_read", "created_at", "replied_at",
+)
+
+
+class BulkFormatError(ValueError):
+    """Тело импорта не разбирается как заявленный формат."""
+
+
+# ───────────────────────── разбор входного потока ─────────────────────────
+async def _iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+async def iter_jsonl(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, Any]]:
+    """(номер строки, объект) для каждой непустой строки JSON Lines."""
+    lineno = 0
+    async for line in _iter_lines(chunks):
+        lineno += 1
+        if not line.strip():
+            continue
+        try:
+            yield lineno, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield lineno, BulkFormatError(f"invalid JSON: {exc.msg}")
+
+
+async def iter_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, Any]]:
+    """(номер записи, dict) для CSV с заголовком; поля в кавычках могут содержать переводы строк."""
+    header: Optional[list[str]] = None
+    pending: list[str] = []
+    lineno = 0
+    async for line in _iter_lines(chunks):
+        pending.append(line)
+        # запись закончена, когда кавычки сбалансированы
+        if "\n".join(pending).count('"') % 2:
+            continue
+        record = next(csv.reader(["\n".join(pending)]), [])
+        pending.clear()
+        if not any(record):
+            continue
+        if header is None:
+            header = [h.strip() for h in record]
+            continue
+        lineno += 1
+        if len(record) != len(header):
+            yield lineno, BulkFormatError(f"expected {len(header)} columns, got {len(record)}")
+            continue
+        # пустая ячейка CSV == поле не задано
+        yield lineno, {k: v for k, v in zip(header, record) if v != ""}
+    if pending:
+        lineno += 1
+        yield lineno, BulkFormatError("unterminated quoted field")
+
+
+def iter_records(fmt: str, chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, Any]]:
+    if fmt == "jsonl":
+        return iter_jsonl(chunks)
+    if fmt == "csv":
+        return iter_csv(chunks)
+    raise BulkFormatError(f"unsupported format {fmt!r}; expected one of {FORMATS}")
+
+
+# ───────────────────────── импорт товаров ─────────────────────────
+def _report_error(report: BulkImportReport, line: int, error: str) -> None:
+    report.failed += 1
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(BulkRowError(line=line, error=error))
+
+
+async def _resolve_categories(db: AsyncSession, names: set[str], report: BulkImportReport) -> dict[str, int]:
+    created = await db.execute(
+        pg_insert(Category)
+        .values([{"name": n} for n in sorted(names)])
+        .on_conflict_do_nothing(index_elements=[Category.name])
+        .returning(Category.id)
+    )
+    report.categories_created += len(created.all())
+    rows = await db.execute(select(Category.name, Category.id).where(Category.name.in_(names)))
+    return dict(rows.all())
+
+
+async def _existing_category_ids(db: AsyncSession, ids: set[int]) -> set[int]:
+    rows = await db.execute(select(Category.id).where(Category.id.in_(ids)))
+    return set(rows.scalars().all())
+
+
+async def _flush_products(
+    db: AsyncSession,
+    batch: list[tuple[int, ProductImportRow]],
+    report: BulkImportReport,
+) -> bool:
+    """Пишет батч; True, если в нём были явные id (нужно сдвинуть sequence)."""
+    names = {row.category for _, row in batch if row.category}
+    by_name = await _resolve_categories(db, names, report) if names else {}
+    ids = {row.category_id for _, row in batch if row.category_id and not row.category}
+    known_ids = await _existing_category_ids(db, ids) if ids else set()
+
+    values: list[dict[str, Any]] = []
+    explicit_ids = False
+    # один id дважды в одном ON CONFLICT DO UPDATE Postgres не допускает — побеждает последняя строка
+    last_line_for_id = {row.id: line for line, row in batch if row.id is not None}
+    for line, row in batch:
+        if row.id is not None and last_line_for_id[row.id] != line:
+            _report_error(report, line, f"duplicate id {row.id}, superseded by line {last_line_for_id[row.id]}")
+            continue
+        category_id = by_name.get(row.category) if row.category else row.category_id
+        if category_id is None or (not row.category and category_id not in known_ids):
+            _report_error(report, line, f"category {row.category or row.category_id!r} not found")
+            continue
+        item = {
+            "category_id": category_id,
+            "title": row.title,
+            "price": row.price,
+            "description": row.description,
+            "image_url": str(row.image_url) if row.image_url else None,
+        }
+        if row.id is not None:
+            item["id"] = row.id
+            explicit_ids = True
+        values.append(item)
+
+    # вставки без id и upsert-ы по id — разный набор колонок, два statement-а
+    for group in (
+        [v for v in values if "id" in v],
+        [v for v in values if "id" not in v],
+    ):
+        if not group:
+            continue
+        stmt = pg_insert(Product).values(group)
+        if "id" in group[0]:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Product.id],
+                set_={c: stmt.excluded[c] for c in ("category_id", "title", "price", "description", "image_url")},
+            )
+        # xmax = 0 ⇔ строка вставлена, а не обновлена
+        result = await db.execute(stmt.returning(literal_column("xmax = 0")))
+        for (inserted,) in result.all():
+            if inserted:
+                report.inserted += 1
+            else:
+                report.updated += 1
+
+    await db.commit()
+    report.batches += 1
+    return explicit_ids
+
+
+async def import_products(
+    db: AsyncSession,
+    records: AsyncIterable[tuple[int, Any]],
+    *,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> BulkImportReport:
+    report = BulkImportReport()
+    batch: list[tuple[int, ProductImportRow]] = []
+    explicit_ids = False
+
+    async for line, raw in records:
+        report.received += 1
+        if isinstance(raw, Exception):
+            _report_error(report, line, str(raw))
+            continue
+        try:
+            batch.append((line, ProductImportRow.model_validate(raw)))
+        except ValidationError as exc:
+            _report_error(report, line, "; ".join(
+                f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in exc.errors()
+            ))
+            continue
+        if len(batch) >= batch_size:
+            explicit_ids |= await _flush_products(db, batch, report)
+            batch.clear()
+
+    if batch:
+        explicit_ids |= await _flush_products(db, batch, report)
+
+    if explicit_ids:
+        # явные id не двигают serial — иначе следующий create_product упрётся в PK
+        await db.execute(text(
+            "SELECT setval(pg_get_serial_sequence('products', 'id'), "
+            "GREATEST((SELECT max(id) FROM products), 1))"
+        ))
+        await db.commit()
+    return report
+
+
+# ───────────────────────── экспорт ─────────────────────────
+def products_query() -> Select:
+    return (
+        select(
+            Product.id, Category.name.label("category"), Product.title,
+            Product.price, Product.description, Product.image_url,
+        )
+        .join(Category, Category.id == Product.category_id)
+        .order_by(Product.id)
+    )
+
+
+def orders_query(
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+) -> Select:
+    stmt = (
+        select(
+            Order.id, Order.user_id, User.telegram_id, Order.product_id,
+            Product.title.label("product_title"), Order.quantity, Order.price,
+            Order.total, Order.status, Order.created_at,
+        )
+        .join(User, User.id == Order.user_id)
+        .join(Product, Product.id == Order.product_id)
+        .order_by(Order.id)
+    )
+    if since:
+        stmt = stmt.where(Order.created_at >= since)
+    if until:
+        stmt = stmt.where(Order.created_at < until)
+    if status:
+        stmt = stmt.where(Order.status == status)
+    return stmt
+
+
+def messages_query(
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    order_id: Optional[int] = None,
+) -> Select:
+    stmt = select(*(getattr(Message, f) for f in MESSAGE_FIELDS)).order_by(Message.id)
+    if since:
+        stmt = stmt.where(Message.created_at >= since)
+    if until:
+        stmt = stmt.where(Message.created_at < until)
+    if order_id:
+        stmt = stmt.where(Message.order_id == order_id)
+    return stmt
+
+
+async def stream_rows(stmt: Select, *, chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[dict[str, Any]]:
+    """Строки `stmt` через серверный курсор.
+
+    Сессия открывается внутри генератора: StreamingResponse дочитывает его
+    уже после выхода из эндпоинта, когда сессия из `Depends(get_db)` закрыта.
+    """
+    async with async_session() as session:
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for row in result.mappings():
+            yield dict(row)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+async def encode_jsonl(rows: AsyncIterable[dict[str, Any]]) -> AsyncIterator[bytes]:
+    buf: list[str] = []
+    async for row in rows:
+        buf.append(json.dumps({k: _plain(v) for k, v in row.items()}, ensure_ascii=False))
+        if len(buf) >= EXPORT_CHUNK_SIZE:
+            yield ("\n".join(buf) + "\n").encode()
+            buf.clear()
+    if buf:
+        yield ("\n".join(buf) + "\n").encode()
+
+
+async def encode_csv(rows: AsyncIterable[dict[str, Any]], fields: Sequence[str]) -> AsyncIterator[bytes]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(fields), extrasaction="ignore")
+    writer.writeheader()
+    n = 0
+    async for row in rows:
+        writer.writerow({k: _plain(v) for k, v in row.items()})
+        n += 1
+        if n % EXPORT_CHUNK_SIZE == 0:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue().encode()
+
+
+def encode(fmt: str, rows: AsyncIterable[dict[str, Any]], fields: Iterable[str]) -> AsyncIterator[bytes]:
+    if fmt == "csv":
+        return encode_csv(rows, tuple(fields))
+    return encode_jsonl(rows)
+
+
+__all__ = [
+    "BulkFormatError",
+    "FORMATS",
+    "MEDIA_TYPES",
+    "MESSAGE_FIELDS",
+    "ORDER_FIELDS",
+    "PRODUCT_FIELDS",
+    "encode",
+    "import_products",
+    "iter_records",
+    "messages_query",
+    "orders_query",
+    "products_query",
+    "stream_rows",
+]
@@ -0,0 +1,151 @@
+# backend/services/change_feed.py
+"""
+Журнал изменений чатов (`chat_changes`) — монотонный курсор синхронизации
+вместо `created_at > since`.
+
+    await change_feed.record(db, "message_replied", order_id=7, message_id=msg.id, data={...})
+    await db.commit()
+
+* строка пишется в той же транзакции, что и само изменение; после COMMIT
+  задача `order.push` будит ждущих в `/messages/sync` (`event_bus`);
+* id выдаются под транзакционным advisory-lock: транзакции с изменениями
+  чатов коммитятся строго в порядке id, и читатель с курсором N никогда не
+  «перепрыгнет» ещё не закоммиченную строку N+1 (bigserial сам этого не
+  гарантирует). Lock держится от INSERT строки журнала до конца транзакции,
+  поэтому `record()` — последний шаг перед `commit()` (так вызывают все
+  эндпоинты): владелец заказа и изменения вызывающего уходят в БД до lock-а,
+  сериализуются только INSERT в журнал и сам COMMIT;
+* чтение — `since()`: range scan по `(owner_id, id)` / `(order_id, id)`;
+  `wait()` — то же для long-poll: пусто → соединение в пул, ждём `event_bus`.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Collection, List, Mapping, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.database import release_connection
+from backend.core.events import event_bus
+from backend.core.jobs import job_queue
+from backend.models.chat_change import ChatChange
+from backend.models.order import Order
+
+# ключ pg_advisory_xact_lock журнала ("chat")
+CHANGE_FEED_LOCK = 0x63686174
+
+CHANGE_TYPES = frozenset({
+    "new_message",
+    "message_replied",
+    "message_deleted",
+    "chat_deleted",
+    "messages_read",
+})
+
+# журнал перечитывается по событию из event_bus; этот интервал — только
+# страховка (запись из другого процесса, потерянное событие)
+RECHECK_INTERVAL = 5.0
+
+
+def parse_cursor(raw: str) -> int:
+    """Курсор клиента — десятичный id строки журнала."""
+    if not raw.isdigit():
+        raise ValueError(f"malformed cursor {raw!r}")
+    return int(raw)
+
+
+class ChangeFeed:
+    async def record(
+        self,
+        db: AsyncSession,
+        type: str,
+        *,
+        order_id: int,
+        owner_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        data: Optional[dict[str, Any]] = None,
+    ) -> ChatChange:
+        """Добавить изменение в текущую транзакцию `db` (commit — за вызывающим)."""
+        if type not in CHANGE_TYPES:
+            raise ValueError(f"unknown chat change type {type!r}")
+        if owner_id is None:
+            owner_id = await db.scalar(select(Order.user_id).where(Order.id == order_id))
+        # свои изменения — до lock-а, под ним только id журнала
+        await db.flush()
+        await db.execute(select(func.pg_advisory_xact_lock(CHANGE_FEED_LOCK)))
+        change = ChatChange(
+            order_id=order_id,
+            owner_id=owner_id,
+            message_id=message_id,
+            type=type,
+            data=data or {},
+        )
+        db.add(change)
+        await db.flush()
+        job_queue.stage(
+            db, "order.push",
+            order_id=order_id, update_type=type, owner_id=owner_id,
+            data={"change_id": change.id},
+        )
+        return change
+
+    async def since(
+        self,
+        db: AsyncSession,
+        after: int,
+        *,
+        owner_id: Optional[int] = None,
+        order_ids: Optional[Collection[int]] = None,
+        limit: int = 500,
+    ) -> List[Mapping[str, Any]]:
+        """Изменения с id > after по возрастанию id (не больше `limit`)."""
+        stmt = (
+            select(
+                ChatChange.id,
+                ChatChange.type,
+                ChatChange.order_id,
+                ChatChange.message_id,
+                ChatChange.data,
+            )
+            .where(ChatChange.id > after)
+            .order_by(ChatChange.id)
+            .limit(limit)
+        )
+        if owner_id is not None:
+            stmt = stmt.where(ChatChange.owner_id == owner_id)
+        if order_ids is not None:
+            stmt = stmt.where(ChatChange.order_id.in_(order_ids))
+        return (await db.execute(stmt)).mappings().all()
+
+    async def wait(
+        self,
+        db: AsyncSession,
+        after: int,
+        *,
+        owner_id: Optional[int] = None,
+        order_ids: Optional[Collection[int]] = None,
+        limit: int = 500,
+        timeout: float = 25.0,
+    ) -> List[Mapping[str, Any]]:
+        """Как `since`, но пустой результат ждёт новых записей не дольше `timeout`."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            seen = event_bus.head  # до SELECT — запись между ними не потеряется
+            rows = await self.since(db, after, owner_id=owner_id, order_ids=order_ids, limit=limit)
+            remaining = deadline - loop.time()
+            if rows or remaining <= 0:
+                return rows
+            await release_connection(db)
+            await event_bus.wait(seen, user_id=owner_id, timeout=min(remaining, RECHECK_INTERVAL))
+
+    async def head(self, db: AsyncSession) -> int:
+        """Последний закоммиченный id — курсор для клиента без истории."""
+        return await db.scalar(select(func.coalesce(func.max(ChatChange.id), 0)))
+
+
+change_feed = ChangeFeed()
+
+
+__all__ = ["CHANGE_FEED_LOCK", "CHANGE_TYPES", "RECHECK_INTERVAL", "ChangeFeed", "change_feed", "parse_cursor"]
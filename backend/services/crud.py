@@ -10,15 +10,21 @@ from __future__ import annotations
 """
 
 from datetime import datetime, timezone
-from typing import Any, Dict, Generic, List, Mapping, Optional, Type, TypeVar, Union
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Collection, Dict, Generic, Hashable, Iterable, List,
+    Mapping, Optional, Type, TypeVar, Union,
+)
 from uuid import UUID
 
 from pydantic import BaseModel, HttpUrl
-from sqlalchemy import func, insert, select
+from sqlalchemy import func, insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload, selectinload
 
+from backend.core.database import async_session
+from backend.core.singleflight import read_flight
+
 # ─────────────────────── SQL-Alchemy модели ────────────────────────────
 from backend.models.category import Category
 from backend.models.message import Message
@@ -30,6 +36,7 @@ from backend.models.user import User
 # Pydantic-схема, в которую «разворачиваем» админ-сообщения
 from backend.schemas.admin import AdminMessageWithExtras
 
+T = TypeVar("T")
 ModelT = TypeVar("ModelT")
 CreateSchemaT = TypeVar("CreateSchemaT", bound=BaseModel)
 UpdateSchemaT = TypeVar("UpdateSchemaT", bound=BaseModel | Mapping[str, Any])
@@ -45,6 +52,19 @@ def _normalize(data: dict[str, Any]) -> dict[str, Any]:
     return data
 
 
+async def shared_read(key: Hashable, fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """
+    Одинаковые одновременные чтения (`key` — «маршрут + параметры») —
+    один запрос к БД в собственной сессии, результат общий (single-flight).
+    Только для чтений, результат которых не изменяют.
+    """
+    async def run() -> T:
+        async with async_session() as db:
+            return await fn(db)
+
+    return await read_flight.do(key, run)
+
+
 # ───────────────────────── базовый CRUD ─────────────────────────────────
 class CRUDBase(Generic[ModelT, CreateSchemaT, UpdateSchemaT]):
     def __init__(self, model: Type[ModelT]) -> None:
@@ -60,6 +80,32 @@ class CRUDBase(Generic[ModelT, CreateSchemaT, UpdateSchemaT]):
         res = await db.execute(select(self.model).offset(skip).limit(limit))
         return res.scalars().all()
 
+    async def get_multi_rows(
+        self, db: AsyncSession, *columns: Any, skip: int = 0, limit: int = 100
+    ) -> List[Mapping[str, Any]]:
+        """
+        Как `get_multi`, но только нужные колонки и без ORM-объектов:
+        ни identity map, ни selectin-связей модели. Для списков, которые
+        сразу уходят в `json_response`.
+        """
+        stmt = (
+            select(*columns)
+            .select_from(self.model)
+            .order_by(self.model.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return (await db.execute(stmt)).mappings().all()
+
+    async def get_multi_rows_shared(
+        self, *columns: Any, skip: int = 0, limit: int = 100
+    ) -> List[Mapping[str, Any]]:
+        """`get_multi_rows` через `shared_read`: для публичных списков под нагрузкой."""
+        key = (self.model.__tablename__, "rows", tuple(str(c) for c in columns), skip, limit)
+        return await shared_read(
+            key, lambda db: self.get_multi_rows(db, *columns, skip=skip, limit=limit)
+        )
+
     async def get_all(self, db: AsyncSession) -> List[ModelT]:
         res = await db.execute(select(self.model))
         return res.scalars().all()
@@ -220,14 +266,59 @@ class UserCRUD(CRUDBase[User, BaseModel, BaseModel]):
         return await self.create(db, data)
 
 
+# ─────────────────────── Order-specific CRUD ───────────────────────────
+class OrderCRUD(CRUDBase[Order, BaseModel, BaseModel]):
+    """Списки заказов колонками — под `OrderListItem`."""
+
+    async def user_order_rows(
+        self, db: AsyncSession, user_id: int
+    ) -> List[Mapping[str, Any]]:
+        """
+        Заказы пользователя (новые сверху) + краткий товар с префиксом
+        `product__` — `unflatten` соберёт из него вложенный объект.
+        Без Product.description и без selectin-подгрузок user/product/items.
+        """
+        stmt = (
+            select(
+                Order.id,
+                Order.user_id,
+                Order.product_id,
+                Order.quantity,
+                Order.price,
+                Order.total,
+                Order.status,
+                Order.created_at,
+                Product.id.label("product__id"),
+                Product.title.label("product__title"),
+                Product.image_url.label("product__image_url"),
+                Product.price.label("product__price"),
+            )
+            .join(Product, Product.id == Order.product_id)
+            .where(Order.user_id == user_id)
+            .order_by(Order.created_at.desc(), Order.id.desc())
+        )
+        return (await db.execute(stmt)).mappings().all()
+
+
 # ────────────────────── instantiate CRUD-объектов ──────────────────────
 user_crud       = UserCRUD(User)
 category_crud   = CRUDBase[Category,  BaseModel, BaseModel](Category)
 product_crud    = CRUDBase[Product,   BaseModel, BaseModel](Product)
-order_crud      = CRUDBase[Order,     BaseModel, BaseModel](Order)
+order_crud      = OrderCRUD(Order)
 order_item_crud = CRUDBase[OrderItem, BaseModel, BaseModel](OrderItem)
 message_crud    = CRUDBase[Message,   BaseModel, BaseModel](Message)
 
+# колонки `ProductOut` для списков каталога (см. `get_multi_rows`)
+PRODUCT_OUT_COLUMNS = (
+    Product.id,
+    Product.category_id,
+    Product.title,
+    Product.description,
+    Product.image_url,
+    Product.price,
+    Product.created_at,
+)
+
 # ─────────────────────────── MessageCRUD ────────────────────────────────
 class MessageCRUD:
     """Расширенный CRUD, содержащий всё, что нужно фронту."""
@@ -266,6 +357,114 @@ class MessageCRUD:
                 m.product_title = None  # type: ignore[attr-defined]
         return msgs
 
+    # ---- история чата колонками (для быстрой сериализации) -------------
+    async def history_rows(
+        self,
+        db: AsyncSession,
+        order_id: int,
+        *,
+        after: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+    ) -> List[Mapping[str, Any]]:
+        """
+        Поля `MessageOut` одной выборкой: товар и имя отправителя — JOIN-ами,
+        без ORM-объектов и коррелированных column_property на каждую строку.
+        `after_id` — «хвост» по id: в отличие от `created_at` (одно значение
+        на транзакцию) не теряет и не повторяет сообщения.
+        """
+        stmt = (
+            select(
+                Message.id,
+                Message.user_id,
+                Message.order_id,
+                Message.content,
+                Message.reply,
+                Message.is_read,
+                Message.created_at,
+                Message.replied_at,
+                Product.title.label("product_title"),
+                User.username.label("user_name"),
+            )
+            .join(Order, Order.id == Message.order_id)
+            .outerjoin(Product, Product.id == Order.product_id)
+            .outerjoin(User, User.id == Message.user_id)
+            .where(Message.order_id == order_id)
+            .order_by(Message.created_at, Message.id)
+        )
+        if after is not None:
+            stmt = stmt.where(Message.created_at > after)
+        if after_id is not None:
+            stmt = stmt.where(Message.id > after_id)
+        return (await db.execute(stmt)).mappings().all()
+
+    # ---- списки чатов колонками ----------------------------------------
+    @staticmethod
+    def _chat_rows_stmt(
+        unread, *, user_id: Optional[int] = None, order_ids: Optional[Collection[int]] = None,
+    ):
+        """Последнее сообщение каждого чата (поля `MessageOut`) + unread_count."""
+        last = (
+            select(
+                Message.order_id.label("order_id"),
+                func.max(Message.created_at).label("last_at"),
+            )
+            .group_by(Message.order_id)
+        )
+        if order_ids is not None:
+            last = last.where(Message.order_id.in_(order_ids))
+        last = last.subquery()
+        stmt = (
+            select(
+                Message.id,
+                Message.user_id,
+                Message.order_id,
+                Message.content,
+                Message.reply,
+                Message.is_read,
+                Message.created_at,
+                Message.replied_at,
+                Product.title.label("product_title"),
+                User.username.label("user_name"),
+                func.coalesce(unread.c.unread, 0).label("unread_count"),
+            )
+            .join(
+                last,
+                (Message.order_id == last.c.order_id)
+                & (Message.created_at == last.c.last_at),
+            )
+            .join(Order, Order.id == Message.order_id)
+            .outerjoin(Product, Product.id == Order.product_id)
+            .outerjoin(User, User.id == Message.user_id)
+            .outerjoin(unread, unread.c.order_id == Message.order_id)
+            .order_by(Message.created_at.desc())
+        )
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        return stmt
+
+    async def user_chat_rows(
+        self, db: AsyncSession, user_id: int
+    ) -> List[Mapping[str, Any]]:
+        """
+        Последнее сообщение каждого чата пользователя + счётчик непрочитанных
+        ответов админа — поля `MessageOut` одной выборкой, новые чаты сверху.
+        """
+        unread = self.unread_counts(for_admin=False, user_id=user_id)
+        stmt = self._chat_rows_stmt(unread, user_id=user_id)
+        return (await db.execute(stmt)).mappings().all()
+
+    async def admin_chat_rows(
+        self, db: AsyncSession, *, order_ids: Optional[Collection[int]] = None
+    ) -> List[Mapping[str, Any]]:
+        """
+        Админский список чатов: последнее сообщение каждого заказа + непрочитанные
+        сообщения покупателя. С `order_ids` — только эти чаты (дельта для
+        `/admin/messages/sync`).
+        """
+        unread = self.unread_counts(for_admin=True)
+        stmt = self._chat_rows_stmt(unread, order_ids=order_ids)
+        return (await db.execute(stmt)).mappings().all()
+
     # ---- список чатов пользователя ------------------------------------
     async def get_user_chats(
         self, db: AsyncSession, user_id: int
@@ -338,32 +537,138 @@ class MessageCRUD:
         return result
 
     # ---- админ видит ВСЕ сообщения со связями -------------------------
-    async def get_admin_messages(self, db: AsyncSession) -> List[AdminMessageWithExtras]:
+    @staticmethod
+    def _admin_messages_query(
+        *,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        order_id: Optional[int] = None,
+        is_read: Optional[bool] = None,
+    ):
+        """
+        Колонки вместо ORM-объектов: имя пользователя и товар — обычными JOIN-ами,
+        без joinedload и без коррелированных column_property на каждую строку.
+        Все фильтры — в WHERE.
+        """
         stmt = (
-            select(Message)
-            .options(
-                joinedload(Message.user),
-                joinedload(Message.order).joinedload(Order.product),
+            select(
+                Message.id,
+                Message.order_id,
+                Message.content,
+                Message.reply,
+                Message.is_read,
+                Message.created_at,
+                Message.replied_at,
+                func.coalesce(User.username, "").label("user_name"),
+                func.coalesce(Product.title, "").label("product_title"),
             )
-            .order_by(Message.created_at)
+            .join(User, User.id == Message.user_id)
+            .join(Order, Order.id == Message.order_id)
+            .outerjoin(Product, Product.id == Order.product_id)
+            .order_by(Message.created_at, Message.id)
         )
-        res = await db.execute(stmt)
-        all_msgs: list[Message] = res.scalars().all()
-
-        return [
-            AdminMessageWithExtras(
-                id=m.id,
-                order_id=m.order_id,
-                content=m.content,
-                reply=m.reply,
-                is_read=m.is_read,
-                created_at=m.created_at,
-                replied_at=m.replied_at,
-                user_name=m.user.username,
-                product_title=m.order.product.title if m.order and m.order.product else None,
+        if since is not None:
+            stmt = stmt.where(Message.created_at >= since)
+        if until is not None:
+            stmt = stmt.where(Message.created_at < until)
+        if order_id is not None:
+            stmt = stmt.where(Message.order_id == order_id)
+        if is_read is not None:
+            stmt = stmt.where(Message.is_read.is_(is_read))
+        return stmt
+
+    async def get_admin_messages_page(
+        self,
+        db: AsyncSession,
+        *,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: int = 100,
+        **filters: Any,
+    ) -> tuple[List[AdminMessageWithExtras], Optional[tuple[datetime, int]]]:
+        """
+        Keyset-пагинация по (created_at, id): страница + курсор следующей
+        (None — страниц больше нет). OFFSET не используется, поэтому
+        глубокие страницы стоят столько же, сколько первая.
+        """
+        stmt = self._admin_messages_query(**filters)
+        if after is not None:
+            stmt = stmt.where(tuple_(Message.created_at, Message.id) > tuple_(*after))
+        rows = (await db.execute(stmt.limit(limit + 1))).mappings().all()
+        items = [AdminMessageWithExtras.model_validate(r) for r in rows[:limit]]
+        cursor = (items[-1].created_at, items[-1].id) if len(rows) > limit else None
+        return items, cursor
+
+    async def stream_admin_messages(
+        self,
+        db: AsyncSession,
+        *,
+        chunk_size: int = 1_000,
+        **filters: Any,
+    ) -> AsyncIterator[AdminMessageWithExtras]:
+        """Все подходящие сообщения через серверный курсор — память не растёт с историей."""
+        stmt = self._admin_messages_query(**filters).execution_options(yield_per=chunk_size)
+        result = await db.stream(stmt)
+        async for row in result.mappings():
+            yield AdminMessageWithExtras.model_validate(row)
+
+    async def get_admin_messages(self, db: AsyncSession, **filters: Any) -> List[AdminMessageWithExtras]:
+        return [m async for m in self.stream_admin_messages(db, **filters)]
+
+
+    # ---- прочитано / непрочитано ----------------------------------------
+    # Отправитель определяется по заказу: user_id сообщения == orders.user_id —
+    # писал покупатель (читает админ), иначе писал админ (читает покупатель).
+    async def mark_read(
+        self,
+        db: AsyncSession,
+        chats: Iterable[tuple[int, int]],
+        *,
+        by_admin: bool,
+        commit: bool = True,
+    ) -> Dict[int, int]:
+        """
+        (order_id, up_to_id) → один UPDATE на чат: все входящие для читателя
+        сообщения с id ≤ up_to_id помечаются прочитанными. Commit — один на вызов
+        (`commit=False` — за вызывающим, например вместе с записью в журнал).
+        Возвращает {order_id: сколько строк помечено}.
+        """
+        marked: Dict[int, int] = {}
+        for order_id, up_to_id in chats:
+            owner = select(Order.user_id).where(Order.id == order_id).scalar_subquery()
+            incoming = Message.user_id == owner if by_admin else Message.user_id != owner
+            res = await db.execute(
+                update(Message)
+                .where(
+                    Message.order_id == order_id,
+                    Message.id <= up_to_id,
+                    ~Message.is_read,
+                    incoming,
+                )
+                .values(is_read=True)
+                .execution_options(synchronize_session=False)
             )
-            for m in all_msgs
-        ]
+            marked[order_id] = marked.get(order_id, 0) + res.rowcount
+        if commit:
+            await db.commit()
+        return marked
+
+    @staticmethod
+    def unread_counts(*, for_admin: bool, user_id: Optional[int] = None):
+        """
+        Subquery (order_id, unread): сколько непрочитанных входящих в каждом чате.
+        Условие `NOT is_read` дословно совпадает с предикатом ix_messages_unread_order,
+        так что читаются только непрочитанные строки.
+        """
+        incoming = Message.user_id == Order.user_id if for_admin else Message.user_id != Order.user_id
+        stmt = (
+            select(Message.order_id.label("order_id"), func.count().label("unread"))
+            .join(Order, Order.id == Message.order_id)
+            .where(~Message.is_read, incoming)
+            .group_by(Message.order_id)
+        )
+        if user_id is not None:
+            stmt = stmt.where(Order.user_id == user_id)
+        return stmt.subquery("unread")
 
 
 # инстанс расширенного CRUD
@@ -384,8 +689,13 @@ async def calculate_total_revenue(db: AsyncSession) -> float:
     return float(val or 0.0)
 
 async def count_unread_messages(db: AsyncSession) -> int:
-    column = Message.is_read if hasattr(Message, "is_read") else Message.replied_at
-    stmt = select(func.count()).select_from(Message).where(column.is_(False))
+    """Непрочитанные админом сообщения покупателей."""
+    stmt = (
+        select(func.count())
+        .select_from(Message)
+        .join(Order, Order.id == Message.order_id)
+        .where(~Message.is_read, Message.user_id == Order.user_id)
+    )
     return await _scalar(db, stmt)
 
 
@@ -398,5 +708,9 @@ class CRUDAdmin:
             "unread_messages": await count_unread_messages(db),
         }
 
+    async def get_admin_stats_shared(self) -> Dict[str, Any]:
+        """Метрики дашборда: несколько админов одновременно — один набор запросов."""
+        return await shared_read(("admin", "stats"), self.get_admin_stats)
+
 
 admin_crud = CRUDAdmin()
@@ -0,0 +1,210 @@
+# backend/services/telegram_notifier.py
+"""
+Уведомления в Telegram для тех, у кого не открыт WebSocket.
+
+* Коалесинг: ответы одному пользователю копятся `coalesce_window` секунд
+  и уходят одним сообщением («Новые ответы администратора в чате «…»: 3»).
+* Лимиты Bot API: общий token bucket (`global_rate` сообщений/с, у Telegram
+  ~30/с на бота) и bucket на чат (одно сообщение в `per_chat_interval` с).
+* 429 (`TelegramRetryAfter`) — общий bucket встаёт на `retry_after`,
+  сообщение повторяется; сетевые/5xx — повтор с экспоненциальной задержкой.
+* Пользователь заблокировал бота / не запускал его — молча пропускаем.
+
+Бот создаётся лениво из `TELEGRAM_BOT_TOKEN`; в тестах передаётся заглушка
+с `async send_message(chat_id, text, **kwargs)`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from backend.core.metrics import TELEGRAM_NOTIFICATIONS
+from backend.core.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ChatReplies:
+    title: Optional[str]
+    count: int = 0
+
+
+class TelegramNotifier:
+    def __init__(
+        self,
+        bot: Any = None,
+        *,
+        global_rate: float = 25.0,
+        per_chat_interval: float = 1.0,
+        coalesce_window: float = 3.0,
+        max_attempts: int = 4,
+        webapp_url: Optional[str] = None,
+    ) -> None:
+        self._bot = bot
+        self.global_rate = global_rate
+        self.per_chat_interval = per_chat_interval
+        self.coalesce_window = coalesce_window
+        self.max_attempts = max_attempts
+        self.webapp_url = webapp_url
+
+        self._global: Optional[TokenBucket] = None
+        self._chats: dict[int, TokenBucket] = {}
+        # chat_id → order_id → накопленные ответы
+        self._pending: dict[int, dict[int, _ChatReplies]] = {}
+        self._flushers: dict[int, asyncio.Task] = {}
+        self._closing: Optional[asyncio.Event] = None
+
+    def configure(self, **options: Any) -> None:
+        for key, value in options.items():
+            if not hasattr(self, key) or key.startswith("_"):
+                raise AttributeError(f"unknown notifier option {key!r}")
+            setattr(self, key, value)
+        self._global = None
+
+    @property
+    def bot(self):
+        if self._bot is None:
+            from aiogram import Bot
+
+            from backend.core.config import settings
+            from backend.utils.telegram_metrics import TelegramMetricsMiddleware
+
+            self._bot = Bot(token=settings.TELEGRAM_BOT_TOKEN)
+            self._bot.session.middleware(TelegramMetricsMiddleware("notifier"))
+        return self._bot
+
+    # ─────────────────────────── постановка ────────────────────────────
+    def notify_reply(self, chat_id: int, *, order_id: int, product_title: Optional[str] = None) -> None:
+        """Учесть ответ админа; само сообщение уйдёт после окна коалесинга."""
+        chats = self._pending.setdefault(chat_id, {})
+        replies = chats.setdefault(order_id, _ChatReplies(product_title))
+        replies.count += 1
+        if chat_id in self._flushers:
+            TELEGRAM_NOTIFICATIONS.inc(outcome="coalesced")
+            return
+        if self._closing is None:
+            self._closing = asyncio.Event()
+        self._flushers[chat_id] = asyncio.get_running_loop().create_task(
+            self._flush(chat_id), name=f"tg-notify-{chat_id}",
+        )
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Отправить накопленное без ожидания окна и закрыть сессию бота."""
+        if self._closing is not None:
+            self._closing.set()
+        # флашер, завершаясь, может поставить следующий (ответы, пришедшие во
+        # время отправки), — ждём, пока не останется ни одного
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._flushers:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self._closing = None  # отменённые не должны ставить новые
+                pending = list(self._flushers.values())
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+            await asyncio.wait(list(self._flushers.values()), timeout=remaining)
+        self._closing = None
+        if self._bot is not None and hasattr(self._bot, "session"):
+            await self._bot.session.close()
+
+    # ─────────────────────────── отправка ──────────────────────────────
+    async def _flush(self, chat_id: int) -> None:
+        try:
+            try:
+                await asyncio.wait_for(self._closing.wait(), self.coalesce_window)  # type: ignore[union-attr]
+            except asyncio.TimeoutError:
+                pass
+            chats = self._pending.pop(chat_id, {})
+            if chats:
+                text, order_id = self._render(chats)
+                await self._send(chat_id, text, order_id)
+        except Exception:  # noqa: BLE001 — уведомление не должно ронять процесс
+            TELEGRAM_NOTIFICATIONS.inc(outcome="failed")
+            logger.exception("telegram notify to %s failed", chat_id)
+        finally:
+            self._flushers.pop(chat_id, None)
+            bucket = self._chats.get(chat_id)
+            if bucket is not None and bucket.idle:
+                del self._chats[chat_id]
+            # пока отправляли, пришли новые ответы — следующее окно
+            if chat_id in self._pending and self._closing is not None:
+                self._flushers[chat_id] = asyncio.get_running_loop().create_task(self._flush(chat_id))
+
+    @staticmethod
+    def _render(chats: dict[int, _ChatReplies]) -> tuple[str, Optional[int]]:
+        total = sum(r.count for r in chats.values())
+        if len(chats) == 1:
+            order_id, replies = next(iter(chats.items()))
+            title = f"«{replies.title}»" if replies.title else f"по заказу #{order_id}"
+            if total == 1:
+                return f"💬 Администратор ответил в чате {title}.", order_id
+            return f"💬 Новые ответы администратора в чате {title}: {total}.", order_id
+        return f"💬 Новые ответы администратора: {total} (чатов: {len(chats)}).", None
+
+    def _markup(self, order_id: Optional[int]):
+        if not self.webapp_url:
+            return None
+        from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
+
+        base = self.webapp_url.rstrip("/")
+        url = f"{base}/messages/{order_id}" if order_id else f"{base}/messages"
+        return InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(text="Открыть чат", web_app=WebAppInfo(url=url)),
+        ]])
+
+    async def _send(self, chat_id: int, text: str, order_id: Optional[int]) -> None:
+        # aiogram тяжёлый на импорт — тянем при первой отправке, не при старте API
+        from aiogram.exceptions import (
+            TelegramBadRequest,
+            TelegramForbiddenError,
+            TelegramNetworkError,
+            TelegramRetryAfter,
+            TelegramServerError,
+        )
+
+        if self._global is None:
+            self._global = TokenBucket(self.global_rate, self.global_rate)
+        chat_bucket = self._chats.get(chat_id)
+        if chat_bucket is None:
+            chat_bucket = self._chats[chat_id] = TokenBucket(1 / self.per_chat_interval, 1)
+        markup = self._markup(order_id)
+
+        for attempt in range(1, self.max_attempts + 1):
+            await chat_bucket.acquire()
+            await self._global.acquire()
+            try:
+                await self.bot.send_message(chat_id, text, reply_markup=markup)
+            except TelegramRetryAfter as exc:
+                TELEGRAM_NOTIFICATIONS.inc(outcome="retry_after")
+                logger.warning("telegram flood control: retry after %ss", exc.retry_after)
+                self._global.pause(exc.retry_after)
+                continue
+            except (TelegramForbiddenError, TelegramBadRequest) as exc:
+                # заблокировал бота / чат не найден — повтор не поможет
+                TELEGRAM_NOTIFICATIONS.inc(outcome="blocked")
+                logger.info("telegram notify to %s skipped: %s", chat_id, exc.message)
+                return
+            except (TelegramNetworkError, TelegramServerError) as exc:
+                if attempt == self.max_attempts:
+                    raise
+                delay = min(30.0, 0.5 * 2 ** (attempt - 1))
+                logger.warning("telegram notify to %s: %r, retry in %.1fs", chat_id, exc, delay)
+                await asyncio.sleep(delay)
+                continue
+            TELEGRAM_NOTIFICATIONS.inc(outcome="sent")
+            return
+        TELEGRAM_NOTIFICATIONS.inc(outcome="failed")
+        logger.error("telegram notify to %s: gave up after %d attempts", chat_id, self.max_attempts)
+
+
+# общий нотификатор процесса (настраивается на старте backend.main)
+telegram_notifier = TelegramNotifier()
+
+
+__all__ = ["TelegramNotifier", "telegram_notifier"]
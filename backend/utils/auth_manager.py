@@ -19,10 +19,15 @@ Key design decisions
 """
 
 import dataclasses
+import hashlib
+import hmac
+import json
 import logging
 import os
+import time
 from datetime import timedelta
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlencode
 
 from telegram_webapp_auth.auth import TelegramAuthenticator, generate_secret_key
 from telegram_webapp_auth.errors import ExpiredInitDataError, InvalidInitDataError
@@ -124,8 +129,42 @@ def parse_and_validate_init_data(init_data_raw: str, *, bot_token: Optional[str]
     return dataclasses.asdict(auth.validate(init_data_raw))
 
 
+# -------------------------------------------------------------------------
+# Signing helper (нагрузочные тесты, интеграционные тесты, отладка).
+# -------------------------------------------------------------------------
+
+def build_init_data(
+    user: Mapping[str, Any],
+    *,
+    bot_token: Optional[str] = None,
+    auth_date: Optional[int] = None,
+    **extra: Any,
+) -> str:
+    """Собрать подписанную строку *initData* — как её отдаёт Telegram WebApp.
+
+    Та же схема, что проверяет :class:`TelegramAuthManager`: data-check-string
+    из отсортированных `key=value`, ключ — HMAC("WebAppData", bot_token).
+    Результат кладётся в заголовок `X-Telegram-Init-Data`.
+    """
+    token = bot_token or os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise RuntimeError("bot_token required for build_init_data")
+
+    fields: Dict[str, str] = {
+        "auth_date": str(auth_date if auth_date is not None else int(time.time())),
+        "user": json.dumps(dict(user), ensure_ascii=False, separators=(",", ":")),
+        **{k: str(v) for k, v in extra.items()},
+    }
+    data_check = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    fields["hash"] = hmac.new(
+        generate_secret_key(token), data_check.encode(), hashlib.sha256,
+    ).hexdigest()
+    return urlencode(fields)
+
+
 __all__ = [
     "TelegramAuthManager",
+    "build_init_data",
     "get_telegram_auth_manager",
     "parse_and_validate_init_data",
 ]
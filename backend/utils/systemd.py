@@ -0,0 +1,31 @@
+"""Протокол sd_notify(3) без libsystemd.
+
+Под `Type=notify` systemd передаёт в `NOTIFY_SOCKET` путь датаграммного
+unix-сокета; процесс пишет туда `READY=1`, когда действительно готов
+принимать запросы, и `STOPPING=1` в начале остановки. Вне systemd
+переменной нет — функция просто возвращает False.
+"""
+from __future__ import annotations
+
+import os
+import socket
+
+
+def sd_notify(state: str) -> bool:
+    """Отправить `state` (например, "READY=1") менеджеру сервисов."""
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address[0] == "@":
+        # абстрактный namespace Linux
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as sock:
+            sock.connect(address)
+            sock.sendall(state.encode())
+    except OSError:
+        return False
+    return True
+
+
+__all__ = ["sd_notify"]
@@ -0,0 +1,51 @@
+"""aiogram request-middleware, пишущий латентность Bot API в `/metrics`.
+
+Подключается к сессии бота::
+
+    bot.session.middleware(TelegramMetricsMiddleware("backend"))
+
+`source` отличает вызовы из платёжных эндпоинтов бэкенда от вызовов бота.
+"""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+
+from backend.core.metrics import TELEGRAM_API_DURATION
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.client.session.middlewares.base import NextRequestMiddlewareType
+    from aiogram.methods import TelegramMethod
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    __slots__ = ("source",)
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+
+    async def __call__(
+        self,
+        make_request: "NextRequestMiddlewareType[Any]",
+        bot: "Bot",
+        method: "TelegramMethod[Any]",
+    ):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await make_request(bot, method)
+            outcome = "ok"
+            return response
+        finally:
+            TELEGRAM_API_DURATION.observe(
+                time.perf_counter() - started,
+                source=self.source,
+                method=getattr(method, "__api_method__", type(method).__name__),
+                outcome=outcome,
+            )
+
+
+__all__ = ["TelegramMetricsMiddleware"]
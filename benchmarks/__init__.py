@@ -0,0 +1,15 @@
+"""
+Нагрузочный стенд: каталог, чаты (история, отправка, long-poll) и оплата.
+
+    # 1. данные в ЛОКАЛЬНЫЙ Postgres (DATABASE_URL), манифест → benchmarks/results/seed.json
+    python -m benchmarks.seed --users 200 --orders-per-user 3 --messages-per-order 40
+
+    # 2. поднять бэкенд (python run.py / uvicorn backend.main:app) и прогнать сценарии
+    python -m benchmarks.run --base-url http://127.0.0.1:8000 --duration 60 --concurrency 50
+
+    # 3. сравнить с прогоном на другом коммите
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+
+initData подписывается тем же `TELEGRAM_BOT_TOKEN`, что и у бэкенда
+(`backend.utils.auth_manager.build_init_data`).
+"""
@@ -0,0 +1,44 @@
+"""
+Сравнение двух прогонов `benchmarks.run`.
+
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json --fail-over 15
+
+Код выхода 1, если p95 какого-либо сценария вырос больше чем на `--fail-over` %.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.stats import compare
+
+KEYS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--fail-over", type=float, default=None, help="порог регрессии p95, %%")
+    args = parser.parse_args(argv)
+
+    old, new = (json.loads(p.read_text()) for p in (args.old, args.new))
+    print(f"{old.get('commit', '?')} → {new.get('commit', '?')}")
+    print(f"{'scenario':<16}{'metric':<8}{'old':>10}{'new':>10}{'Δ%':>8}")
+
+    regressions = []
+    for name, key, a, b, delta in compare(old["scenarios"], new["scenarios"], KEYS):
+        print(f"{name:<16}{key:<8}{a:>10}{b:>10}{delta:>+8.1f}")
+        if key == "p95_ms" and args.fail_over is not None and delta > args.fail_over:
+            regressions.append(name)
+
+    if regressions:
+        print(f"\np95 regression > {args.fail_over}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
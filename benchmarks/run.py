@@ -0,0 +1,251 @@
+"""
+Прогон сценариев против запущенного бэкенда.
+
+Виртуальные пользователи (`--concurrency`) в цикле выбирают сценарий по
+весам и пишут латентность каждого запроса. Long-poll меряется отдельно:
+`--pollers` клиентов паркуются на `/messages/{id}/poll`, после чего в тот же
+чат отправляется сообщение; в `longpoll_wake` попадает время от начала POST
+до ответа поллера.
+
+    python -m benchmarks.run --duration 60 --concurrency 50 --pollers 20
+
+Бэкенд для прогона запускается с `RATE_LIMIT_ENABLED=false`: иначе
+виртуальные пользователи упираются в лимиты и меряются ответы 429
+(см. benchmarks/README.md). Если 429 всё же пришли, это видно в итоге.
+
+Итог печатается таблицей и сохраняется в `benchmarks/results/<utc>-<commit>.json`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from backend.utils.auth_manager import build_init_data
+from benchmarks.seed import DEFAULT_MANIFEST
+from benchmarks.stats import Recorder
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# сценарий → вес в смеси
+DEFAULT_MIX: dict[str, int] = {
+    "catalog": 30,
+    "chat_list": 15,
+    "chat_history": 25,
+    "chat_send": 10,
+    "payment_status": 15,
+    "payment_webhook": 5,
+}
+
+
+class VirtualUser:
+    def __init__(self, telegram_id: int, orders: list[int], bot_token: str) -> None:
+        self.orders = orders
+        self.headers = {
+            "X-Telegram-Init-Data": build_init_data(
+                {"id": telegram_id, "first_name": "Bench", "username": f"bench_{telegram_id}"},
+                bot_token=bot_token,
+            ),
+        }
+
+
+class Bench:
+    def __init__(self, client: httpx.AsyncClient, manifest: dict, bot_token: str, rng: random.Random) -> None:
+        self.client = client
+        self.rng = rng
+        self.recorder = Recorder()
+        self.users = [
+            VirtualUser(u["telegram_id"], u["orders"], bot_token)
+            for u in manifest["users"] if u["orders"]
+        ]
+        self.pending_orders = list(manifest["pending_orders"])
+        self.rng.shuffle(self.pending_orders)
+        self.rate_limited = 0
+
+    async def _request(self, scenario: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(scenario, time.perf_counter() - started, None)
+            return None
+        self.recorder.add(scenario, time.perf_counter() - started, resp.status_code)
+        if resp.status_code == 429:
+            self.rate_limited += 1
+        return resp
+
+    # ─────────────────────────── сценарии ───────────────────────────
+    async def catalog(self, user: VirtualUser) -> None:
+        await self._request("catalog", "GET", "/api/products", headers=user.headers)
+
+    async def chat_list(self, user: VirtualUser) -> None:
+        await self._request("chat_list", "GET", "/api/messages/", headers=user.headers)
+
+    async def chat_history(self, user: VirtualUser) -> None:
+        order_id = self.rng.choice(user.orders)
+        await self._request("chat_history", "GET", f"/api/messages/{order_id}", headers=user.headers)
+
+    async def chat_send(self, user: VirtualUser) -> None:
+        order_id = self.rng.choice(user.orders)
+        await self._request(
+            "chat_send", "POST", f"/api/messages/{order_id}",
+            headers=user.headers, json={"content": "bench: новое сообщение"},
+        )
+
+    async def payment_status(self, user: VirtualUser) -> None:
+        order_id = self.rng.choice(user.orders)
+        await self._request("payment_status", "GET", f"/api/payments/{order_id}/status", headers=user.headers)
+
+    async def payment_webhook(self, user: VirtualUser) -> None:
+        # pending-заказы расходуются; дальше вебхук идёт по ветке «уже оплачен»
+        order_id = self.pending_orders.pop() if self.pending_orders else self.rng.choice(user.orders)
+        update = {"message": {"successful_payment": {
+            "currency": "XTR", "total_amount": 1,
+            "invoice_payload": json.dumps({"order_id": order_id}),
+        }}}
+        await self._request("payment_webhook", "POST", "/api/payments/webhook", json=update)
+
+    async def longpoll_wake(self, user: VirtualUser) -> None:
+        order_id = self.rng.choice(user.orders)
+        history = await self._request("longpoll_setup", "GET", f"/api/messages/{order_id}", headers=user.headers)
+        if history is None or history.status_code != 200 or not history.json():
+            return
+        after = history.json()[-1]["created_at"]
+        poll = asyncio.create_task(self.client.get(
+            f"/api/messages/{order_id}/poll", params={"after": after},
+            headers=user.headers, timeout=60,
+        ))
+        await asyncio.sleep(self.rng.uniform(0.5, 2.0))  # поллер успевает запарковаться
+        sent_at = time.perf_counter()
+        sent = await self._request(
+            "longpoll_send", "POST", f"/api/messages/{order_id}",
+            headers=user.headers, json={"content": "bench: wake"},
+        )
+        try:
+            resp = await poll
+        except httpx.HTTPError:
+            self.recorder.add("longpoll_wake", time.perf_counter() - sent_at, None)
+            return
+        if sent is not None:
+            self.recorder.add("longpoll_wake", time.perf_counter() - sent_at, resp.status_code)
+
+    # ─────────────────────────── нагрузка ───────────────────────────
+    async def _worker(self, deadline: float, mix: dict[str, int]) -> None:
+        names, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(names, weights)[0]
+            await getattr(self, scenario)(self.rng.choice(self.users))
+
+    async def _poller(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self.longpoll_wake(self.rng.choice(self.users))
+
+    async def run(self, *, duration: float, concurrency: int, pollers: int, mix: dict[str, int]) -> float:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *(self._worker(deadline, mix) for _ in range(concurrency)),
+            *(self._poller(deadline) for _ in range(pollers)),
+        )
+        return time.perf_counter() - started
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _parse_mix(raw: str | None) -> dict[str, int]:
+    if not raw:
+        return DEFAULT_MIX
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"unknown scenario {name!r}; known: {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def _print_table(summary: dict[str, dict]) -> None:
+    header = f"{'scenario':<16}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("─" * len(header))
+    for name, s in summary.items():
+        print(
+            f"{name:<16}{s['requests']:>8}{s['errors']:>6}{s['rps']:>9}"
+            f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}{s['max_ms']:>9}"
+        )
+
+
+async def _main(args: argparse.Namespace) -> dict:
+    manifest = json.loads(args.manifest.read_text())
+    limits = httpx.Limits(max_connections=args.concurrency + args.pollers * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30, verify=False) as client:
+        bench = Bench(client, manifest, args.bot_token, random.Random(args.seed))
+        if not bench.users:
+            raise SystemExit("manifest has no users with orders — run benchmarks.seed first")
+        mix = _parse_mix(args.mix)
+        elapsed = await bench.run(
+            duration=args.duration, concurrency=args.concurrency, pollers=args.pollers, mix=mix,
+        )
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "python": platform.python_version(),
+        "params": {
+            "duration": args.duration, "concurrency": args.concurrency,
+            "pollers": args.pollers, "mix": mix, "seed": args.seed,
+            "users": len(manifest["users"]), "seeded_messages": manifest.get("messages"),
+        },
+        "elapsed_s": round(elapsed, 2),
+        "rate_limited": bench.rate_limited,
+        "scenarios": bench.recorder.summary(elapsed),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=60.0, help="секунд")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pollers", type=int, default=20, help="параллельных long-poll клиентов")
+    parser.add_argument("--mix", help="например catalog=5,chat_history=3 (по умолчанию — DEFAULT_MIX)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST)
+    parser.add_argument("--bot-token", default=os.getenv("TELEGRAM_BOT_TOKEN"))
+    parser.add_argument("--output", type=Path, help="путь к JSON (по умолчанию benchmarks/results/)")
+    args = parser.parse_args(argv)
+    if not args.bot_token:
+        parser.error("TELEGRAM_BOT_TOKEN (или --bot-token) нужен для подписи initData")
+
+    result = asyncio.run(_main(args))
+    _print_table(result["scenarios"])
+    if result["rate_limited"]:
+        print(f"\n⚠️  {result['rate_limited']} ответов 429: бэкенд запущен с лимитами "
+              "(RATE_LIMIT_ENABLED=false для прогона), цифры не сравнимы")
+
+    output = args.output or RESULTS_DIR / (
+        f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{result['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"\nresults → {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Наполнение локальной БД объёмами, близкими к боевым.
+
+Все записи стенда помечены: пользователи — `telegram_id >= BENCH_TELEGRAM_ID_BASE`,
+товары — в категории `BENCH_CATEGORY`. `--reset` удаляет только их
+(остальное каскадом по FK), поэтому сидить можно поверх dev-данных.
+
+    python -m benchmarks.seed --users 200 --orders-per-user 3 --messages-per-order 40
+
+Манифест (id заказов по пользователям, pending-заказы для вебхука) пишется в
+`benchmarks/results/seed.json` и читается `benchmarks.run`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import make_url
+
+from backend.core.config import settings
+from backend.core.database import engine
+from backend.models.category import Category
+from backend.models.message import Message
+from backend.models.order import Order
+from backend.models.product import Product
+from backend.models.user import User
+
+BENCH_TELEGRAM_ID_BASE = 9_000_000_000
+BENCH_ADMIN_TELEGRAM_ID = BENCH_TELEGRAM_ID_BASE - 1
+BENCH_CATEGORY = "benchmark"
+DEFAULT_MANIFEST = Path(__file__).parent / "results" / "seed.json"
+
+_LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", None}
+_BATCH = 5_000
+
+
+def _chunks(rows: list[dict], size: int = _BATCH):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+async def _insert_returning(conn, model, rows: list[dict]) -> list[int]:
+    ids: list[int] = []
+    for chunk in _chunks(rows):
+        result = await conn.execute(insert(model).returning(model.id), chunk)
+        ids.extend(result.scalars().all())
+    return ids
+
+
+async def reset(conn) -> None:
+    await conn.execute(delete(User).where(User.telegram_id >= BENCH_ADMIN_TELEGRAM_ID))
+    await conn.execute(delete(Category).where(Category.name == BENCH_CATEGORY))
+
+
+async def seed(
+    *,
+    users: int,
+    orders_per_user: int,
+    messages_per_order: int,
+    products: int,
+    pending_ratio: float,
+    rng: random.Random,
+) -> dict:
+    now = datetime.now(timezone.utc)
+    async with engine.begin() as conn:
+        await reset(conn)
+
+        [category_id] = await _insert_returning(conn, Category, [{"name": BENCH_CATEGORY}])
+        product_ids = await _insert_returning(conn, Product, [
+            {
+                "category_id": category_id,
+                "title": f"Bench product {i}",
+                "price": float(rng.randint(50, 500)),
+                "description": "Описание услуги для нагрузочного стенда. " * 4,
+            }
+            for i in range(products)
+        ])
+
+        [admin_id] = await _insert_returning(conn, User, [{
+            "telegram_id": BENCH_ADMIN_TELEGRAM_ID, "username": "bench_admin", "is_admin": True,
+        }])
+        telegram_ids = [BENCH_TELEGRAM_ID_BASE + i for i in range(users)]
+        user_ids = await _insert_returning(conn, User, [
+            {"telegram_id": tg, "username": f"bench_{tg - BENCH_TELEGRAM_ID_BASE}"}
+            for tg in telegram_ids
+        ])
+
+        order_rows, owners = [], []
+        for uid in user_ids:
+            for _ in range(orders_per_user):
+                price = rng.randint(50, 500)
+                order_rows.append({
+                    "user_id": uid,
+                    "product_id": rng.choice(product_ids),
+                    "quantity": 1,
+                    "price": price,
+                    "total": price,
+                    "status": "pending" if rng.random() < pending_ratio else "paid",
+                })
+                owners.append(uid)
+        order_ids = await _insert_returning(conn, Order, order_rows)
+
+        message_rows = []
+        for order_id, owner in zip(order_ids, owners):
+            started = now - timedelta(days=rng.randint(1, 60))
+            for n in range(messages_per_order):
+                from_user = n % 2 == 0
+                message_rows.append({
+                    "order_id": order_id,
+                    "user_id": owner if from_user else admin_id,
+                    "content": f"bench message #{n} " + "lorem ipsum " * rng.randint(1, 20),
+                    "is_read": not from_user or n < messages_per_order - 2,
+                    "created_at": started + timedelta(minutes=n * 7),
+                })
+        for chunk in _chunks(message_rows):
+            await conn.execute(insert(Message), chunk)
+
+        pending = (await conn.execute(
+            select(Order.id).where(Order.id.in_(order_ids), Order.status == "pending")
+        )).scalars().all()
+
+    by_user: dict[int, list[int]] = {}
+    for order_id, owner in zip(order_ids, owners):
+        by_user.setdefault(owner, []).append(order_id)
+    return {
+        "seeded_at": now.isoformat(),
+        "products": len(product_ids),
+        "messages": len(message_rows),
+        "users": [
+            {"telegram_id": tg, "orders": by_user.get(uid, [])}
+            for tg, uid in zip(telegram_ids, user_ids)
+        ],
+        "pending_orders": list(pending),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--orders-per-user", type=int, default=3)
+    parser.add_argument("--messages-per-order", type=int, default=40)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--pending-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42, help="seed для random — данные воспроизводимы")
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST)
+    parser.add_argument("--allow-remote", action="store_true", help="разрешить DATABASE_URL не на localhost")
+    args = parser.parse_args(argv)
+
+    url = make_url(settings.DATABASE_URL)
+    if url.host not in _LOCAL_HOSTS and not args.allow_remote:
+        sys.exit(f"refusing to seed non-local database {url.host!r}; pass --allow-remote to override")
+
+    engine.echo = False
+    started = time.perf_counter()
+    manifest = asyncio.run(seed(
+        users=args.users,
+        orders_per_user=args.orders_per_user,
+        messages_per_order=args.messages_per_order,
+        products=args.products,
+        pending_ratio=args.pending_ratio,
+        rng=random.Random(args.seed),
+    ))
+    args.manifest.parent.mkdir(parents=True, exist_ok=True)
+    args.manifest.write_text(json.dumps(manifest, indent=2))
+    print(
+        f"seeded {len(manifest['users'])} users, "
+        f"{sum(len(u['orders']) for u in manifest['users'])} orders, "
+        f"{manifest['messages']} messages in {time.perf_counter() - started:.1f}s → {args.manifest}"
+    )
+
+
+if __name__ == "__main__":
+    main()
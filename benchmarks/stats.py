@@ -0,0 +1,68 @@
+"""Сбор латентностей и сводка (throughput, p50/p95/p99) для результатов прогона."""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль по методу nearest-rank; `sorted_values` уже отсортирован."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class ScenarioStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+    def add(self, elapsed: float, status: int | None) -> None:
+        if status is None or status >= 400:
+            self.errors += 1
+        else:
+            self.latencies.append(elapsed)
+        self.statuses[status or 0] += 1
+
+    def summary(self, duration: float) -> dict:
+        values = sorted(self.latencies)
+        ms = lambda v: round(v * 1000, 2)  # noqa: E731
+        return {
+            "requests": len(values) + self.errors,
+            "errors": self.errors,
+            "rps": round(len(values) / duration, 2) if duration else 0.0,
+            "p50_ms": ms(percentile(values, 50)),
+            "p95_ms": ms(percentile(values, 95)),
+            "p99_ms": ms(percentile(values, 99)),
+            "max_ms": ms(values[-1]) if values else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+        }
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.scenarios: dict[str, ScenarioStats] = defaultdict(ScenarioStats)
+
+    def add(self, scenario: str, elapsed: float, status: int | None) -> None:
+        self.scenarios[scenario].add(elapsed, status)
+
+    def summary(self, duration: float) -> dict[str, dict]:
+        return {name: s.summary(duration) for name, s in sorted(self.scenarios.items())}
+
+
+def compare(old: dict[str, dict], new: dict[str, dict], keys: Iterable[str]) -> list[tuple[str, str, float, float, float]]:
+    """[(scenario, key, old, new, delta%)] для сценариев, присутствующих в обоих прогонах."""
+    rows = []
+    for name in sorted(set(old) & set(new)):
+        for key in keys:
+            a, b = old[name].get(key, 0.0), new[name].get(key, 0.0)
+            delta = (b - a) / a * 100 if a else 0.0
+            rows.append((name, key, a, b, round(delta, 1)))
+    return rows
+
+
+__all__ = ["Recorder", "ScenarioStats", "compare", "percentile"]
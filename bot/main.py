@@ -18,19 +18,26 @@ from urllib.parse import urlencode, quote, unquote_plus
 import httpx
 from aiogram import Bot, Dispatcher, F, types
 from aiogram.client.default import DefaultBotProperties
-from aiogram.types import FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
 from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError
 from dotenv import load_dotenv
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("bot.log", encoding="utf-8")
-    ],
-)
+# Настройка логирования: очередь + фоновый поток, bot.log с ротацией.
+# Под run.py логирование уже настроено им — вызов ничего не меняет.
+_LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+try:
+    from backend.core.log_setup import setup_logging
+except ImportError:  # бот запущен без backend рядом
+    logging.basicConfig(
+        level=logging.INFO,
+        format=_LOG_FORMAT,
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler("bot.log", encoding="utf-8")
+        ],
+    )
+else:
+    setup_logging(level=logging.INFO, fmt=_LOG_FORMAT, stream=sys.stdout, log_file="bot.log")
 log = logging.getLogger(__name__)
 
 # --- 1. ЗАГРУЗКА ПЕРЕМЕННЫХ ОКРУЖЕНИЯ И ИХ ЛОГИРОВАНИЕ ---
@@ -56,6 +63,19 @@ log.info("--- [БОТ] Все переменные окружения успеш
 bot = Bot(TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
 dp = Dispatcher()
 
+# Латентность Bot API → /metrics бэкенда (если бот запущен вместе с ним через run.py)
+try:
+    from backend.utils.telegram_metrics import TelegramMetricsMiddleware
+except ImportError:
+    log.debug("[БОТ] backend недоступен — метрики Bot API не собираются")
+else:
+    bot.session.middleware(TelegramMetricsMiddleware("bot"))
+
+try:
+    from bot.media_cache import media_cache
+except ImportError:  # запуск как `python bot/main.py`
+    from media_cache import media_cache
+
 # Пути к файлам
 BOT_DIR = Path(__file__).parent
 PHOTO_PATH = BOT_DIR / "f1fb9a23-5f67-4679-96dc-a58601f62203.png"
@@ -171,10 +191,10 @@ async def start_handler(msg: types.Message) -> None:
 
     try:
         if PHOTO_PATH.exists():
-            await msg.answer_photo(
-                FSInputFile(PHOTO_PATH),
-                caption=caption,
-
+            # файл грузится в Telegram один раз, дальше уходит file_id
+            await media_cache.send(
+                PHOTO_PATH,
+                lambda photo: msg.answer_photo(photo, caption=caption),
             )
         else:
             await msg.answer(
@@ -335,6 +355,10 @@ async def unknown_message(msg: types.Message) -> None:
 
 
 async def main() -> None:
+    if os.getenv("BOT_WEBHOOK_ENABLED", "").strip().lower() in ("1", "true", "yes", "on"):
+        # getUpdates при установленном webhook Telegram отклоняет (409)
+        log.error("BOT_WEBHOOK_ENABLED: апдейты принимает backend (/api/telegram/webhook), поллинг не запускаем")
+        return
     log.info("=== [БОТ] ЗАПУСК ПОЛЛИНГА ===")
     try:
         await dp.start_polling(bot)
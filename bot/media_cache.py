@@ -0,0 +1,133 @@
+"""
+Кэш file_id загруженных в Telegram файлов.
+
+Файл с диска (`FSInputFile`) загружается один раз; `file_id` из ответа
+сохраняется в небольшой JSON (ключ — sha256 содержимого) и дальше
+отправляется вместо файла. Файл изменился — другой хеш, новая загрузка.
+
+    msg = await media_cache.send(PHOTO_PATH, lambda photo: msg.answer_photo(photo, caption=...))
+
+* первую загрузку делает один запрос: остальные ждут её под lock-ом и
+  получают готовый file_id (шквал /start после рекламы — одна загрузка);
+* хеш пересчитывается, только если у файла сменились mtime/размер;
+* file_id, который Telegram отверг (например, сменился токен бота),
+  забывается, и файл загружается заново; прочие BadRequest (длинная
+  подпись, неверная разметка) пробрасываются — кэш тут ни при чём.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+log = logging.getLogger(__name__)
+
+Sender = Callable[[Union[str, FSInputFile]], Awaitable[Message]]
+
+# типы вложений, у которых бывает file_id (фото — список размеров)
+_MEDIA_FIELDS = ("photo", "document", "video", "animation", "audio", "voice", "sticker")
+
+# «wrong file identifier/HTTP URL specified», «wrong remote file identifier
+# specified», «invalid file_id» — Telegram не знает наш file_id
+_REJECTED_FILE_ID = ("file identifier", "file_id")
+
+
+def _rejects_file_id(error: TelegramBadRequest) -> bool:
+    text = error.message.lower()
+    return any(marker in text for marker in _REJECTED_FILE_ID)
+
+
+def _file_id(message: Message) -> Optional[str]:
+    for field in _MEDIA_FIELDS:
+        media = getattr(message, field, None)
+        if not media:
+            continue
+        if isinstance(media, list):
+            media = media[-1]  # самый крупный размер фото
+        return media.file_id
+    return None
+
+
+class MediaCache:
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._ids: dict[str, dict[str, Any]] = self._load()
+        # путь → (mtime_ns, size, sha256): не читать файл на каждый /start
+        self._digests: dict[Path, tuple[int, int, str]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    # ─────────────────────────── хранилище ─────────────────────────────
+    def _load(self) -> dict[str, dict[str, Any]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning("[БОТ] media cache %s не читается (%s) — начинаем с пустого", self.path, e)
+            return {}
+
+    def _save(self) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            tmp.write_text(json.dumps(self._ids, ensure_ascii=False, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)  # атомарно: без полузаписанного JSON
+        except OSError as e:
+            log.warning("[БОТ] media cache %s не сохранён: %s", self.path, e)
+
+    def digest(self, file: Path) -> str:
+        st = file.stat()
+        cached = self._digests.get(file)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        digest = hashlib.sha256(file.read_bytes()).hexdigest()
+        self._digests[file] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def get(self, file: Path) -> Optional[str]:
+        entry = self._ids.get(self.digest(file))
+        return entry["file_id"] if entry else None
+
+    def forget(self, key: str) -> None:
+        if self._ids.pop(key, None) is not None:
+            self._save()
+
+    # ─────────────────────────── отправка ──────────────────────────────
+    async def send(self, file: Path, send: Sender) -> Message:
+        """`send(media)` с file_id из кэша, а без него — с загрузкой файла."""
+        key = self.digest(file)
+        entry = self._ids.get(key)
+        if entry:
+            try:
+                return await send(entry["file_id"])
+            except TelegramBadRequest as e:
+                if not _rejects_file_id(e):
+                    raise
+                log.warning("[БОТ] file_id для %s отвергнут (%s) — загружаем заново", file.name, e)
+                self.forget(key)
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._ids.get(key)  # пока ждали, файл мог загрузить другой /start
+            if entry:
+                return await send(entry["file_id"])
+            message = await send(FSInputFile(file))
+            file_id = _file_id(message)
+            if file_id:
+                self._ids[key] = {"file_id": file_id, "name": file.name}
+                self._save()
+                log.info("[БОТ] %s загружен в Telegram, file_id закэширован", file.name)
+            return message
+
+
+# общий кэш бота; путь переопределяется MEDIA_CACHE_PATH
+media_cache = MediaCache(os.getenv("MEDIA_CACHE_PATH") or Path(__file__).parent / ".media_cache.json")
+
+
+__all__ = ["MediaCache", "media_cache"]
@@ -22,12 +22,34 @@ export const deleteAdminProduct = (id) =>
 export const fetchAdminChats = () =>
   apiClient.get("/admin/messages/").then(unwrap);
 
-export const fetchAdminMessages = (orderId) =>
-  apiClient.get(`/admin/messages/${orderId}`).then(unwrap);
+// long-poll журнала по всем заказам: { cursor, reset, more, events: [{ seq, type, order_id, chat }] }
+export const syncAdminChats = (cursor = "", signal = undefined) =>
+  apiClient
+    .get("/admin/messages/sync", { params: cursor ? { cursor } : {}, signal })
+    .then(unwrap);
+
+// afterId — id последнего полученного сообщения (0 → вся история),
+// usePoll → long-poll /poll вместо разового запроса
+export const fetchAdminMessages = (
+  orderId,
+  afterId = 0,
+  usePoll = false,
+  signal = undefined,
+) =>
+  apiClient
+    .get(`/admin/messages/${orderId}${usePoll ? "/poll" : ""}`, {
+      params: afterId ? { after_id: afterId } : {},
+      signal,
+    })
+    .then(unwrap);
 
 export const sendAdminMessage = (orderId, content) =>
   apiClient.post(`/admin/messages/${orderId}`, { content }).then(unwrap);
 
+// chats: [{ order_id, up_to_id }] — один запрос на любое число чатов
+export const markAdminChatsRead = (chats) =>
+  apiClient.post("/admin/messages/read", { chats }).then(unwrap);
+
 export const deleteAdminMessage = (messageId) =>
   apiClient.delete(`/admin/messages/single/${messageId}`).then(() => null);
 
@@ -2,28 +2,23 @@
 import { apiClient } from "./client";
 /**
  * Собирает URL для истории или long-poll.
+ * Курсор — id сообщения: created_at одинаков у сообщений одной транзакции.
  */
-function makeUrl(orderId, since = "", usePoll = false) {
-  if (usePoll) {
-    const qs = since ? `?after=${encodeURIComponent(since)}` : "";
-    return `/messages/${orderId}/poll${qs}`;
-  }
-  if (since) {
-    return `/messages/${orderId}?since=${encodeURIComponent(since)}`;
-  }
-  return `/messages/${orderId}`;
+function makeUrl(orderId, afterId = 0, usePoll = false) {
+  const qs = afterId ? `?after_id=${afterId}` : "";
+  return `/messages/${orderId}${usePoll ? "/poll" : ""}${qs}`;
 }
 
 /**
  * Получить историю / новые сообщения.
  * @param {number|string} orderId
- * @param {string} since     пустая строка → вся история, иначе только после since
+ * @param {number} afterId   0 → вся история, иначе только с id больше afterId
  * @param {boolean} usePoll  true → /poll-эндпоинт
  * @param {AbortSignal} [signal] опционально, для отмены long-poll
  * @returns {Promise<Array>} список MessageOut
  */
-export function fetchMessages(orderId, since = "", usePoll = false, signal) {
-  const url = makeUrl(orderId, since, usePoll);
+export function fetchMessages(orderId, afterId = 0, usePoll = false, signal) {
+  const url = makeUrl(orderId, afterId, usePoll);
   return apiClient.get(url, { signal }).then((res) => res.data);
 }
 
@@ -39,3 +34,14 @@ export function sendMessage(orderId, content, client_tmp_id) {
   if (client_tmp_id) body.client_tmp_id = client_tmp_id;
   return apiClient.post(`/messages/${orderId}`, body).then((res) => res.data);
 }
+
+/**
+ * Пометить прочитанными ответы админа до messageId включительно.
+ * @param {number|string} orderId
+ * @param {number} upToId  id последнего показанного сообщения
+ */
+export function markChatRead(orderId, upToId) {
+  return apiClient
+    .post(`/messages/${orderId}/read`, { up_to_id: upToId })
+    .then((res) => res.data);
+}
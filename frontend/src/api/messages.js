@@ -5,17 +5,11 @@ const unwrap = (res) => res.data;
 /* --------------------------------------------------------------
  * URL-builder
  * ------------------------------------------------------------- */
-function makeChatUrl(orderId, since = "", usePoll = false) {
-  if (usePoll) {
-    // long-poll энд-пойнт
-    const qs = since ? `?after=${encodeURIComponent(since)}` : "";
-    return `/messages/${orderId}/poll${qs}`;
-  }
-  // обычный one-shot запрос
-  if (since) {
-    return `/messages/${orderId}?since=${encodeURIComponent(since)}`;
-  }
-  return `/messages/${orderId}`;
+function makeChatUrl(orderId, afterId = 0, usePoll = false) {
+  // курсор — id сообщения (created_at у соседних сообщений может совпадать)
+  const qs = afterId ? `?after_id=${afterId}` : "";
+  // usePoll → long-poll энд-пойнт, иначе обычный one-shot запрос
+  return `/messages/${orderId}${usePoll ? "/poll" : ""}${qs}`;
 }
 
 /* ==============================================================
@@ -29,17 +23,17 @@ export const fetchUserChats = () => apiClient.get("/messages/").then(unwrap);
 /**
  * Получить историю / новые сообщения.
  * @param {number|string}  orderId
- * @param {string}  [since]      ISO-метка последнего сообщения
+ * @param {number}  [afterId]    id последнего полученного сообщения
  * @param {boolean} [usePoll]    true → long-poll энд-пойнт
  * @param {AbortSignal} [signal] для прерывания висящего fetch
  */
 export async function fetchMessages(
   orderId,
-  since = "",
+  afterId = 0,
   usePoll = false,
   signal = undefined,
 ) {
-  const url = makeChatUrl(orderId, since, usePoll);
+  const url = makeChatUrl(orderId, afterId, usePoll);
   return (await apiClient.get(url, { signal })).data;
 }
 
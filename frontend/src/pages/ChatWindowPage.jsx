@@ -1,10 +1,14 @@
 import React, { useEffect, useState, useRef } from "react";
 import { useParams, useNavigate } from "react-router-dom";
-import { fetchMessages, sendMessage } from "../api/chat";
+import { fetchMessages, markChatRead, sendMessage } from "../api/chat";
 import { fetchOrder } from "../api/orders";
 import { useCurrentUser } from "../hooks/useCurrentUser";
+import { retryAfterMs } from "../utils/polling";
 import styles from "./ChatWindowPage.module.css";
 
+// пауза перед повтором poll после ошибки, если сервер не прислал Retry-After
+const POLL_RETRY_MS = 2000;
+
 export default function ChatWindowPage() {
   const { orderId } = useParams();
   const navigate = useNavigate();
@@ -15,7 +19,7 @@ export default function ChatWindowPage() {
   const [loading, setLoad] = useState(true);
   const [error, setErr] = useState("");
 
-  const lastSeenRef = useRef("");
+  const lastSeenRef = useRef(0); // id последнего полученного сообщения
   const bottomRef = useRef(null);
   const inputRef = useRef(null);
 
@@ -26,7 +30,10 @@ export default function ChatWindowPage() {
       try {
         const msgs = await fetchMessages(orderId);
         setMsgs(msgs);
-        if (msgs.length) lastSeenRef.current = msgs.at(-1).created_at;
+        if (msgs.length) {
+          lastSeenRef.current = msgs.at(-1).id;
+          markChatRead(orderId, msgs.at(-1).id).catch(() => {});
+        }
 
         if (!msgs.length || !msgs[0]?.product_title) {
           const ord = await fetchOrder(orderId);
@@ -73,10 +80,14 @@ export default function ChatWindowPage() {
             }
             return [...prev, ...uniqueNewsFromOthers];
           });
-          lastSeenRef.current = news.at(-1).created_at;
+          lastSeenRef.current = news.at(-1).id;
+          markChatRead(orderId, news.at(-1).id).catch(() => {});
         }
       } catch (e) {
-        if (e.name !== "AbortError") console.warn("poll error", e);
+        if (aborted) return;
+        console.warn("poll error", e);
+        // 429/503 приходят сразу — без паузы чат крутил бы запросы вхолостую
+        await new Promise((r) => setTimeout(r, retryAfterMs(e, POLL_RETRY_MS)));
       }
       if (!aborted) {
         controller = new AbortController();
@@ -115,8 +126,9 @@ export default function ChatWindowPage() {
 
     try {
       const real = await sendMessage(orderId, text, tmpId);
+      // курсор не двигаем: своё сообщение poll отфильтрует,
+      // а чужие с меньшим id не потеряются
       setMsgs((p) => p.map((m) => (m.id === tmpId ? real : m)));
-      lastSeenRef.current = real.created_at;
     } catch {
       setErr("Не удалось отправить сообщение");
       setMsgs((p) => p.filter((m) => m.id !== tmpId));
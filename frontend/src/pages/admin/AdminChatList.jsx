@@ -1,10 +1,11 @@
 // frontend/src/pages/admin/AdminChatList.jsx
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
+import { retryAfterMs } from "../../utils/polling";
 
 // 1. Импортируем хук useMe для проверки авторизации
 import { useMe } from "../../api/auth";
-import { fetchAdminChats, deleteAdminChat } from "../../api/admin";
+import { fetchAdminChats, deleteAdminChat, syncAdminChats } from "../../api/admin";
 import styles from "./AdminChatList.module.css";
 
 export default function AdminChatList() {
@@ -19,7 +20,7 @@ export default function AdminChatList() {
 
   // 3. Объединяем логику загрузки и обновления в одном useEffect
   useEffect(() => {
-    // 4. Запускаем загрузку и интервал только после подтверждения авторизации
+    // 4. Запускаем загрузку и sync только после подтверждения авторизации
     if (isUserReady) {
       let isCancelled = false;
 
@@ -40,13 +41,33 @@ export default function AdminChatList() {
         }
       };
 
-      load(); // Загружаем чаты сразу
-      const tid = setInterval(load, 60_000); // И ставим на периодическое обновление
+      // Дальше — не перезагрузка раз в минуту, а дельты из /admin/messages/sync:
+      // у каждого события готовая строка списка (chat) или null, если диалог удалён
+      const controller = new AbortController();
+      const follow = async () => {
+        let cursor = "";
+        while (!isCancelled) {
+          try {
+            const res = await syncAdminChats(cursor, controller.signal);
+            // первый запрос или устаревший курсор — список целиком; курсор взят
+            // до загрузки, так что изменения между ними придут следующим ответом
+            cursor = res.cursor;
+            if (res.reset) await load();
+            if (res.events.length) setChats((prev) => applyChatEvents(prev, res.events));
+          } catch (e) {
+            if (isCancelled || e.name === "CanceledError") return;
+            console.warn("admin sync error", e);
+            await new Promise((r) => setTimeout(r, retryAfterMs(e, 3_000)));
+          }
+        }
+      };
+
+      follow(); // первый ответ sync — reset: загружаем чаты и дальше слушаем изменения
 
       // Очистка при размонтировании компонента
       return () => {
         isCancelled = true;
-        clearInterval(tid);
+        controller.abort();
       };
     }
   }, [isUserReady]); // 5. Добавляем зависимость от статуса пользователя
@@ -145,6 +166,18 @@ export default function AdminChatList() {
   );
 }
 
+// события sync → новый список (последние сообщения сверху)
+function applyChatEvents(chats, events) {
+  const byOrder = new Map(chats.map((c) => [c.order_id, c]));
+  for (const { order_id, chat } of events) {
+    if (chat) byOrder.set(order_id, chat);
+    else byOrder.delete(order_id);
+  }
+  return [...byOrder.values()].sort(
+    (a, b) => new Date(b.created_at) - new Date(a.created_at),
+  );
+}
+
 // helper для форматирования
 function formatTime(ts) {
   if (!ts) return "—";
@@ -3,13 +3,18 @@ import { useParams, Link } from "react-router-dom";
 
 // 1. Импортируем хук useMe, а fetchMe нам больше не нужен
 import { useMe } from "../../api/auth";
+import { retryAfterMs } from "../../utils/polling";
 import AdminChatWindow from "./AdminChatWindow";
-import { fetchAdminMessages, sendAdminMessage } from "../../api/admin";
+import {
+  fetchAdminMessages,
+  markAdminChatsRead,
+  sendAdminMessage,
+} from "../../api/admin";
 
 const WELCOME =
   "Добрый день! Чтобы получить ваш расклад, " +
   "пожалуйста, пришлите ваше имя, дату рождения и ваш вопрос.";
-const POLL_DELAY = 2000; // Увеличим задержку для стабильности
+const POLL_DELAY = 2000; // пауза после ошибки, если сервер не прислал Retry-After
 
 export default function AdminChatPage() {
   const { orderId } = useParams();
@@ -22,7 +27,7 @@ export default function AdminChatPage() {
   const [error, setError] = useState("");
   const [pollError, setPollError] = useState(false);
 
-  const lastSeenRef = useRef("");
+  const lastSeenRef = useRef(0); // id последнего полученного сообщения
 
   // --- 3. Единый useEffect для всей логики загрузки чата ---
   useEffect(() => {
@@ -34,6 +39,15 @@ export default function AdminChatPage() {
     const controller = new AbortController();
     let isCancelled = false;
 
+    // счётчик непрочитанных в списке чатов обнуляется по факту показа
+    const markRead = (msgs) => {
+      const last = msgs.at(-1);
+      if (!last?.id) return;
+      markAdminChatsRead([{ order_id: Number(orderId), up_to_id: last.id }]).catch(
+        () => {},
+      );
+    };
+
     // --- Загрузка стартовой истории сообщений ---
     const loadInitialMessages = async () => {
       try {
@@ -42,7 +56,7 @@ export default function AdminChatPage() {
 
         let msgs = await fetchAdminMessages(
           orderId,
-          "",
+          0,
           false,
           controller.signal,
         );
@@ -56,7 +70,8 @@ export default function AdminChatPage() {
         if (!isCancelled) {
           setMsgs(msgs);
           // Устанавливаем метку последнего сообщения для long-polling
-          lastSeenRef.current = msgs.at(-1)?.created_at || "";
+          lastSeenRef.current = msgs.at(-1)?.id || 0;
+          markRead(msgs);
         }
       } catch (err) {
         if (!isCancelled) {
@@ -71,6 +86,7 @@ export default function AdminChatPage() {
     };
 
     // --- Long-polling для получения новых сообщений ---
+    // после ответа — сразу следующий запрос: ждёт сам /poll, пауза только после ошибки
     const pollNewMessages = async () => {
       while (!isCancelled) {
         try {
@@ -88,15 +104,16 @@ export default function AdminChatPage() {
               if (uniqueNews.length === 0) return prev;
               return [...prev, ...uniqueNews];
             });
-            lastSeenRef.current = news.at(-1).created_at;
+            lastSeenRef.current = news.at(-1).id;
+            markRead(news);
           }
           if (!isCancelled) setPollError(false);
         } catch (err) {
-          if (!isCancelled && err.name !== "AbortError") {
-            setPollError(true);
-          }
+          if (isCancelled) return;
+          setPollError(true);
+          // 429/503 приходят сразу — ждём, сколько просит сервер
+          await new Promise((r) => setTimeout(r, retryAfterMs(err, POLL_DELAY)));
         }
-        await new Promise((r) => setTimeout(r, POLL_DELAY));
       }
     };
 
@@ -131,8 +148,13 @@ export default function AdminChatPage() {
 
     try {
       const real = await sendAdminMessage(orderId, text, tmpId);
-      setMsgs((prev) => prev.map((m) => (m.id === tmpId ? real : m)));
-      lastSeenRef.current = real.created_at;
+      // курсор не двигаем: poll отдаст и это сообщение — если он успел
+      // раньше ответа, временное просто убираем
+      setMsgs((prev) =>
+        prev.some((m) => m.id === real.id)
+          ? prev.filter((m) => m.id !== tmpId)
+          : prev.map((m) => (m.id === tmpId ? real : m)),
+      );
     } catch {
       setError("Не удалось отправить сообщение");
       setMsgs((prev) => prev.filter((m) => m.id !== tmpId));
@@ -1,47 +1,68 @@
 import { apiClient } from "../api/client";
 import toast from "react-hot-toast";
 
+// сколько держать один запрос /wait, с (сервер разрешает до 55)
+const WAIT_CHUNK_SEC = 25;
+
+/**
+ * Пауза перед повтором запроса: 429 (лимит запросов) и 503 (перегрузка
+ * long-poll) приходят с Retry-After — ждём столько, сколько просит сервер.
+ * @param {unknown} error - ошибка axios.
+ * @param {number} fallbackMs - пауза, если сервер её не указал.
+ * @returns {number} миллисекунды.
+ */
+export function retryAfterMs(error, fallbackMs) {
+  const status = error?.response?.status;
+  const seconds = Number(error?.response?.headers?.["retry-after"]);
+  if ((status === 429 || status === 503) && seconds > 0) return seconds * 1000;
+  return fallbackMs;
+}
+
 /**
- * Опрашивает сервер до тех пор, пока статус заказа не изменится на "paid".
+ * Ждёт, пока статус заказа не станет "paid".
+ * Long-poll `GET /payments/{id}/wait`: сервер отвечает сразу, как только
+ * вебхук отметит оплату, — вместо опроса `/status` каждые несколько секунд.
  * @param {number} orderId - ID заказа для проверки.
  * @param {object} options - Настройки.
- * @param {number} options.interval - Интервал опроса в мс.
  * @param {number} options.timeout - Максимальное время ожидания в мс.
  * @returns {Promise<boolean>} - Возвращает true, если оплата прошла, иначе false.
  */
-export function pollOrderStatus(
-  orderId,
-  { interval = 3000, timeout = 60000 } = {},
-) {
-  const startTime = Date.now();
+export async function pollOrderStatus(orderId, { timeout = 60000 } = {}) {
+  const deadline = Date.now() + timeout;
 
-  return new Promise((resolve, reject) => {
-    const checkStatus = async () => {
-      // Проверяем таймаут
-      if (Date.now() - startTime > timeout) {
-        toast.error("Время ожидания оплаты истекло.");
-        return resolve(false);
-      }
-
-      try {
-        const { data } = await apiClient.get(`/payments/${orderId}/status`);
-
-        if (data.status === "paid") {
-          toast.success("Оплата подтверждена!");
-          return resolve(true);
-        }
+  while (Date.now() < deadline) {
+    const waitSec = Math.min(
+      WAIT_CHUNK_SEC,
+      Math.ceil((deadline - Date.now()) / 1000),
+    );
+    try {
+      const { data } = await apiClient.get(`/payments/${orderId}/wait`, {
+        params: { timeout: waitSec },
+      });
 
-        // Если статус всё ещё 'pending', продолжаем опрос
-        setTimeout(checkStatus, interval);
-      } catch (error) {
-        console.error("Ошибка при проверке статуса заказа:", error);
-        // В случае ошибки (например, 404), прекращаем опрос
-        toast.error("Не удалось проверить статус оплаты.");
-        return resolve(false);
+      if (data.status === "paid") {
+        toast.success("Оплата подтверждена!");
+        return true;
+      }
+      // /wait ждёт только 'pending' — другой статус сам уже не сменится
+      if (data.status !== "pending") {
+        toast.error("Заказ не оплачен.");
+        return false;
+      }
+    } catch (error) {
+      // 429/503 с Retry-After: ждём и продолжаем, а не сдаёмся
+      const delay = retryAfterMs(error, 0);
+      if (delay) {
+        await new Promise((resolve) => setTimeout(resolve, delay));
+        continue;
       }
-    };
+      console.error("Ошибка при проверке статуса заказа:", error);
+      // В случае ошибки (например, 404), прекращаем ожидание
+      toast.error("Не удалось проверить статус оплаты.");
+      return false;
+    }
+  }
 
-    // Начинаем первую проверку
-    checkStatus();
-  });
+  toast.error("Время ожидания оплаты истекло.");
+  return false;
 }
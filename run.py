@@ -18,19 +18,27 @@ try:
 except ImportError:
     uvicorn = None
 
+from backend.core.log_setup import setup_logging
+from backend.utils.systemd import sd_notify
+
 # --- Basic Logging Setup ---
 # Suppress noisy exceptions on stream reconfiguration if it's not supported.
 with suppress(Exception):
     if hasattr(sys.stdout, "reconfigure"):
         sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 
-_log_formatter = logging.Formatter("%(asctime)s [%(levelname)-8s] %(message)s", "%H:%M:%S")
-_log_handler = logging.StreamHandler(sys.stdout)
-_log_handler.setFormatter(_log_formatter)
-logging.basicConfig(
-    level=os.getenv("LOG_LEVEL", "INFO").upper(),
-    handlers=[_log_handler],
-    force=True
+# One queue-based setup for the whole process (backend and bot included):
+# console/file writes happen on a background thread, not on the event loop.
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    fmt="%(asctime)s [%(levelname)-8s] %(message)s",
+    datefmt="%H:%M:%S",
+    stream=sys.stdout,
+    log_file=os.getenv("LOG_FILE") or None,
+    max_bytes=int(os.getenv("LOG_FILE_MAX_BYTES", 10 * 1024 * 1024)),
+    backup_count=int(os.getenv("LOG_FILE_BACKUPS", 5)),
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", 10_000)),
+    force=True,
 )
 
 # --- Service Configuration ---
@@ -45,7 +53,11 @@ class ServiceConfig:
     log_level: str = field(default_factory=lambda: os.getenv("LOG_LEVEL", "INFO").upper())
     shutdown_timeout: float = 10.0
     monitor_interval: float = 1.0
-    startup_delay: float = 2.0
+    startup_timeout: float = 30.0
+    # апдейты бота приходят на /api/telegram/webhook — getUpdates-поллер не нужен
+    bot_webhook: bool = field(
+        default_factory=lambda: os.getenv("BOT_WEBHOOK_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+    )
 
     # SSL configuration read from environment variables
     ssl_certfile: Optional[str] = field(default_factory=lambda: os.getenv("SSL_CERTFILE"))
@@ -185,6 +197,9 @@ class ServiceRunner:
                 log_level=self._config.log_level.lower(),
                 reload=False,
                 access_log=True,
+                # uvicorn's own dictConfig would add synchronous stream handlers;
+                # without it its loggers propagate into the queue-based root
+                log_config=None,
                 loop="asyncio",
                 ssl_keyfile=self._config.ssl_keyfile if is_ssl_valid else None,
                 ssl_certfile=self._config.ssl_certfile if is_ssl_valid else None,
@@ -216,6 +231,8 @@ class ServiceRunner:
         try:
             from bot.main import dp, bot
             self._log.info("▶️  Starting Telegram bot service")
+            # после webhook-режима Telegram отклоняет getUpdates, пока webhook не снят
+            await bot.delete_webhook(drop_pending_updates=False)
             # handle_signals=False prevents aiogram from conflicting with our handlers
             await dp.start_polling(bot, handle_signals=False)
         except ImportError as e:
@@ -246,6 +263,7 @@ class ServiceRunner:
     async def _graceful_service_shutdown(self, *tasks: asyncio.Task) -> None:
         """Cancels all running tasks and waits for them to finish."""
         self._log.info("⏹️  Initiating graceful shutdown...")
+        sd_notify("STOPPING=1")
         for task in tasks:
             if not task.done():
                 task.cancel()
@@ -262,14 +280,38 @@ class ServiceRunner:
         self._log.info("🚀 Starting services...")
         backend_task = asyncio.create_task(self._run_backend_service(), name="backend_service")
 
-        # Wait a moment before starting the next service
-        await asyncio.sleep(self._config.startup_delay)
+        # Ждём реального старта uvicorn (lifespan пройден, сокет слушает),
+        # а не фиксированную паузу
+        await self._wait_backend_ready(backend_task)
+        if sd_notify("READY=1"):
+            self._log.info("📣 systemd notified: READY")
+
+        if self._config.bot_webhook:
+            self._log.info("🤖 Bot in webhook mode: updates are served by the backend, polling disabled")
+            self._log.info("✅ All services have been initiated.")
+            return [backend_task]
 
         bot_task = asyncio.create_task(self._run_bot_service(), name="bot_service")
 
         self._log.info("✅ All services have been initiated.")
         return [backend_task, bot_task]
 
+    async def _wait_backend_ready(self, backend_task: asyncio.Task) -> None:
+        """Polls `uvicorn.Server.started`; fails fast if the backend task dies."""
+        if uvicorn is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._config.startup_timeout
+        started = loop.time()
+        while not (self._uvicorn_server and self._uvicorn_server.started):
+            if backend_task.done():
+                backend_task.result()  # пробросит исключение, если оно было
+                raise RuntimeError("Backend service exited before it became ready")
+            if loop.time() > deadline:
+                raise TimeoutError(f"Backend not ready after {self._config.startup_timeout:.0f}s")
+            await asyncio.sleep(0.05)
+        self._log.info("✅ Backend ready in %.2fs", loop.time() - started)
+
     async def run_async(self) -> None:
         """The main asynchronous entry point for running the services."""
         tasks = []
@@ -312,18 +354,6 @@ class ServiceRunner:
 
 def main() -> None:
     """Main function to configure and run the service runner."""
-    # Create placeholder directories and files for demonstration purposes
-    # In a real application, these would already exist.
-    Path("backend").mkdir(exist_ok=True)
-    Path("bot").mkdir(exist_ok=True)
-    Path("backend/main.py").touch(exist_ok=True)
-    Path("bot/main.py").touch(exist_ok=True)
-
-    # Example placeholder content
-    Path("backend/main.py").write_text('app = "This is a placeholder for a FastAPI app"')
-    Path("bot/main.py").write_text('class Mock: pass\nbot=Mock()\ndp=Mock()')
-
-
     config = ServiceConfig()
     runner = ServiceRunner(config)
     runner.run()
@@ -0,0 +1,62 @@
+# tests/api/test_list_projections.py
+"""Списки заказов и чатов собираются из колонок, без selectin-связей."""
+import pytest
+
+from backend.models.category import Category
+from backend.models.message import Message
+from backend.models.order import Order
+from backend.models.product import Product
+from backend.models.user import User
+from backend.utils.auth_manager import build_init_data
+
+
+async def _customer_with_orders(db, n=3):
+    user = User(telegram_id=777001, username="lister")
+    category = Category(name="Списки")
+    db.add_all([user, category])
+    await db.flush()
+    product = Product(
+        category_id=category.id, title="Таро", price=100,
+        description="длинное описание " * 50, image_url="https://cdn.example.com/t.jpg",
+    )
+    db.add(product)
+    await db.flush()
+    orders = [
+        Order(user_id=user.id, product_id=product.id, quantity=1, price=100, total=100)
+        for _ in range(n)
+    ]
+    db.add_all(orders)
+    await db.flush()
+    db.add_all([Message(order_id=o.id, user_id=user.id, content=f"hi {o.id}") for o in orders])
+    await db.commit()
+    headers = {"X-Telegram-Init-Data": build_init_data({"id": user.telegram_id, "first_name": "Lister", "username": user.username})}
+    return orders, headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/api/orders/", "/api/orders/my"])
+async def test_order_lists_return_brief_product(client, async_session_fixture, query_budget, path):
+    orders, headers = await _customer_with_orders(async_session_fixture)
+
+    with query_budget(3, max_repeats=1):
+        resp = await client.get(path, headers=headers)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [o["id"] for o in body] == sorted((o.id for o in orders), reverse=True)
+    assert body[0]["product"] == {
+        "id": orders[0].product_id, "title": "Таро",
+        "image_url": "https://cdn.example.com/t.jpg", "price": 100.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_user_chats_one_row_per_order(client, async_session_fixture, query_budget):
+    orders, headers = await _customer_with_orders(async_session_fixture)
+
+    with query_budget(3, max_repeats=1):
+        resp = await client.get("/api/messages/", headers=headers)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert sorted(m["order_id"] for m in body) == sorted(o.id for o in orders)
+    assert {m["product_title"] for m in body} == {"Таро"}
+    assert all(m["user_name"] == "lister" and m["unread_count"] == 0 for m in body)
@@ -0,0 +1,22 @@
+# tests/api/test_query_budget.py
+"""Бюджет SQL-запросов для публичных эндпоинтов каталога."""
+import pytest
+
+from backend.schemas.category import CategoryCreate
+from backend.schemas.product import ProductCreate
+from backend.services.crud import category_crud, product_crud
+
+
+@pytest.mark.asyncio
+async def test_list_products_has_no_n_plus_one(client, async_session_fixture, query_budget):
+    category = await category_crud.create(async_session_fixture, CategoryCreate(name="Budget"))
+    for i in range(5):
+        await product_crud.create(
+            async_session_fixture,
+            ProductCreate(title=f"P{i}", price=10 + i, category_id=category.id),
+        )
+
+    with query_budget(2, max_repeats=1):
+        resp = await client.get("/api/products")
+    assert resp.status_code == 200
+    assert len(resp.json()) == 5
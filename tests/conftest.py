@@ -1,9 +1,15 @@
-import asyncio, pytest, pytest_asyncio
+import asyncio, os, pytest, pytest_asyncio
+
+# сотни запросов одного «пользователя» подряд — лимитер в API-тестах не нужен
+# (он покрыт в tests/core/test_ratelimit.py); до импорта backend.main
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy import text
 
 from backend.main import app
 from backend.core.database import async_session
+from backend.core.query_stats import assert_max_queries
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -25,6 +31,8 @@ async def clean_db(async_session_fixture):
         "order_items", "orders",
         "products", "categories",
         "messages", "users",
+        "job_outbox",
+        "chat_changes",
     )
     for t in tables:
         await async_session_fixture.execute(text(f"TRUNCATE {t} CASCADE"))
@@ -37,3 +45,14 @@ async def client():
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
 
+
+# ─── бюджет SQL-запросов ──────────────────────────
+@pytest.fixture
+def query_budget():
+    """
+    with query_budget(3):
+        await client.get(...)
+    Падает, если внутри блока выполнено больше statement-ов,
+    либо (max_repeats=N) один и тот же statement повторился больше N раз.
+    """
+    return assert_max_queries
@@ -0,0 +1,7 @@
+import pytest_asyncio
+
+
+# ─── core-тесты не ходят в БД: глушим авто-truncate из tests/conftest.py ───
+@pytest_asyncio.fixture(autouse=True)
+async def clean_db():
+    yield
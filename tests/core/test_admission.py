@@ -0,0 +1,78 @@
+# tests/core/test_admission.py
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.core.admission import LongPollAdmission, Overloaded, Superseded
+
+
+async def _park(admission, endpoint, user, key, started):
+    with admission.admit(endpoint, user, key) as ticket:
+        started.set()
+        try:
+            return await ticket.guard(asyncio.sleep(10, result="woken"))
+        except Superseded:
+            return "superseded"
+
+
+@pytest.mark.asyncio
+async def test_duplicate_supersedes_oldest_waiter():
+    admission = LongPollAdmission(per_key=1)
+    started = asyncio.Event()
+    old = asyncio.create_task(_park(admission, "sync", 1, 7, started))
+    await started.wait()
+    assert admission.waiting() == {"sync": 1}
+
+    with admission.admit("sync", 1, 7) as ticket:  # клиент переподключился
+        assert await old == "superseded"
+        assert admission.waiting() == {"sync": 1} and not ticket.superseded
+        # другой заказ — не дубликат
+        with admission.admit("sync", 1, 8):
+            assert admission.total == 2
+    assert admission.waiting() == {} and admission._by_user == {}
+
+
+@pytest.mark.asyncio
+async def test_caps_reject_with_jittered_retry_after():
+    admission = LongPollAdmission(max_waiters=3, per_user=2, retry_after=5)
+    with admission.admit("messages", 1, 1), admission.admit("messages", 1, 2):
+        with pytest.raises(Overloaded) as exc:
+            with admission.admit("messages", 1, 3):
+                pass
+        assert exc.value.reason == "user" and 5 <= exc.value.retry_after <= 10
+
+        with admission.admit("messages", 2, 1):
+            with pytest.raises(Overloaded) as exc:
+                with admission.admit("payment_wait", 3, 1):
+                    pass
+            assert exc.value.reason == "global"
+    assert admission.total == 0 and admission._by_user == {}
+
+
+@pytest.mark.asyncio
+async def test_guard_returns_result_and_propagates_errors():
+    admission = LongPollAdmission()
+    with admission.admit("sync", 1) as ticket:
+        assert await ticket.guard(asyncio.sleep(0, result=[1])) == [1]
+        with pytest.raises(ValueError):
+            await ticket.guard(_fail())
+
+
+async def _fail():
+    raise ValueError("boom")
+
+
+@pytest.mark.asyncio
+async def test_overloaded_becomes_503_with_retry_after():
+    from backend.main import longpoll_overloaded
+
+    resp = await longpoll_overloaded(None, Overloaded("global", 4.2))
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "5"
+
+
+def test_health_reports_waiters():
+    from backend.main import app
+
+    assert TestClient(app).get("/health").json()["longpoll_waiters"] == {}
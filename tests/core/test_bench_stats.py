@@ -0,0 +1,32 @@
+# tests/core/test_bench_stats.py
+from benchmarks.stats import Recorder, compare, percentile
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_recorder_summary_counts_errors_separately():
+    rec = Recorder()
+    for ms in (10, 20, 30, 40):
+        rec.add("catalog", ms / 1000, 200)
+    rec.add("catalog", 5.0, 500)
+    rec.add("catalog", 5.0, None)
+
+    s = rec.summary(duration=2.0)["catalog"]
+    assert s["requests"] == 6
+    assert s["errors"] == 2
+    assert s["rps"] == 2.0
+    assert s["p50_ms"] == 20.0
+    assert s["max_ms"] == 40.0
+    assert s["statuses"] == {"0": 1, "200": 4, "500": 1}
+
+
+def test_compare_delta():
+    old = {"catalog": {"p95_ms": 100.0}, "gone": {"p95_ms": 1.0}}
+    new = {"catalog": {"p95_ms": 120.0}}
+    assert compare(old, new, ["p95_ms"]) == [("catalog", "p95_ms", 100.0, 120.0, 20.0)]
@@ -0,0 +1,117 @@
+# tests/core/test_bot_webhook.py
+"""Webhook-режим бота: «Telegram» — httpx-клиент, Dispatcher — заглушка."""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from backend.api.endpoints import telegram_webhook
+from backend.services.bot_webhook import BotWebhook, UpdateDeduplicator
+
+SECRET = "s3cr3t_token-1"
+
+
+class _Dispatcher:
+    def __init__(self):
+        self.seen = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    async def feed_raw_update(self, bot, update):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+            if update.get("boom"):
+                raise RuntimeError("handler failed")
+            self.seen.append(update["update_id"])
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    hook = BotWebhook(secret=SECRET, concurrency=2, dedup_size=100)
+    dispatcher = _Dispatcher()
+    hook.attach(dispatcher, bot=object())
+    monkeypatch.setattr(telegram_webhook, "bot_webhook", hook)
+    app = FastAPI()
+    app.include_router(telegram_webhook.router, prefix="/api/telegram")
+    client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    return hook, dispatcher, client
+
+
+def _send(client, update, secret=SECRET):
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    return client.post("/api/telegram/webhook", json=update, headers=headers)
+
+
+def test_deduplicator_forgets_oldest():
+    dedup = UpdateDeduplicator(size=2)
+    assert [dedup.seen(i) for i in (1, 2, 1, 3)] == [False, False, True, False]
+    assert dedup.seen(2) is False  # вытеснен: 1 использовался позже
+    assert dedup.seen(1) is False
+
+
+@pytest.mark.asyncio
+async def test_secret_token_is_required(webhook):
+    hook, dispatcher, client = webhook
+    async with client:
+        assert (await _send(client, {"update_id": 1}, secret=None)).status_code == 401
+        assert (await _send(client, {"update_id": 1}, secret="wrong")).status_code == 401
+        assert (await _send(client, [1, 2])).status_code == 400
+    assert hook.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_updates_run_concurrently_and_duplicates_are_dropped(webhook):
+    hook, dispatcher, client = webhook
+    async with client:
+        # ответ не ждёт хэндлер: оба апдейта приняты, пока хэндлеры висят
+        assert (await _send(client, {"update_id": 10})).status_code == 200
+        assert (await _send(client, {"update_id": 11})).status_code == 200
+        assert (await _send(client, {"update_id": 10})).status_code == 200  # повтор Telegram
+        await asyncio.sleep(0)
+        assert dispatcher.running == 2 and hook.in_flight() == 2
+
+        # слоты заняты — третий ждёт (backpressure), пока один не освободится
+        third = asyncio.create_task(_send(client, {"update_id": 12, "boom": True}))
+        await asyncio.sleep(0.05)
+        assert not third.done()
+
+        dispatcher.release.set()
+        assert (await asyncio.wait_for(third, 1)).status_code == 200
+        await hook.drain(timeout=1)
+
+    assert sorted(dispatcher.seen) == [10, 11]  # 12 упал в хэндлере — ответ всё равно 200
+    assert dispatcher.peak == 2
+    assert hook.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_wait_for_slot_does_not_mark_update_seen(webhook):
+    hook, dispatcher, _ = webhook
+    assert await hook.feed({"update_id": 20}) and await hook.feed({"update_id": 21})
+
+    # слоты заняты, Telegram оборвал запрос по тайм-ауту
+    waiting = asyncio.create_task(hook.feed({"update_id": 22}))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    dispatcher.release.set()
+    assert await hook.feed({"update_id": 22})  # повтор принят, а не отброшен
+    await hook.drain(timeout=1)
+    assert sorted(dispatcher.seen) == [20, 21, 22]
+
+
+@pytest.mark.asyncio
+async def test_disabled_webhook_is_not_found(monkeypatch):
+    monkeypatch.setattr(telegram_webhook, "bot_webhook", BotWebhook(secret=SECRET))
+    app = FastAPI()
+    app.include_router(telegram_webhook.router, prefix="/api/telegram")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await _send(client, {"update_id": 1})).status_code == 404
@@ -0,0 +1,63 @@
+# tests/core/test_bulk_formats.py
+"""Разбор и кодирование JSONL / CSV для массового импорта-экспорта (без БД)."""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from backend.services.bulk import BulkFormatError, encode, iter_records
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect(agen):
+    return [x async for x in agen]
+
+
+@pytest.mark.asyncio
+async def test_jsonl_split_across_chunks():
+    body = '{"title": "Таро"}\n\n{"title": "Руны"}\nnot json\n'.encode()
+    rows = await _collect(iter_records("jsonl", _chunks(body)))
+    assert rows[0] == (1, {"title": "Таро"})
+    assert rows[1] == (3, {"title": "Руны"})
+    assert rows[2][0] == 4 and isinstance(rows[2][1], BulkFormatError)
+
+
+@pytest.mark.asyncio
+async def test_csv_quoted_newlines_and_empty_cells():
+    body = (
+        '﻿title,price,description,category\r\n'
+        'Таро,100,"строка 1\nстрока 2",Расклады\r\n'
+        'Руны,200,,Расклады\r\n'
+        'bad,1\r\n'
+    ).encode()
+    rows = await _collect(iter_records("csv", _chunks(body, 5)))
+    assert rows[0] == (1, {"title": "Таро", "price": "100", "description": "строка 1\nстрока 2", "category": "Расклады"})
+    assert rows[1] == (2, {"title": "Руны", "price": "200", "category": "Расклады"})
+    assert isinstance(rows[2][1], BulkFormatError)
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(BulkFormatError):
+        iter_records("xml", _chunks(b""))
+
+
+async def _rows():
+    yield {"id": 1, "total": Decimal("10.50"), "created_at": datetime(2025, 1, 2, tzinfo=timezone.utc)}
+    yield {"id": 2, "total": Decimal("3"), "created_at": None}
+
+
+@pytest.mark.asyncio
+async def test_encode_jsonl_and_csv():
+    lines = b"".join(await _collect(encode("jsonl", _rows(), ()))).decode().splitlines()
+    assert json.loads(lines[0]) == {"id": 1, "total": "10.50", "created_at": "2025-01-02T00:00:00+00:00"}
+
+    text = b"".join(await _collect(encode("csv", _rows(), ("id", "total", "created_at")))).decode()
+    parsed = list(csv.DictReader(io.StringIO(text)))
+    assert parsed[1] == {"id": "2", "total": "3", "created_at": ""}
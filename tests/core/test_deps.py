@@ -0,0 +1,42 @@
+# tests/core/test_deps.py
+"""Auth и эндпоинт получают одну и ту же сессию на запрос."""
+from types import SimpleNamespace
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api import deps
+from backend.core.database import get_db
+from backend.utils.auth_manager import build_init_data
+
+
+def test_auth_and_handler_share_one_session(monkeypatch):
+    opened = []
+
+    async def fake_db():
+        session = object()
+        opened.append(session)
+        yield session
+
+    seen = {}
+
+    async def fake_get_or_create_user(db, **kwargs):
+        seen["auth"] = db
+        return SimpleNamespace(telegram_id=kwargs["telegram_id"], is_active=True, is_admin=False)
+
+    monkeypatch.setattr(deps.user_crud, "get_or_create_user", fake_get_or_create_user)
+
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(db=Depends(deps.get_db), user=Depends(deps.get_current_user)):
+        seen["handler"] = db
+        return {"id": user.telegram_id}
+
+    app.dependency_overrides[get_db] = fake_db
+    headers = {"X-Telegram-Init-Data": build_init_data({"id": 5, "first_name": "U", "username": "u"})}
+    resp = TestClient(app).get("/me", headers=headers)
+
+    assert resp.status_code == 200
+    assert len(opened) == 1
+    assert seen["auth"] is seen["handler"] is opened[0]
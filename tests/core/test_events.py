@@ -0,0 +1,212 @@
+# tests/core/test_events.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from backend.api.deps import get_current_user
+from backend.api.endpoints import admin_messages, messages
+from backend.core.database import get_db
+from backend.core.events import EventBus, KeyedSignal
+from backend.services import change_feed as change_feed_module
+from backend.services.change_feed import ChangeFeed
+
+
+def test_since_filters_by_owner_and_detects_stale_cursor():
+    bus = EventBus(history=3)
+    bus.publish("new_message", order_id=1, user_id=7, data={"n": 1})
+    bus.publish("new_message", order_id=2, user_id=8)
+    bus.publish("message_replied", order_id=1, user_id=7)
+
+    assert [e.seq for e in bus.since(0, user_id=7)] == [1, 3]
+    assert [e.seq for e in bus.since(0)] == [1, 2, 3]
+    assert bus.since(3, user_id=7) == []
+
+    bus.publish("message_deleted", order_id=2, user_id=8)  # seq 1 вытеснен
+    assert bus.since(0) is None
+    assert [e.seq for e in bus.since(1)] == [2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_wait_wakes_only_owner():
+    bus = EventBus()
+    owner = asyncio.create_task(bus.wait(0, user_id=7, timeout=5))
+    other = asyncio.create_task(bus.wait(0, user_id=8, timeout=0.2))
+    await asyncio.sleep(0)
+
+    bus.publish("new_message", order_id=1, user_id=7)
+    got = await asyncio.wait_for(owner, 1)
+    assert [e.order_id for e in got] == [1]
+    assert await other == []
+    assert bus.waiting() == 0
+
+
+# ─────────────────────────── /messages/sync ─────────────────────────────
+class _Session:
+    def in_transaction(self):
+        return False
+
+
+class _Feed(ChangeFeed):
+    """Журнал в памяти: SQL подменён, цикл ожидания `wait` — настоящий."""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, bus, type, *, order_id, owner_id, message_id=None, data=None):
+        row = {
+            "id": len(self.rows) + 1, "type": type, "order_id": order_id,
+            "owner_id": owner_id, "message_id": message_id, "data": data or {},
+        }
+        self.rows.append(row)
+        bus.publish(type, order_id=order_id, user_id=owner_id, data={"change_id": row["id"]})
+
+    async def since(self, db, after, *, owner_id=None, order_ids=None, limit=500):
+        return [
+            r for r in self.rows
+            if r["id"] > after
+            and (owner_id is None or r["owner_id"] == owner_id)
+            and (order_ids is None or r["order_id"] in order_ids)
+        ][:limit]
+
+    async def head(self, db):
+        return len(self.rows)
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    bus, feed = EventBus(), _Feed()
+    monkeypatch.setattr(change_feed_module, "event_bus", bus)
+    for module in (messages, admin_messages):
+        monkeypatch.setattr(module, "change_feed", feed)
+    return bus, feed
+
+
+async def _fake_db():
+    yield _Session()
+
+
+@pytest.mark.asyncio
+async def test_sync_endpoint(feed):
+    bus, log = feed
+    app = FastAPI()
+    app.include_router(messages.router)
+    app.dependency_overrides[get_db] = _fake_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=7, is_admin=False)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = (await ac.get("/messages/sync")).json()
+        assert first == {"cursor": "0", "reset": True, "events": [], "more": False}
+
+        log.add(bus, "new_message", order_id=3, owner_id=8)
+        log.add(bus, "messages_read", order_id=5, owner_id=7, data={"up_to_id": 10, "by_admin": True})
+        resp = (await ac.get("/messages/sync", params={"cursor": first["cursor"], "timeout": 0})).json()
+        assert resp["reset"] is False and resp["cursor"] == "2"
+        assert [(e["seq"], e["type"], e["order_id"]) for e in resp["events"]] == [(2, "messages_read", 5)]
+
+        # пусто → ждём, пока в журнале не появится изменение владельца
+        pending = asyncio.create_task(ac.get("/messages/sync", params={"cursor": resp["cursor"], "timeout": 5}))
+        await asyncio.sleep(0.05)
+        log.add(bus, "new_message", order_id=4, owner_id=8)  # чужое — не будит
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+        log.add(bus, "message_replied", order_id=5, owner_id=7, message_id=11)
+        woke = (await asyncio.wait_for(pending, 2)).json()
+        assert [(e["seq"], e["message_id"]) for e in woke["events"]] == [(4, 11)]
+        assert woke["cursor"] == "4"
+
+        # повтор с тем же курсором отдаёт то же самое — ничего не теряется
+        again = (await ac.get("/messages/sync", params={"cursor": resp["cursor"], "timeout": 0})).json()
+        assert again["events"] == woke["events"]
+
+        # фильтр по чату и курсор «из будущего» (другая база) → reset
+        only = (await ac.get("/messages/sync", params={"cursor": 0, "order_id": 3, "timeout": 0})).json()
+        assert only["events"] == []
+        assert (await ac.get("/messages/sync", params={"cursor": 99})).json()["reset"] is True
+        assert (await ac.get("/messages/sync", params={"cursor": "nope"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_admin_sync_delivers_every_order_with_chat_delta(feed, monkeypatch):
+    from backend.api.deps import admin_guard
+
+    bus, log = feed
+    row = {
+        "id": 11, "user_id": 8, "order_id": 3, "content": "привет", "reply": None,
+        "is_read": False, "created_at": "2026-01-01T10:00:00+00:00", "replied_at": None,
+        "product_title": "Расклад", "user_name": "u8", "unread_count": 1,
+    }
+    asked = []
+
+    async def admin_chat_rows(db, *, order_ids=None):
+        asked.append(set(order_ids))
+        return [row] if 3 in order_ids else []
+
+    monkeypatch.setattr(admin_messages.message_extra_crud, "admin_chat_rows", admin_chat_rows)
+
+    app = FastAPI()
+    app.include_router(admin_messages.router, prefix="/admin/messages")
+    app.dependency_overrides[get_db] = _fake_db
+    app.dependency_overrides[admin_guard] = lambda: SimpleNamespace(id=1, is_admin=True)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        cursor = (await ac.get("/admin/messages/sync")).json()["cursor"]
+        log.add(bus, "new_message", order_id=3, owner_id=8, message_id=11)
+        log.add(bus, "chat_deleted", order_id=4, owner_id=9)
+        resp = (await ac.get("/admin/messages/sync", params={"cursor": cursor, "timeout": 0})).json()
+
+    assert [(e["type"], e["order_id"]) for e in resp["events"]] == [("new_message", 3), ("chat_deleted", 4)]
+    assert resp["events"][0]["chat"]["product_title"] == "Расклад"
+    assert resp["events"][1]["chat"] is None
+    assert asked == [{3, 4}]  # одна выборка строк на все затронутые чаты
+
+
+# ─────────────────────────── /payments/{id}/wait ─────────────────────────
+@pytest.mark.asyncio
+async def test_keyed_signal_watch_before_notify():
+    signal = KeyedSignal()
+    with signal.watch(5) as changed, signal.watch(5) as same:
+        assert signal.waiting() == 2
+        assert signal.notify(6, "paid") == 0
+        assert signal.notify(5, "paid") == 2
+        assert await changed == "paid" and await same == "paid"
+    assert signal.waiting() == 0
+
+
+@pytest.mark.asyncio
+async def test_payment_wait_woken_by_webhook(monkeypatch):
+    from backend.api.endpoints import payments
+
+    order = SimpleNamespace(id=5, user_id=7, status="pending")
+
+    async def get(db, id):
+        return order if id == order.id else None
+
+    async def update(db, obj, data):
+        obj.status = data["status"]
+        return obj
+
+    monkeypatch.setattr(payments, "order_status_signal", KeyedSignal())
+    monkeypatch.setattr(payments.order_crud, "get", get)
+    monkeypatch.setattr(payments.order_crud, "update", update)
+
+    app = FastAPI()
+    app.include_router(payments.router, prefix="/payments")
+    app.dependency_overrides[get_db] = _fake_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=7, telegram_id=70, is_admin=False)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        quick = (await ac.get("/payments/5/wait", params={"timeout": 0})).json()
+        assert quick == {"order_id": 5, "status": "pending"}
+        assert (await ac.get("/payments/6/wait", params={"timeout": 0})).status_code == 404
+
+        pending = asyncio.create_task(ac.get("/payments/5/wait", params={"timeout": 5}))
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+        update_ = {"message": {"successful_payment": {"invoice_payload": '{"order_id": 5}'}}}
+        assert (await ac.post("/payments/webhook", json=update_)).status_code == 200
+        woke = (await asyncio.wait_for(pending, 1)).json()
+
+    assert woke == {"order_id": 5, "status": "paid"}
@@ -0,0 +1,16 @@
+# tests/core/test_init_data.py
+from backend.utils.auth_manager import TelegramAuthManager, build_init_data
+
+
+def test_build_init_data_roundtrip():
+    raw = build_init_data({"id": 42, "first_name": "Тест"}, bot_token="1:abc", query_id="q1")
+    ok, user = TelegramAuthManager(bot_token="1:abc").authenticate(raw)
+    assert ok
+    assert user["id"] == 42
+    assert user["first_name"] == "Тест"
+
+
+def test_build_init_data_wrong_token_rejected():
+    raw = build_init_data({"id": 42}, bot_token="1:abc")
+    ok, user = TelegramAuthManager(bot_token="1:other").authenticate(raw)
+    assert not ok and user is None
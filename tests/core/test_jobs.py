@@ -0,0 +1,101 @@
+# tests/core/test_jobs.py
+import asyncio
+
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.core.jobs import JobQueue, job_queue
+from backend.core.metrics import JOBS_PROCESSED
+
+CALLS: list[dict] = []
+
+
+@job_queue.job("test.record")
+async def _record(**payload):
+    CALLS.append(payload)
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    CALLS.clear()
+    yield
+
+
+@pytest.mark.asyncio
+async def test_staged_job_runs_after_commit_only():
+    session = Session()
+    session.begin()
+    job_queue.stage(session, "test.record", n=1)
+    await asyncio.sleep(0.01)
+    assert CALLS == []
+
+    session.commit()
+    await job_queue.join()
+    assert CALLS == [{"n": 1}]
+
+
+@pytest.mark.asyncio
+async def test_rollback_discards_staged_jobs():
+    session = Session()
+    session.begin()
+    job_queue.stage(session, "test.record", n=2)
+    session.rollback()
+    session.commit()
+    await job_queue.join()
+    assert CALLS == []
+
+
+def test_stage_unknown_job_rejected():
+    with pytest.raises(KeyError):
+        job_queue.stage(Session(), "test.nope")
+
+
+@pytest.mark.asyncio
+async def test_retry_until_success():
+    queue = JobQueue(workers=1, retry_base=0.001)
+    attempts = []
+
+    @queue.job("flaky")
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("boom")
+
+    before = JOBS_PROCESSED.value(job="flaky", outcome="retry")
+    queue.enqueue("flaky")
+    await asyncio.wait_for(queue.join(), 2)
+    assert len(attempts) == 3
+    assert JOBS_PROCESSED.value(job="flaky", outcome="retry") - before == 2
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    queue = JobQueue(workers=1, max_attempts=2, retry_base=0.001)
+
+    @queue.job("broken")
+    async def broken():
+        raise RuntimeError("always")
+
+    before = JOBS_PROCESSED.value(job="broken", outcome="failed")
+    queue.enqueue("broken")
+    await asyncio.wait_for(queue.join(), 2)
+    assert JOBS_PROCESSED.value(job="broken", outcome="failed") - before == 1
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_instead_of_blocking():
+    queue = JobQueue(workers=1, maxsize=1)
+    gate = asyncio.Event()
+
+    @queue.job("slow")
+    async def slow():
+        await gate.wait()
+
+    assert queue.enqueue("slow")
+    await asyncio.sleep(0)          # воркер забрал первую задачу
+    assert queue.enqueue("slow")    # вторая ждёт в очереди
+    assert not queue.enqueue("slow")
+    gate.set()
+    await queue.stop()
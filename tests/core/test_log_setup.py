@@ -0,0 +1,63 @@
+# tests/core/test_log_setup.py
+import io
+import logging
+import queue
+
+import pytest
+
+from backend.core import log_setup
+from backend.core.log_setup import DroppingQueueHandler, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def clean_root():
+    """Снять настройку, сделанную при импорте backend.main, и вернуть обработчики pytest."""
+    shutdown_logging()
+    root = logging.getLogger()
+    saved, level = root.handlers[:], root.level
+    yield root
+    shutdown_logging()
+    root.handlers[:] = saved
+    root.setLevel(level)
+
+
+def test_full_queue_drops_and_reports():
+    q = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(q)
+    logger = logging.getLogger("test.log_setup.drop")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning("msg %d", i)  # не блокирует, хотя очередь не разбирают
+        assert handler.dropped == 3
+        assert [q.get_nowait().getMessage() for _ in range(2)] == ["msg 0", "msg 1"]
+
+        logger.warning("after")
+        notice, record = q.get_nowait(), q.get_nowait()
+        assert "потеряно записей — 3" in notice.getMessage()
+        assert record.getMessage() == "after"
+    finally:
+        logger.removeHandler(handler)
+
+
+def test_setup_writes_console_and_rotating_file_in_background(clean_root, tmp_path):
+    console = io.StringIO()
+    log_file = tmp_path / "app.log"
+    assert setup_logging(
+        level="INFO", fmt="%(levelname)s %(message)s", stream=console,
+        log_file=str(log_file), max_bytes=1024, backup_count=2, force=True,
+    )
+    # второй вызов (бот / backend под run.py) ничего не меняет
+    assert setup_logging(level="DEBUG") is False
+    assert clean_root.handlers == [log_setup._handler]
+
+    log = logging.getLogger("test.log_setup")
+    log.debug("hidden")
+    for i in range(100):
+        log.info("line %03d %s", i, "x" * 40)
+    shutdown_logging()  # дописывает очередь
+
+    assert "INFO line 099" in console.getvalue() and "hidden" not in console.getvalue()
+    assert "line 099" in log_file.read_text()
+    assert (tmp_path / "app.log.1").exists() and not (tmp_path / "app.log.3").exists()
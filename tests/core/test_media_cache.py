@@ -0,0 +1,93 @@
+# tests/core/test_media_cache.py
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile
+
+from bot.media_cache import MediaCache
+
+
+class _Telegram:
+    """answer_photo: FSInputFile → новый file_id, строка — переотправка по file_id."""
+
+    def __init__(self):
+        self.uploads = 0
+        self.sent = []
+        self.rejected = set()
+        self.error = None
+
+    async def answer_photo(self, photo):
+        await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        if isinstance(photo, FSInputFile):
+            self.uploads += 1
+            file_id = f"file-{self.uploads}"
+        elif photo in self.rejected:
+            raise TelegramBadRequest(method=None, message="wrong file identifier")
+        else:
+            file_id = photo
+        self.sent.append(photo)
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=f"{file_id}-thumb"), SimpleNamespace(file_id=file_id)])
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = tmp_path / "welcome.png"
+    path.write_bytes(b"\x89PNG" + b"\x00" * 64)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_storm_uploads_once_and_persists(tmp_path, photo):
+    tg, store = _Telegram(), tmp_path / "cache.json"
+    cache = MediaCache(store)
+
+    await asyncio.gather(*(cache.send(photo, tg.answer_photo) for _ in range(20)))
+    assert tg.uploads == 1
+    assert tg.sent.count("file-1") == 19
+
+    # после рестарта — сразу file_id из файла
+    restarted = MediaCache(store)
+    assert restarted.get(photo) == "file-1"
+    await restarted.send(photo, tg.answer_photo)
+    assert tg.uploads == 1
+    assert list(json.loads(store.read_text()).values()) == [{"file_id": "file-1", "name": "welcome.png"}]
+
+
+@pytest.mark.asyncio
+async def test_changed_file_or_rejected_id_reuploads(tmp_path, photo):
+    tg = _Telegram()
+    cache = MediaCache(tmp_path / "cache.json")
+    await cache.send(photo, tg.answer_photo)
+
+    photo.write_bytes(b"\x89PNG" + b"\x01" * 65)
+    os.utime(photo, ns=(1, 1))
+    await cache.send(photo, tg.answer_photo)
+    assert tg.uploads == 2 and cache.get(photo) == "file-2"
+
+    tg.rejected.add("file-2")
+    await cache.send(photo, tg.answer_photo)
+    assert tg.uploads == 3 and cache.get(photo) == "file-3"
+
+
+@pytest.mark.asyncio
+async def test_other_bad_request_keeps_cached_id(tmp_path, photo):
+    tg = _Telegram()
+    cache = MediaCache(tmp_path / "cache.json")
+    await cache.send(photo, tg.answer_photo)
+
+    tg.error = TelegramBadRequest(method=None, message="Bad Request: message caption is too long")
+    with pytest.raises(TelegramBadRequest):
+        await cache.send(photo, tg.answer_photo)
+    assert tg.uploads == 1 and cache.get(photo) == "file-1"
+
+
+def test_corrupt_cache_file_is_ignored(tmp_path, photo):
+    store = tmp_path / "cache.json"
+    store.write_text("{not json")
+    assert MediaCache(store).get(photo) is None
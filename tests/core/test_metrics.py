@@ -0,0 +1,84 @@
+# tests/core/test_metrics.py
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from starlette.testclient import TestClient
+
+from backend.core.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_text_exposition_format():
+    reg = Registry()
+    c = reg.register(Counter("jobs_total", "Jobs", ("kind",)))
+    g = reg.register(Gauge("waiters", "Waiters"))
+    h = reg.register(Histogram("lat_seconds", "Latency", ("route",), buckets=(0.1, 1.0)))
+
+    c.inc(kind="a")
+    c.inc(2, kind="a")
+    with g.track():
+        assert g.value() == 1
+    h.observe(0.05, route='/x/"y"')
+    h.observe(0.5, route='/x/"y"')
+    h.observe(5, route='/x/"y"')
+
+    text = reg.expose()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="a"} 3' in text
+    assert "waiters 0" in text
+    assert 'lat_seconds_bucket{route="/x/\\"y\\"",le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{route="/x/\\"y\\"",le="1"} 2' in text
+    assert 'lat_seconds_bucket{route="/x/\\"y\\"",le="+Inf"} 3' in text
+    assert 'lat_seconds_count{route="/x/\\"y\\""} 3' in text
+
+
+def test_gauge_callback_is_evaluated_on_scrape():
+    reg = Registry()
+    g = reg.register(Gauge("conns", "Connections", ("kind",)))
+    g.set_function(lambda: [({"kind": "user"}, 7)])
+    assert 'conns{kind="user"} 7' in reg.expose()
+
+
+def test_metrics_endpoint_reports_route_templates():
+    from backend.main import app
+
+    client = TestClient(app)
+    assert client.get("/api/health/").status_code == 200
+    client.get("/api/messages/42")  # 401, но маршрут найден
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'route="/api/health/"' in r.text
+    assert 'route="/api/messages/{order_id}",status="401"' in r.text
+    assert 'ws_connections{kind="user"} 0' in r.text
+
+
+def test_route_template_uses_route_path_format():
+    from starlette.routing import Route
+
+    from backend.core.middleware import route_template
+
+    # значение параметра совпадает с литеральным сегментом пути
+    route = Route("/orders/{name}", lambda request: None)
+    scope = {"path": "/api/orders/orders", "route": route, "path_params": {"name": "orders"}}
+    assert route_template(scope) == "/api/orders/{name}"
+    route = Route("/{name}", lambda request: None)  # роутер с префиксом /api/orders
+    scope = {"path": "/api/orders/orders", "route": route, "path_params": {"name": "orders"}}
+    assert route_template(scope) == "/api/orders/{name}"
+    assert route_template({"path": "/wp-admin"}) == "unmatched"
+
+
+def test_failed_statement_does_not_leave_timing_entry():
+    from backend.core.database import _instrument_queries
+
+    # только слушатели запросов: gauge пула процесса тест не трогает
+    engine = create_engine("sqlite://")
+    _instrument_queries(engine)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            assert conn.info["query_started"] == []
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+            assert conn.info["query_started"] == []
+    finally:
+        engine.dispose()
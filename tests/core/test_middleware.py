@@ -0,0 +1,156 @@
+# tests/core/test_middleware.py
+import gzip
+import json
+import logging
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from backend.core.middleware import (
+    CompressionMiddleware,
+    RequestLogMiddleware,
+    is_suspicious_path,
+    is_suspicious_user_agent,
+    next_request_id,
+)
+
+
+async def _ok(request):
+    return JSONResponse({"request_id": request.state.request_id})
+
+
+async def _missing(request):
+    return PlainTextResponse("nope", status_code=404)
+
+
+async def _stream(request):
+    async def gen():
+        for chunk in (b"a", b"b", b"c"):
+            yield chunk
+    return StreamingResponse(gen())
+
+
+def _make_app(sample_rate: float = 1.0) -> RequestLogMiddleware:
+    app = Starlette(routes=[
+        Route("/api/ok", _ok),
+        Route("/missing", _missing),
+        Route("/stream", _stream),
+    ])
+    return RequestLogMiddleware(
+        app, sample_rate=sample_rate, frame_ancestors=["https://web.telegram.org"]
+    )
+
+
+def _client(app) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_request_ids_are_monotonic():
+    first, second = next_request_id(), next_request_id()
+    assert first != second
+    assert int(second.rsplit("-", 1)[1], 16) == int(first.rsplit("-", 1)[1], 16) + 1
+
+
+def test_suspicious_matchers_are_case_insensitive():
+    assert is_suspicious_path("/WP-Admin/setup.php")
+    assert not is_suspicious_path("/api/products")
+    assert is_suspicious_user_agent("Mozilla/5.0 SQLMap/1.7")
+    assert not is_suspicious_user_agent("TelegramBot (like TwitterBot)")
+
+
+@pytest.mark.asyncio
+async def test_headers_and_request_id_in_state():
+    async with _client(_make_app()) as ac:
+        r = await ac.get("/api/ok")
+    assert r.status_code == 200
+    assert r.headers["x-request-id"] == r.json()["request_id"]
+    assert "x-process-time" in r.headers
+    assert r.headers["cache-control"] == "no-cache, no-store, must-revalidate"
+    assert "https://web.telegram.org" in r.headers["content-security-policy"]
+    assert r.headers["x-content-type-options"] == "nosniff"
+
+
+@pytest.mark.asyncio
+async def test_streaming_passes_through():
+    async with _client(_make_app()) as ac:
+        r = await ac.get("/stream")
+    assert r.content == b"abc"
+    assert "cache-control" not in r.headers  # не /api
+
+
+@pytest.mark.asyncio
+async def test_sampling_skips_2xx_but_keeps_errors(caplog):
+    caplog.set_level(logging.INFO, logger="middleware")
+    async with _client(_make_app(sample_rate=0.0)) as ac:
+        await ac.get("/api/ok")
+        await ac.get("/missing")
+
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "middleware"]
+    assert [r["status"] for r in records] == [404]
+    assert records[0]["path"] == "/missing"
+
+
+# ─────────────────────────── сжатие ───────────────────────────────
+_ITEMS = [{"id": i, "title": f"Расклад #{i}", "description": "Подробное описание " * 5} for i in range(50)]
+
+
+async def _items(request):
+    return JSONResponse(_items_payload(request))
+
+
+def _items_payload(request):
+    return _ITEMS if request.query_params.get("size") != "small" else [_ITEMS[0]]
+
+
+async def _api_stream(request):
+    async def gen():
+        for _ in range(3):
+            yield json.dumps(_ITEMS).encode()
+    return StreamingResponse(gen(), media_type="application/json")
+
+
+def _compressing_app(**kwargs) -> CompressionMiddleware:
+    app = Starlette(routes=[
+        Route("/api/items", _items),
+        Route("/api/messages/1/poll", _items),
+        Route("/api/stream", _api_stream),
+        Route("/items", _items),
+    ])
+    return CompressionMiddleware(app, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_json_is_gzipped_when_accepted():
+    async with _client(_compressing_app()) as ac:
+        r = await ac.get("/api/items", headers={"accept-encoding": "gzip"})
+        plain = await ac.get("/api/items", headers={"accept-encoding": "identity"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) < len(plain.content) / 3
+    assert r.json() == plain.json() == _ITEMS  # httpx распаковывает сам
+    assert "content-encoding" not in plain.headers
+
+
+@pytest.mark.asyncio
+async def test_small_streaming_and_excluded_responses_untouched():
+    async with _client(_compressing_app(exclude=r"/poll$")) as ac:
+        small = await ac.get("/api/items?size=small", headers={"accept-encoding": "gzip"})
+        poll = await ac.get("/api/messages/1/poll", headers={"accept-encoding": "gzip"})
+        stream = await ac.get("/api/stream", headers={"accept-encoding": "gzip"})
+        outside = await ac.get("/items", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in poll.headers
+    assert "content-encoding" not in stream.headers
+    assert stream.content == json.dumps(_ITEMS).encode() * 3
+    assert "content-encoding" not in outside.headers
+
+
+@pytest.mark.asyncio
+async def test_compression_level_is_configurable():
+    async with _client(_compressing_app(levels={"gzip": 1}, thread_size=0)) as ac:
+        r = await ac.get("/api/items", headers={"accept-encoding": "gzip"})
+    raw = json.dumps(_ITEMS, ensure_ascii=False, separators=(",", ":")).encode()
+    assert int(r.headers["content-length"]) == len(gzip.compress(raw, compresslevel=1, mtime=0))
@@ -0,0 +1,70 @@
+# tests/core/test_query_stats.py
+"""Сборщик SQL-статистики без БД: statement-ы подаются через record()."""
+import json
+import logging
+
+import pytest
+
+from backend.core import query_stats
+from backend.core.query_stats import assert_max_queries, record, track
+
+
+def test_record_outside_track_is_noop():
+    assert query_stats.current() is None
+    record("SELECT 1", 0.001)
+
+
+def test_nested_track_propagates_to_parent():
+    with track(route="/outer") as outer:
+        record("SELECT 1", 0.002)
+        with track() as inner:
+            record("SELECT 2", 0.003)
+        assert query_stats.current() is outer
+    assert inner.count == 1
+    assert outer.count == 2
+    assert outer.total_time == pytest.approx(0.005)
+    assert query_stats.current() is None
+
+
+def test_repeated_statements_detected():
+    with track() as stats:
+        for _ in range(5):
+            record("SELECT * FROM products WHERE id = $1", 0.001)
+        record("SELECT * FROM categories", 0.001)
+    assert stats.repeated(5) == [("SELECT * FROM products WHERE id = $1", 5)]
+    assert stats.repeated(6) == []
+
+
+def test_assert_max_queries_budget():
+    with assert_max_queries(2):
+        record("SELECT 1", 0.0)
+        record("SELECT 2", 0.0)
+
+    with pytest.raises(AssertionError, match="3 statements > budget 2"):
+        with assert_max_queries(2):
+            for i in range(3):
+                record(f"SELECT {i}", 0.0)
+
+
+def test_assert_max_queries_repeats():
+    with pytest.raises(AssertionError, match="repeated 3×"):
+        with assert_max_queries(10, max_repeats=2):
+            for _ in range(3):
+                record("SELECT * FROM users WHERE id = $1", 0.0)
+
+
+def test_slow_query_logged_with_route(caplog):
+    query_stats.configure(slow_query_ms=10, repeat_threshold=5)
+    try:
+        with caplog.at_level(logging.WARNING, logger="db.queries"):
+            with track(route="/api/products", request_id="1-a"):
+                record("SELECT fast", 0.001)
+                record("SELECT\n   slow", 0.05)
+    finally:
+        query_stats.configure(slow_query_ms=0, repeat_threshold=5)
+
+    [line] = [json.loads(r.getMessage()) for r in caplog.records]
+    assert line["event"] == "slow_query"
+    assert line["route"] == "/api/products"
+    assert line["request_id"] == "1-a"
+    assert line["statement"] == "SELECT slow"
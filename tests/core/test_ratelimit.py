@@ -0,0 +1,161 @@
+# tests/core/test_ratelimit.py
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from backend.core.middleware import RateLimitMiddleware
+from backend.core.ratelimit import Budget, MemoryRateLimitStore, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_burst_then_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == 0.5
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0
+    assert not bucket.idle
+    clock.now += 10
+    assert bucket.idle
+
+
+def test_pause_blocks_and_empties_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=5, clock=clock)
+    bucket.pause(3)
+    assert bucket.try_acquire() == 3
+    clock.now += 3
+    assert bucket.try_acquire() == 1.0   # запас обнулён паузой
+    clock.now += 1
+    assert bucket.try_acquire() == 0
+
+
+# ─────────────────────── лимиты HTTP-запросов ───────────────────────
+def test_budget_parse():
+    assert Budget.parse("120/60") == Budget(120, 60.0)
+    assert Budget.parse("120/60").rate == 2
+    with pytest.raises(ValueError):
+        Budget.parse("0/60")
+    with pytest.raises(ValueError):
+        Budget.parse("fast")
+
+
+@pytest.mark.asyncio
+async def test_memory_store_decisions_and_eviction():
+    clock = FakeClock()
+    store = MemoryRateLimitStore(max_keys=2, clock=clock)
+    budget = Budget(2, 10)  # 0.2 токена/с
+    first, second, third = [await store.hit("a", budget) for _ in range(3)]
+    assert (first.allowed, first.remaining) == (True, 1)
+    assert (second.allowed, second.remaining, second.reset) == (True, 0, 10)
+    assert not third.allowed and third.retry_after == 5
+    assert third.headers()["Retry-After"] == "5"
+    assert third.headers()["X-RateLimit-Limit"] == "2"
+
+    clock.now += 100
+    await store.hit("b", budget)
+    await store.hit("c", budget)  # «a» снова полон — выброшен первым
+    assert len(store) == 2 and (await store.hit("a", budget)).remaining == 1
+
+
+def _limited_app(**kwargs) -> RateLimitMiddleware:
+    async def ok(request):
+        return JSONResponse({"auth": request.scope.get("state", {}).get("telegram_auth") is not None})
+
+    app = Starlette(routes=[
+        Route("/api/products", ok),
+        Route("/api/orders/", ok, methods=["POST"]),
+        Route("/api/payments/{order_id}/wait", ok),
+        Route("/api/payments/webhook", ok, methods=["POST"]),
+        Route("/health", ok),
+    ])
+    return RateLimitMiddleware(
+        app,
+        budgets={"read": Budget(2, 60), "write": Budget(1, 60), "poll": Budget(5, 60)},
+        exempt=("/api/payments/webhook",),
+        **kwargs,
+    )
+
+
+def _client(app) -> AsyncClient:
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_middleware_headers_and_429():
+    async with _client(_limited_app()) as client:
+        ok = await client.get("/api/products")
+        assert ok.headers["X-RateLimit-Limit"] == "2"
+        assert ok.headers["X-RateLimit-Remaining"] == "1"
+        await client.get("/api/products")
+        limited = await client.get("/api/products")
+        assert limited.status_code == 429
+        assert int(limited.headers["Retry-After"]) == 30
+        assert limited.json()["detail"]
+
+        # свой бюджет у каждого класса; вебхуки и пути вне /api не лимитируются
+        assert (await client.post("/api/orders/")).status_code == 200
+        assert (await client.post("/api/orders/")).status_code == 429
+        assert (await client.get("/api/payments/7/wait")).headers["X-RateLimit-Limit"] == "5"
+        for _ in range(3):
+            hook = await client.post("/api/payments/webhook")
+            assert hook.status_code == 200 and "X-RateLimit-Limit" not in hook.headers
+        assert "X-RateLimit-Limit" not in (await client.get("/health")).headers
+
+
+@pytest.mark.asyncio
+async def test_middleware_keys_by_telegram_id_and_shares_auth_result():
+    def authenticate(init_data):
+        return (True, {"id": int(init_data)}) if init_data.isdigit() else (False, None)
+
+    async with _client(_limited_app(authenticate=authenticate)) as client:
+        for _ in range(2):
+            resp = await client.get("/api/products", headers={"X-Telegram-Init-Data": "1"})
+            assert resp.json() == {"auth": True}
+        assert (await client.get("/api/products", headers={"X-Telegram-Init-Data": "1"})).status_code == 429
+        # другой пользователь с того же IP — свой бакет
+        assert (await client.get("/api/products", headers={"X-Telegram-Init-Data": "2"})).status_code == 200
+        # невалидный initData — лимит по IP
+        assert (await client.get("/api/products", headers={"X-Telegram-Init-Data": "x"})).status_code == 200
+        assert (await client.get("/api/products")).status_code == 200
+        assert (await client.get("/api/products")).status_code == 429
+
+
+def test_cors_exposes_rate_limit_headers():
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    resp = TestClient(app).get("/health", headers={"Origin": "https://web.telegram.org"})
+    exposed = {h.strip().lower() for h in resp.headers["access-control-expose-headers"].split(",")}
+    assert {"retry-after", "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"} <= exposed
+
+
+def test_client_ip_trusts_forwarded_headers_only_from_proxies():
+    mw = RateLimitMiddleware(
+        None, budgets={},
+        trusted_proxies=["10.0.0.0/8", "::1"], cloudflare_proxies=["173.245.48.0/20"],
+    )
+
+    def scope(peer, **headers):
+        return {"client": (peer, 1234), "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]}
+
+    assert mw.client_ip(scope("10.0.0.2", x_forwarded_for="1.1.1.1, 203.0.113.7, 10.0.0.9")) == "203.0.113.7"
+    assert mw.client_ip(scope("10.0.0.2")) == "10.0.0.2"
+    # не прокси — заголовкам не верим, иначе лимит обходится подделкой
+    assert mw.client_ip(scope("198.51.100.1", cf_connecting_ip="203.0.113.5")) == "198.51.100.1"
+    # nginx пропускает CF-Connecting-IP клиента как есть — без Cloudflare в цепочке он не в счёт
+    assert mw.client_ip(scope("10.0.0.2", cf_connecting_ip="203.0.113.5", x_forwarded_for="198.51.100.1")) == "198.51.100.1"
+    # Cloudflare напрямую и Cloudflare → nginx
+    assert mw.client_ip(scope("173.245.48.1", cf_connecting_ip="203.0.113.5")) == "203.0.113.5"
+    assert mw.client_ip(scope("10.0.0.2", cf_connecting_ip="203.0.113.5", x_forwarded_for="6.6.6.6, 173.245.48.1")) == "203.0.113.5"
@@ -0,0 +1,54 @@
+# tests/core/test_serialization.py
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.core.serialization import json_response, rows_to_dicts, type_adapter, unflatten
+from backend.schemas.message import MessageOut
+from backend.schemas.order import OrderDetail
+
+NOW = datetime(2025, 7, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_type_adapter_cached():
+    assert type_adapter(list[MessageOut]) is type_adapter(list[MessageOut])
+
+
+def test_unflatten_nested_and_null_join():
+    assert unflatten({"id": 1, "product__id": 2, "product__title": "x"}) == {
+        "id": 1, "product": {"id": 2, "title": "x"},
+    }
+    assert unflatten({"id": 1, "product__id": None}) == {"id": 1, "product": None}
+
+
+def test_json_response_matches_response_model_output():
+    row = {
+        "id": 5, "user_id": 1, "product_id": 3, "quantity": 1,
+        "price": Decimal("10.00"), "total": Decimal("10.00"), "status": "paid",
+        "created_at": NOW,
+        "product__id": 3, "product__category_id": 1, "product__title": "Таро",
+        "product__price": 10.0, "product__description": None,
+        "product__image_url": "https://cdn.example.com/a.jpg", "product__created_at": NOW,
+    }
+    fast = json_response(list[OrderDetail], rows_to_dicts([row]))
+    assert fast.media_type == "application/json"
+
+    # обычный путь: эндпоинт отдаёт «ORM-объекты», FastAPI валидирует их
+    # через response_model с from_attributes и кодирует сам
+    order = unflatten(row)
+    orm_row = SimpleNamespace(**{**order, "product": SimpleNamespace(**order["product"])})
+    app = FastAPI()
+
+    @app.get("/orders", response_model=list[OrderDetail])
+    def orders():
+        return [orm_row]
+
+    slow = TestClient(app).get("/orders")
+    assert fast.body == slow.content
+    body = json.loads(fast.body)
+    assert body[0]["product"]["title"] == "Таро"
+    assert body[0]["messages"] == [] and body[0]["total"] == "10.00"
@@ -0,0 +1,68 @@
+# tests/core/test_singleflight.py
+import asyncio
+
+import pytest
+
+from backend.core.singleflight import SingleFlight
+
+
+class _Query:
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result, self.error = result, error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_query():
+    flight, query = SingleFlight("test"), _Query(result=[1, 2])
+    tasks = [asyncio.create_task(flight.do(("products", 0, 100), query)) for _ in range(10)]
+    other_query = _Query(result=[])
+    other = asyncio.create_task(flight.do(("products", 100, 100), other_query))
+    await asyncio.sleep(0)
+    assert flight.in_flight() == 2
+
+    query.release.set()
+    results = await asyncio.gather(*tasks)
+    assert query.calls == 1 and all(r is results[0] for r in results)
+    other_query.release.set()
+    assert await other == []
+
+    # не кэш: после завершения следующий вызов снова выполняет запрос
+    await asyncio.sleep(0)
+    assert ("products", 0, 100) not in flight._calls
+    assert await flight.do(("products", 0, 100), query) == [1, 2]
+    assert query.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter():
+    flight, query = SingleFlight("test"), _Query(error=RuntimeError("db down"))
+    tasks = [asyncio.create_task(flight.do("stats", query)) for _ in range(3)]
+    await asyncio.sleep(0)
+    query.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert query.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_query():
+    flight, query = SingleFlight("test"), _Query(result="ok")
+    leader = asyncio.create_task(flight.do("stats", query))
+    follower = asyncio.create_task(flight.do("stats", query))
+    await asyncio.sleep(0)
+
+    leader.cancel()  # клиент первого запроса закрыл соединение
+    await asyncio.sleep(0)
+    query.release.set()
+    assert await follower == "ok"
+    assert leader.cancelled() and query.calls == 1
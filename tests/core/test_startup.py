@@ -0,0 +1,58 @@
+"""Время импорта backend.main и сигнал готовности для systemd."""
+import os
+import re
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from backend.utils.systemd import sd_notify
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# С запасом: на dev-машине ~1 с, раньше (aiogram при импорте) было ~4.6 с
+IMPORT_BUDGET_US = 2_500_000
+
+
+def test_backend_import_is_lazy_and_within_budget():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "import sys, backend.main; print('aiogram' in sys.modules)"],
+        cwd=ROOT, env={**os.environ}, capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    assert proc.stdout.strip().splitlines()[-1] == "False", "aiogram импортируется при старте API"
+
+    line = next(l for l in proc.stderr.splitlines() if re.search(r"\|\s+backend\.main$", l))
+    cumulative_us = int(line.split("|")[1])
+    assert cumulative_us < IMPORT_BUDGET_US, line
+
+
+def test_sd_notify_without_socket(monkeypatch):
+    monkeypatch.delenv("NOTIFY_SOCKET", raising=False)
+    assert sd_notify("READY=1") is False
+
+
+def test_sd_notify_sends_datagram(tmp_path, monkeypatch):
+    path = str(tmp_path / "notify.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as server:
+        server.bind(path)
+        server.settimeout(1)
+        monkeypatch.setenv("NOTIFY_SOCKET", path)
+
+        assert sd_notify("READY=1") is True
+        assert server.recv(64) == b"READY=1"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="abstract namespace — только Linux")
+def test_sd_notify_abstract_socket(monkeypatch):
+    name = f"magic-app-test-{os.getpid()}"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as server:
+        server.bind("\0" + name)
+        server.settimeout(1)
+        monkeypatch.setenv("NOTIFY_SOCKET", "@" + name)
+
+        assert sd_notify("STOPPING=1") is True
+        assert server.recv(64) == b"STOPPING=1"
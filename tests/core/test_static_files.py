@@ -0,0 +1,96 @@
+import gzip
+import os
+
+import pytest
+
+from backend.core.compression import choose_encoding, parse_accept_encoding
+from backend.core.static_files import IMMUTABLE, REVALIDATE, FrontendBundle, precompress
+
+INDEX = b"<!doctype html><html><head><title>Magic</title></head><body>" + b"<div></div>" * 300 + b"</body></html>"
+BUNDLE = b"console.log('magic');\n" * 200
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(INDEX)
+    (tmp_path / "assets" / "index-3f9a1c2b.js").write_bytes(BUNDLE)
+    (tmp_path / "assets" / "logo-Ab12_x9Z.png").write_bytes(b"\x89PNG" + os.urandom(2048))
+    (tmp_path / "vite.svg").write_bytes(b"<svg/>")
+    return tmp_path
+
+
+def test_accept_encoding_negotiation():
+    assert parse_accept_encoding("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert choose_encoding("gzip, deflate", ("br", "gzip")) == "gzip"
+    assert choose_encoding("br;q=0.9, gzip", ("br", "gzip")) == "gzip"
+    assert choose_encoding("gzip;q=0", ("gzip",)) is None
+    assert choose_encoding("*", ("br", "gzip")) == "br"
+    assert choose_encoding(None, ("gzip",)) is None
+
+
+def test_index_served_from_memory_with_gzip(dist):
+    bundle = FrontendBundle(dist)
+    bundle.load()
+    (dist / "index.html").unlink()  # диск больше не читается
+
+    plain = bundle.serve("index.html", {})
+    assert plain.body == INDEX
+    assert plain.headers["cache-control"] == REVALIDATE
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in plain.headers
+
+    packed = bundle.serve("index.html", {"accept-encoding": "gzip, deflate"})
+    assert packed.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(packed.body) == INDEX
+    assert packed.headers["etag"] != plain.headers["etag"]
+
+
+def test_hashed_assets_are_immutable(dist):
+    bundle = FrontendBundle(dist)
+    assert bundle.serve("assets/index-3f9a1c2b.js", {}).headers["cache-control"] == IMMUTABLE
+    # png не сжимается и без Vary
+    png = bundle.serve("assets/logo-Ab12_x9Z.png", {"accept-encoding": "gzip"})
+    assert png.headers["cache-control"] == IMMUTABLE
+    assert "content-encoding" not in png.headers and "vary" not in png.headers
+    assert bundle.serve("vite.svg", {}).headers["cache-control"] == REVALIDATE
+    assert bundle.serve("assets/missing.js", {}) is None
+
+
+def test_etag_revalidation(dist):
+    bundle = FrontendBundle(dist)
+    first = bundle.serve("index.html", {"accept-encoding": "gzip"})
+    etag = first.headers["etag"]
+
+    again = bundle.serve("index.html", {"accept-encoding": "gzip", "if-none-match": f"W/{etag}"})
+    assert again.status_code == 304 and again.body == b""
+    assert again.headers["etag"] == etag
+
+    # ETag gzip-варианта не подходит к несжатому ответу
+    assert bundle.serve("index.html", {"if-none-match": etag}).status_code == 200
+
+
+def test_head_has_length_but_no_body(dist):
+    response = FrontendBundle(dist).serve("assets/index-3f9a1c2b.js", {}, "HEAD")
+    assert response.body == b""
+    assert response.headers["content-length"] == str(len(BUNDLE))
+
+
+def test_precompressed_siblings_are_used(dist):
+    assert precompress(dist) >= 2
+    sibling = dist / "assets" / "index-3f9a1c2b.js.gz"
+    assert gzip.decompress(sibling.read_bytes()) == BUNDLE
+    sibling.write_bytes(gzip.compress(BUNDLE, compresslevel=1))  # «собранный» вариант
+
+    bundle = FrontendBundle(dist)
+    stats = bundle.load()
+    assert stats["files"] == 4  # *.gz не попадают в индекс отдельными файлами
+    response = bundle.serve("assets/index-3f9a1c2b.js", {"accept-encoding": "gzip"})
+    assert response.body == sibling.read_bytes()
+
+
+def test_large_files_stay_on_disk(dist):
+    bundle = FrontendBundle(dist, max_file_size=1024)
+    response = bundle.serve("assets/index-3f9a1c2b.js", {"accept-encoding": "gzip"})
+    assert response.path == dist / "assets" / "index-3f9a1c2b.js"
+    assert response.headers["cache-control"] == IMMUTABLE
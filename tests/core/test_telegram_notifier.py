@@ -0,0 +1,99 @@
+# tests/core/test_telegram_notifier.py
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from backend.services.telegram_notifier import TelegramNotifier
+
+
+class StubBot:
+    """Вместо Telegram: пишет отправленное, умеет отвечать заданными ошибками."""
+
+    def __init__(self, errors=()):
+        self.sent: list[tuple[int, str]] = []
+        self.errors = list(errors)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+def _notifier(bot, **kw):
+    kw.setdefault("coalesce_window", 0.05)
+    return TelegramNotifier(bot, **kw)
+
+
+@pytest.mark.asyncio
+async def test_replies_to_one_chat_are_coalesced():
+    bot = StubBot()
+    notifier = _notifier(bot)
+    for _ in range(3):
+        notifier.notify_reply(42, order_id=7, product_title="Таро")
+    notifier.notify_reply(43, order_id=8, product_title="Руны")
+    await notifier.close()
+
+    assert sorted(bot.sent) == [
+        (42, "💬 Новые ответы администратора в чате «Таро»: 3."),
+        (43, "💬 Администратор ответил в чате «Руны»."),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_without_waiting_for_window():
+    bot = StubBot()
+    notifier = _notifier(bot, coalesce_window=30)
+    notifier.notify_reply(1, order_id=1)
+    notifier.notify_reply(1, order_id=2)
+    await asyncio.wait_for(notifier.close(), 1)
+    assert bot.sent == [(1, "💬 Новые ответы администратора: 2 (чатов: 2).")]
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_replies_that_arrive_while_sending():
+    class ReplyingBot(StubBot):
+        async def send_message(self, chat_id, text, **kwargs):
+            if not self.sent:  # ответ пришёл, пока уходило первое уведомление
+                notifier.notify_reply(1, order_id=2)
+            await super().send_message(chat_id, text, **kwargs)
+
+    bot = ReplyingBot()
+    notifier = _notifier(bot, coalesce_window=30, per_chat_interval=0.01)
+    notifier.notify_reply(1, order_id=1)
+    await asyncio.wait_for(notifier.close(), 1)
+    assert len(bot.sent) == 2 and notifier._flushers == {}
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_and_resends():
+    flood = TelegramRetryAfter(SendMessage(chat_id=5, text="x"), "Too Many Requests", 0)
+    bot = StubBot(errors=[flood])
+    notifier = _notifier(bot)
+    notifier.notify_reply(5, order_id=1, product_title="Таро")
+    await notifier.close()
+    assert bot.sent == [(5, "💬 Администратор ответил в чате «Таро».")]
+
+
+@pytest.mark.asyncio
+async def test_blocked_user_is_skipped():
+    blocked = TelegramForbiddenError(SendMessage(chat_id=5, text="x"), "bot was blocked by the user")
+    bot = StubBot(errors=[blocked])
+    notifier = _notifier(bot)
+    notifier.notify_reply(5, order_id=1)
+    await notifier.close()
+    assert bot.sent == []
+
+
+@pytest.mark.asyncio
+async def test_global_rate_spreads_sends():
+    bot = StubBot()
+    notifier = _notifier(bot, global_rate=20, coalesce_window=0)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for chat in range(25):          # 20 — сразу из запаса, ещё 5 — по 1/20 с
+        notifier.notify_reply(chat, order_id=chat)
+    await notifier.close()
+    assert len(bot.sent) == 25
+    assert loop.time() - started >= 0.2
@@ -0,0 +1,59 @@
+# tests/services/test_admin_messages_stream.py
+
+import pytest
+
+from backend.models.category import Category
+from backend.models.message import Message
+from backend.models.order import Order
+from backend.models.product import Product
+from backend.models.user import User
+from backend.services.crud import message_extra_crud
+
+
+async def _seed(db, n_messages: int = 7) -> Order:
+    user = User(telegram_id=777001, username="reader")
+    category = Category(name="Стрим")
+    db.add_all([user, category])
+    await db.flush()
+    product = Product(category_id=category.id, title="Расклад", price=100)
+    db.add(product)
+    await db.flush()
+    order = Order(user_id=user.id, product_id=product.id, quantity=1, price=100, total=100)
+    db.add(order)
+    await db.flush()
+    db.add_all(
+        Message(order_id=order.id, user_id=user.id, content=f"m{i}", is_read=i % 2 == 0)
+        for i in range(n_messages)
+    )
+    await db.commit()
+    return order
+
+
+@pytest.mark.asyncio
+async def test_admin_messages_keyset_pages(async_session_fixture):
+    await _seed(async_session_fixture)
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = await message_extra_crud.get_admin_messages_page(
+            async_session_fixture, after=cursor, limit=3,
+        )
+        seen += [m.content for m in items]
+        if cursor is None:
+            break
+    assert seen == [f"m{i}" for i in range(7)]
+    assert {m.user_name for m in items} == {"reader"}
+    assert {m.product_title for m in items} == {"Расклад"}
+
+
+@pytest.mark.asyncio
+async def test_stream_admin_messages_filters_in_sql(async_session_fixture):
+    order = await _seed(async_session_fixture)
+
+    unread = [
+        m.content
+        async for m in message_extra_crud.stream_admin_messages(
+            async_session_fixture, chunk_size=2, order_id=order.id, is_read=False,
+        )
+    ]
+    assert unread == ["m1", "m3", "m5"]
@@ -0,0 +1,41 @@
+# tests/services/test_bulk_import.py
+import pytest
+from sqlalchemy import func, select
+
+from backend.models.category import Category
+from backend.models.product import Product
+from backend.services.bulk import import_products
+
+
+async def _records(rows):
+    for i, row in enumerate(rows, start=1):
+        yield i, row
+
+
+@pytest.mark.asyncio
+async def test_import_products_batches_and_upserts(async_session_fixture):
+    db = async_session_fixture
+    rows = [
+        {"title": f"Товар {i}", "price": 10 + i, "category": f"Кат {i % 3}"}
+        for i in range(7)
+    ]
+    rows.append({"title": "без категории", "price": 1})
+
+    report = await import_products(db, _records(rows), batch_size=3)
+    assert report.received == 8
+    assert report.inserted == 7
+    assert report.failed == 1 and report.errors[0].line == 8
+    assert report.categories_created == 3
+    assert report.batches == 3
+
+    product = (await db.execute(select(Product).where(Product.title == "Товар 0"))).scalar_one()
+    upsert = [
+        {"id": product.id, "title": "Товар 0 (новый)", "price": 99, "category": "Кат 0"},
+        {"title": "Новый", "price": 5, "category_id": product.category_id},
+    ]
+    report = await import_products(db, _records(upsert))
+    assert (report.inserted, report.updated, report.categories_created) == (1, 1, 0)
+
+    db.expire_all()
+    assert (await db.get(Product, product.id)).title == "Товар 0 (новый)"
+    assert await db.scalar(select(func.count()).select_from(Category)) == 3
@@ -0,0 +1,68 @@
+# tests/services/test_change_feed.py
+
+import pytest
+
+from backend.models.category import Category
+from backend.models.message import Message
+from backend.models.order import Order
+from backend.models.product import Product
+from backend.models.user import User
+from backend.services.change_feed import change_feed
+
+
+async def _orders(db):
+    alice = User(telegram_id=889001, username="alice")
+    bob = User(telegram_id=889002, username="bob")
+    category = Category(name="Журнал")
+    db.add_all([alice, bob, category])
+    await db.flush()
+    product = Product(category_id=category.id, title="Расклад", price=100)
+    db.add(product)
+    await db.flush()
+    orders = [
+        Order(user_id=owner.id, product_id=product.id, quantity=1, price=100, total=100)
+        for owner in (alice, bob)
+    ]
+    db.add_all(orders)
+    await db.commit()
+    return alice, bob, orders
+
+
+@pytest.mark.asyncio
+async def test_record_and_range_scan(async_session_fixture):
+    db = async_session_fixture
+    alice, bob, (a_order, b_order) = await _orders(db)
+    start = await change_feed.head(db)
+
+    msg = Message(order_id=a_order.id, user_id=alice.id, content="привет")
+    db.add(msg)
+    await db.flush()
+    first = await change_feed.record(db, "new_message", order_id=a_order.id, message_id=msg.id)
+    # владелец заказа берётся из БД, если вызывающий его не передал
+    assert first.owner_id == alice.id
+    await change_feed.record(db, "new_message", order_id=b_order.id, owner_id=bob.id)
+    await change_feed.record(db, "message_replied", order_id=a_order.id, data={"reply": "ok"})
+    await db.commit()
+
+    rows = await change_feed.since(db, start)
+    assert [r["id"] for r in rows] == sorted(r["id"] for r in rows)
+    assert [(r["type"], r["order_id"]) for r in rows] == [
+        ("new_message", a_order.id),
+        ("new_message", b_order.id),
+        ("message_replied", a_order.id),
+    ]
+    assert await change_feed.head(db) == rows[-1]["id"]
+
+    mine = await change_feed.since(db, start, owner_id=alice.id)
+    assert [r["type"] for r in mine] == ["new_message", "message_replied"]
+    assert mine[0]["message_id"] == msg.id and mine[1]["data"] == {"reply": "ok"}
+    # курсор = id последнего полученного: дальше только новое
+    assert await change_feed.since(db, mine[-1]["id"], owner_id=alice.id) == []
+    assert [r["order_id"] for r in await change_feed.since(db, start, order_ids=[b_order.id])] == [b_order.id]
+    assert len(await change_feed.since(db, start, limit=2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_change_type_is_rejected(async_session_fixture):
+    with pytest.raises(ValueError):
+        await change_feed.record(async_session_fixture, "typing", order_id=1)
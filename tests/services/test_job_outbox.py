@@ -0,0 +1,54 @@
+# tests/services/test_job_outbox.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from backend.core.jobs import JobQueue
+from backend.models.job_outbox import JobOutbox
+
+
+@pytest.mark.asyncio
+async def test_recover_takes_rows_without_live_lease(async_session_fixture):
+    db = async_session_fixture
+    queue, done = JobQueue(workers=1, outbox=True), []
+
+    @queue.job("outbox.test")
+    async def handler(n):
+        done.append(n)
+
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        JobOutbox(name="outbox.test", payload={"n": 1}),  # аренду отпустил остановленный процесс
+        JobOutbox(name="outbox.test", payload={"n": 2}, locked_until=now - timedelta(seconds=1)),  # упавший
+        JobOutbox(name="outbox.test", payload={"n": 3}, locked_until=now + timedelta(minutes=5)),  # живой
+        JobOutbox(name="outbox.test", payload={"n": 4}, attempts=queue.max_attempts),  # исчерпал попытки
+    ])
+    await db.commit()
+
+    assert await queue.recover() == 2
+    await asyncio.wait_for(queue.join(), 2)
+    assert sorted(done) == [1, 2]
+    left = (await db.execute(select(JobOutbox.payload).order_by(JobOutbox.id))).scalars().all()
+    assert left == [{"n": 3}, {"n": 4}]
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_releases_lease_of_unfinished_jobs(async_session_fixture):
+    db = async_session_fixture
+    queue, gate = JobQueue(workers=1, outbox=True), asyncio.Event()
+
+    @queue.job("outbox.slow")
+    async def slow():
+        await gate.wait()
+
+    db.add(JobOutbox(name="outbox.slow", payload={}))
+    await db.commit()
+    assert await queue.recover() == 1
+    assert await queue.recover() == 0  # своя аренда продлена, второй раз не берём
+
+    await queue.stop(timeout=0.05)
+    db.expire_all()
+    assert (await db.execute(select(JobOutbox.locked_until))).scalar_one() is None
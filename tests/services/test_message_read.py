@@ -0,0 +1,76 @@
+# tests/services/test_message_read.py
+
+import pytest
+from sqlalchemy import select
+
+from backend.models.category import Category
+from backend.models.message import Message
+from backend.models.order import Order
+from backend.models.product import Product
+from backend.models.user import User
+from backend.services.crud import count_unread_messages, message_extra_crud
+
+
+async def _chat(db):
+    customer = User(telegram_id=888001, username="customer")
+    admin = User(telegram_id=888002, username="admin", is_admin=True)
+    category = Category(name="Чаты")
+    db.add_all([customer, admin, category])
+    await db.flush()
+    product = Product(category_id=category.id, title="Расклад", price=100)
+    db.add(product)
+    await db.flush()
+    order = Order(user_id=customer.id, product_id=product.id, quantity=1, price=100, total=100)
+    db.add(order)
+    await db.flush()
+    msgs = [
+        Message(order_id=order.id, user_id=customer.id if i % 2 == 0 else admin.id, content=f"m{i}")
+        for i in range(6)
+    ]
+    db.add_all(msgs)
+    await db.commit()
+    return order, msgs
+
+
+async def _unread(db, *, for_admin):
+    sub = message_extra_crud.unread_counts(for_admin=for_admin)
+    return dict((await db.execute(select(sub.c.order_id, sub.c.unread))).all())
+
+
+@pytest.mark.asyncio
+async def test_mark_read_up_to_cursor_by_direction(async_session_fixture):
+    db = async_session_fixture
+    order, msgs = await _chat(db)
+
+    # m0, m2, m4 — от покупателя; m1, m3, m5 — от админа
+    assert await _unread(db, for_admin=True) == {order.id: 3}
+    assert await _unread(db, for_admin=False) == {order.id: 3}
+    assert await count_unread_messages(db) == 3
+
+    marked = await message_extra_crud.mark_read(db, [(order.id, msgs[2].id)], by_admin=True)
+    assert marked == {order.id: 2}
+    assert await _unread(db, for_admin=True) == {order.id: 1}
+    # ответы админа покупатель ещё не читал
+    assert await _unread(db, for_admin=False) == {order.id: 3}
+
+    marked = await message_extra_crud.mark_read(db, [(order.id, msgs[-1].id)], by_admin=False)
+    assert marked == {order.id: 3}
+    assert await _unread(db, for_admin=False) == {}
+
+    db.expire_all()
+    read = (await db.execute(select(Message.content).where(Message.is_read))).scalars().all()
+    assert sorted(read) == ["m0", "m1", "m2", "m3", "m5"]
+
+
+@pytest.mark.asyncio
+async def test_admin_chat_rows_single_order_delta(async_session_fixture):
+    db = async_session_fixture
+    order, msgs = await _chat(db)
+
+    full = await message_extra_crud.admin_chat_rows(db)
+    delta = await message_extra_crud.admin_chat_rows(db, order_ids=[order.id])
+    assert delta and [dict(r) for r in delta] == [dict(r) for r in full if r["order_id"] == order.id]
+    assert {r["unread_count"] for r in delta} == {3}
+    assert {r["product_title"] for r in delta} == {"Расклад"}
+
+    assert await message_extra_crud.admin_chat_rows(db, order_ids=[order.id + 1000]) == []